@@ -0,0 +1,191 @@
+# admission.py
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from shared_state import connect
+from tracing import inc, observe, register_gauge
+
+# Sustained request rate and burst size per user, shared by all worker processes
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+
+# Concurrent upstream LLM calls per process; further callers wait in the fair queue
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+# Optional per-user shares, e.g. "uid-a=2,uid-b=0.5" (everyone else gets 1)
+LLM_QUEUE_WEIGHTS = os.getenv("LLM_QUEUE_WEIGHTS", "")
+
+
+# Who upstream calls are made for: a user ID, or anon:<address> for unauthenticated requests
+_caller = contextvars.ContextVar("llm_caller", default="system")
+
+
+def current_caller():
+    """Fair-queue key of the request (or background job) running on this context."""
+    return _caller.get()
+
+
+@contextmanager
+def acting_for(caller):
+    """Attribute upstream calls made in the block to caller."""
+    token = _caller.set(caller)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+class RateLimitedError(Exception):
+    """Raised when a user has used up their request budget."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a request waited too long for an upstream slot."""
+
+    def __init__(self, waited):
+        super().__init__(f"Upstream is saturated (waited {waited:.1f}s)")
+        self.waited = waited
+
+
+class RateLimiter:
+    """Token bucket per key, stored in the shared database so limits hold across workers.
+
+    Each bucket holds up to `burst` tokens and refills at `per_minute / 60` tokens
+    per second; a request spends `cost` tokens or is refused.
+    """
+
+    def __init__(self, per_minute=RATE_LIMIT_PER_MINUTE, burst=RATE_LIMIT_BURST):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+
+    def acquire(self, key, cost=1.0, route=None):
+        """Spend cost tokens from key's bucket or raise RateLimitedError."""
+        now = time.time()
+        conn = connect()
+        # Refill and spend in one statement, so concurrent workers can't double-spend
+        changed = conn.execute(
+            """
+            INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (:key, :burst - :cost, :now)
+            ON CONFLICT(key) DO UPDATE SET
+                tokens = min(:burst, tokens + (:now - updated_at) * :rate) - :cost,
+                updated_at = :now
+            WHERE min(:burst, tokens + (:now - updated_at) * :rate) >= :cost
+            """,
+            {"key": key, "burst": self.burst, "cost": cost, "now": now, "rate": self.rate},
+        ).rowcount
+        if changed:
+            return
+        row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+        available = min(self.burst, row["tokens"] + (now - row["updated_at"]) * self.rate) if row else 0.0
+        inc("rate_limited_total", route=route or "unknown")
+        raise RateLimitedError((cost - available) / self.rate if self.rate else 60.0)
+
+
+def _parse_weights(spec):
+    weights = {}
+    for item in spec.split(","):
+        user, _, weight = item.partition("=")
+        if user.strip() and weight.strip():
+            weights[user.strip()] = float(weight)
+    return weights
+
+
+class _Waiter:
+    __slots__ = ("event", "granted", "cancelled")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class FairQueue:
+    """Weighted fair queue (self-clocked) in front of a fixed number of upstream slots.
+
+    Each request is tagged with a virtual finish time: the later of the queue's
+    virtual clock and the user's previous finish, plus cost / weight. Free slots
+    go to the smallest tag, so a user flooding the queue only delays their own
+    requests and cheap requests overtake expensive ones from the same backlog.
+    """
+
+    def __init__(self, name, concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_QUEUE_TIMEOUT_SECONDS,
+                 weights=None):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.weights = weights if weights is not None else _parse_weights(LLM_QUEUE_WEIGHTS)
+        self.active = 0
+        self.waiting = 0
+        self._virtual_time = 0.0
+        self._last_finish = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        register_gauge("llm_queue_depth", lambda: self.waiting, queue=name)
+        register_gauge("llm_queue_active", lambda: self.active, queue=name)
+
+    @contextmanager
+    def slot(self, user_id, cost=1.0, route=None):
+        """Hold one upstream slot for the duration of the block. cost is in
+        estimated prompt tokens (anything positive works; only ratios matter)."""
+        start = time.perf_counter()
+        self._acquire(user_id, max(float(cost), 1.0))
+        observe("llm_queue_wait_seconds", time.perf_counter() - start,
+                (("queue", self.name), ("route", route or "unknown")))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self, user_id, cost):
+        with self._lock:
+            finish = max(self._virtual_time, self._last_finish.get(user_id, 0.0)) + cost / self.weights.get(user_id, 1.0)
+            self._last_finish[user_id] = finish
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self._virtual_time = max(self._virtual_time, finish)
+                return
+            waiter = _Waiter()
+            heapq.heappush(self._heap, (finish, next(self._seq), waiter))
+            self.waiting += 1
+
+        if waiter.event.wait(self.timeout):
+            return
+        with self._lock:
+            if waiter.granted:
+                return
+            # Left in the heap and skipped when popped
+            waiter.cancelled = True
+            self.waiting -= 1
+        inc("llm_queue_timeouts_total", queue=self.name)
+        raise QueueTimeoutError(self.timeout)
+
+    def _release(self):
+        with self._lock:
+            while self._heap:
+                finish, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                # Hand the slot straight to the next request; active count is unchanged
+                waiter.granted = True
+                self.waiting -= 1
+                self._virtual_time = max(self._virtual_time, finish)
+                waiter.event.set()
+                return
+            self.active -= 1
+            if len(self._last_finish) > 10000:
+                # Users whose last finish is behind the clock would start from the clock anyway
+                self._last_finish = {u: f for u, f in self._last_finish.items() if f > self._virtual_time}
+
+
+# Shared by every upstream LLM call in this process; clients take a slot around each call
+llm_queue = FairQueue("llm")
@@ -1,57 +1,167 @@
 # app.py
-from flask import Flask, request, jsonify, Response
-from chat_service import handle_chat
+import time
+
+_import_started = time.perf_counter()
+
+# Settings are read at import time by the modules below, so .env goes first
+from config import load_env
+load_env()
+
+from flask import Flask, request, jsonify, Response, g, send_file
+from admission import QueueTimeoutError, RateLimitedError, RateLimiter, acting_for, llm_queue
+from chat_service import handle_chat, warm_up_foundry
+from cosmos_sync import COSMOS_SYNC_ENABLED, CosmosChangeFeed, CosmosSync, SyncedDocuments
+from chat_archive import ChatAnalytics
+from db_manager import get_token_usage_summary, init_db
 from file_uploader import FileUploader
+from graph_search import graph_search_from_env, run_sync
+from ingest_queue import IngestQueue
+from model_router import router as model_router
+from openai_client import OpenAIClient
+from prompt_budget import get_encoding
+import profiler
+from profiler import init_app as init_profiling
+from tracing import init_app as init_tracing, recent_spans, register_gauge, render_prometheus, set_gauge, span
+from resilience import CircuitOpenError, get_upstream
+from vm_cache import VMResponseCache
+from singleflight import SingleFlight, request_key
+from shared_state import SharedCounters, init_shared_state
+from tailor_cache import TailorCache, tailor_key
+from job_matcher import build_resume_profile, extract_skills, match_jobs, profile_from_features
+from warmup import Warmup
 from flask_cors import CORS
+import functools
+import hmac
+import importlib
+import json
+import math
 import os
+import threading
 import requests
 
-VM_API_BASE = "http://52.233.82.247:5000"
+VM_API_BASE = os.getenv("VM_API_BASE", "http://52.233.82.247:5000")
+# Reverse proxies in front of the app; their X-Forwarded-For entries are trusted for the client address
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+# Token for metrics, traces, analytics, profiles and status routes; unset keeps them closed
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "") or os.getenv("PROFILING_TOKEN", "")
 
 app = Flask(__name__)
+if TRUSTED_PROXY_HOPS:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 CORS(app, resources={r"/*": {"origins": "*"}})
+init_tracing(app)
+# After tracing, so profiles carry the request's trace ID
+init_profiling(app)
 
 print("START OF APP.PY")
 
 # Firebase Admin SDK for token verification
 _firebase_initialized = False
+_firebase_lock = threading.Lock()
 
 def _init_firebase():
     global _firebase_initialized
     if _firebase_initialized:
         return
-    try:
-        import firebase_admin
-        from firebase_admin import credentials
-        cred = credentials.Certificate({
-            "type": "service_account",
-            "project_id": os.getenv("FIREBASE_PROJECT_ID", ""),
-            "client_email": os.getenv("FIREBASE_CLIENT_EMAIL", ""),
-            "private_key": os.getenv("FIREBASE_PRIVATE_KEY", "").replace("\\n", "\n"),
-            "token_uri": "https://oauth2.googleapis.com/token",
-        })
-        firebase_admin.initialize_app(cred)
-        _firebase_initialized = True
-    except Exception as e:
-        print(f"Firebase init skipped: {e}")
-
-def get_user_id():
-    """Extract userId from Firebase ID token. Falls back to 'user1' for local dev."""
+    # Warm-up and the first requests may get here at the same time
+    with _firebase_lock:
+        if _firebase_initialized:
+            return
+        try:
+            import firebase_admin
+            from firebase_admin import credentials
+            cred = credentials.Certificate({
+                "type": "service_account",
+                "project_id": os.getenv("FIREBASE_PROJECT_ID", ""),
+                "client_email": os.getenv("FIREBASE_CLIENT_EMAIL", ""),
+                "private_key": os.getenv("FIREBASE_PRIVATE_KEY", "").replace("\\n", "\n"),
+                "token_uri": "https://oauth2.googleapis.com/token",
+            })
+            firebase_admin.initialize_app(cred)
+            _firebase_initialized = True
+        except Exception as e:
+            print(f"Firebase init skipped: {e}")
+
+def _verified_user_id():
+    """userId from the request's Firebase ID token, or None if it has none or it doesn't verify."""
     auth_header = request.headers.get("Authorization", "")
     if not auth_header.startswith("Bearer "):
-        return "user1"
+        return None
     token = auth_header[7:]
     try:
-        _init_firebase()
-        from firebase_admin import auth
-        decoded = auth.verify_id_token(token)
+        with span("firebase.verify"):
+            _init_firebase()
+            from firebase_admin import auth
+            decoded = auth.verify_id_token(token)
         return decoded["uid"]
     except Exception as e:
         print(f"Token verification failed, using fallback: {e}")
-        return "user1"
+        return None
+
+def get_user_id():
+    """Extract userId from Firebase ID token. Falls back to 'user1' for local dev."""
+    return _verified_user_id() or "user1"
+
+# ── Admission control for expensive LLM routes ───────────────────────
+
+rate_limiter = RateLimiter()
+# Rate-limit tokens spent per call; tailoring and analysis cost several chat turns
+ROUTE_COSTS = {"chat": 1, "tailor_resume": 3, "vm_analyze": 3, "graph_search": 1}
+
+def rate_limited(route):
+    """Resolve the caller and spend from their token bucket, or answer 429.
+
+    g.user_id is whose data the request reads (with the local-dev fallback);
+    g.caller keys the rate limit and the LLM fair queue: the verified user,
+    or the client address for anonymous requests, so those don't share one bucket.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            uid = _verified_user_id()
+            caller = uid or f"anon:{request.remote_addr}"
+            try:
+                rate_limiter.acquire(caller, ROUTE_COSTS[route], route)
+            except RateLimitedError as e:
+                resp = jsonify({"error": "Too many requests, please slow down", "retry_after": round(e.retry_after, 1)})
+                resp.headers["Retry-After"] = str(math.ceil(e.retry_after))
+                return resp, 429
+            g.user_id = uid or "user1"
+            g.caller = caller
+            with acting_for(caller):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _admin_authorized():
+    """Whether the request carries the admin token, as X-Admin-Token or (for scrapers) a bearer token."""
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get("X-Admin-Token", "")
+    auth_header = request.headers.get("Authorization", "")
+    if not token and auth_header.startswith("Bearer "):
+        token = auth_header[7:]
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def admin_only(fn):
+    """Answer 403 unless the request carries the admin token; operational routes expose other users' data."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _admin_authorized():
+            return jsonify({"error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+def _queue_timeout_response():
+    resp = jsonify({"error": "The assistant is busy right now, please retry shortly"})
+    resp.headers["Retry-After"] = "5"
+    return resp, 503
 
 # Initialize file uploader
 file_uploader = FileUploader()
+ingest_queue = IngestQueue(file_uploader)
+register_gauge("ingest_jobs_pending", ingest_queue.pending)
 
 @app.route("/upload", methods=["POST"])
 def upload_file():
@@ -67,20 +177,40 @@ def upload_file():
         # Read file data
         file_data = file.read()
         
-        # Process the file
-        document_info = file_uploader.process_file(file_data, file.filename)
+        # ?sync=1 keeps the old behaviour of extracting inside the request
+        if request.args.get("sync") == "1":
+            document_info = file_uploader.process_file(file_data, file.filename)
+            return jsonify({
+                "success": True,
+                "message": f"File '{file.filename}' uploaded and processed successfully",
+                "document_id": document_info["id"],
+                "filename": document_info["filename"],
+                "content_length": document_info["content_length"]
+            })
         
+        # Persist the bytes and let the ingest workers do the extraction
+        job = ingest_queue.submit(file_data, file.filename, profile=profiler.current())
         return jsonify({
             "success": True,
-            "message": f"File '{file.filename}' uploaded and processed successfully",
-            "document_id": document_info["id"],
-            "filename": document_info["filename"],
-            "content_length": document_info["content_length"]
-        })
+            "message": f"File '{file.filename}' uploaded and queued for processing",
+            "job_id": job["job_id"],
+            "document_id": job["document_id"],
+            "filename": job["filename"],
+            "status": job["status"],
+            "status_url": f"/upload/status/{job['job_id']}"
+        }), 202
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/upload/status/<job_id>", methods=["GET"])
+def upload_status(job_id):
+    """Report progress of a queued upload"""
+    job = ingest_queue.status(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @app.route("/documents", methods=["GET"])
 def get_documents():
     """Get all uploaded documents"""
@@ -102,6 +232,19 @@ def get_document(document_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/documents/<document_id>/rows", methods=["GET"])
+def get_document_rows(document_id):
+    """Page through the rows of a TXT/CSV document (?offset=&limit=, limit up to 1000)"""
+    try:
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+        page = file_uploader.get_document_rows(document_id, offset, limit)
+        if page is None:
+            return jsonify({"error": "Document not found"}), 404
+        return jsonify(page)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/documents/<document_id>", methods=["DELETE"])
 def delete_document(document_id):
     """Delete a document"""
@@ -115,6 +258,7 @@ def delete_document(document_id):
         return jsonify({"error": str(e)}), 500
 
 @app.route("/chat", methods=["POST"])
+@rate_limited("chat")
 def chat():
     try:
         data = request.get_json()
@@ -122,6 +266,7 @@ def chat():
         model = data.get("model", "gpt-4o")
         mode = data.get("mode", "general")
         document_ids = data.get("document_ids", [])  # List of document IDs to include
+        session_id = data.get("session_id")  # Enables server-side conversation memory
 
         if not prompt:
             return jsonify({"error": "No message provided."}), 400
@@ -129,45 +274,188 @@ def chat():
         # Basic logging for debugging
         print(f"/chat called model={model} mode={mode} doc_ids={len(document_ids)}")
 
-        # Get document content if document IDs are provided
-        document_context = ""
-        if document_ids:
-            for doc_id in document_ids:
-                content = file_uploader.get_document_content(doc_id)
-                if content:
-                    document_context += f"\n\nDocument content:\n{content}\n"
-
-        # Include document context in the prompt if available
-        if document_context:
-            enhanced_prompt = f"Context from uploaded documents:{document_context}\n\nUser question: {prompt}"
-        else:
-            enhanced_prompt = prompt
-
-        response = handle_chat(enhanced_prompt, model, mode)
+        # Selected documents; chat_service decides between one prompt and map-reduce over them
+        documents = []
+        for doc_id in document_ids:
+            info = file_uploader.get_document(doc_id)
+            if info and info.get("content"):
+                documents.append((info["filename"], info["content"]))
+
+        user_id = g.user_id if session_id else None
+        # Each upstream call inside takes its own fair-queue slot
+        response = handle_chat(
+            prompt, model, mode, user_id, str(session_id) if session_id else None, documents=documents
+        )
         return jsonify({"response": response})
+    except QueueTimeoutError:
+        return _queue_timeout_response()
     except Exception as e:
         # Return JSON error so the frontend sees a reason
         print(f"/chat error: {e}")
         return jsonify({"error": "Chat failed", "detail": str(e)}), 500
 
+@app.route("/metrics", methods=["GET"])
+@admin_only
+def metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return Response(render_prometheus(), content_type="text/plain; version=0.0.4")
+
+@app.route("/traces", methods=["GET"])
+@admin_only
+def traces():
+    """Recent spans from the in-process ring buffer"""
+    limit = request.args.get("limit", 100, type=int)
+    return jsonify({"spans": recent_spans(limit, request.args.get("trace_id"))})
+
+@app.route("/token-usage", methods=["GET"])
+@admin_only
+def token_usage():
+    """Token totals and prompt cache hit rate per route and model (optionally ?since=<ISO timestamp>)"""
+    return jsonify({"usage": get_token_usage_summary(request.args.get("since"))})
+
+chat_analytics = ChatAnalytics()
+
+@app.route("/analytics/keywords", methods=["GET"])
+@admin_only
+def analytics_keywords():
+    """Most frequent chat keywords over archived and live chat logs (?since=&until= YYYY-MM-DD, ?limit=)"""
+    try:
+        keywords = chat_analytics.top_keywords(request.args.get("since"), request.args.get("until"),
+                                               request.args.get("limit", 20, type=int))
+        return jsonify({"keywords": keywords})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/analytics/flags", methods=["GET"])
+@admin_only
+def analytics_flags():
+    """Moderation flag rate overall and per category (?since=&until= YYYY-MM-DD)"""
+    try:
+        return jsonify(chat_analytics.flag_rates(request.args.get("since"), request.args.get("until")))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/analytics/volume", methods=["GET"])
+@admin_only
+def analytics_volume():
+    """Chats and moderation-blocked requests per day (?since=&until= YYYY-MM-DD)"""
+    try:
+        return jsonify({"days": chat_analytics.volume_by_day(request.args.get("since"), request.args.get("until"))})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/admin/profiles", methods=["GET"])
+@admin_only
+def admin_profiles():
+    """Saved request/ingest profiles, newest first (X-Admin-Token: <ADMIN_TOKEN>)"""
+    return jsonify({"profiles": profiler.list_profiles(request.args.get("limit", 100, type=int))})
+
+@app.route("/admin/profiles/<profile_id>", methods=["GET"])
+@admin_only
+def admin_profile(profile_id):
+    """One saved profile's metadata"""
+    meta = profiler.load(profile_id)
+    if meta is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(meta)
+
+@app.route("/admin/profiles/<profile_id>/<kind>", methods=["GET"])
+@admin_only
+def admin_profile_download(profile_id, kind):
+    """Download a profile: cpu (collapsed stacks, for flamegraph.pl/speedscope) or memory (tracemalloc report)"""
+    path = profiler.artifact_path(profile_id, kind)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), mimetype="text/plain", as_attachment=True,
+                     download_name=os.path.basename(path))
+
+@app.route("/cosmos-sync", methods=["GET"])
+@admin_only
+def cosmos_sync_status():
+    """Change-feed sync state: lag, whether reads are served locally, document count"""
+    return jsonify(cosmos_sync.status() if cosmos_sync else {"enabled": False})
+
+@app.route("/model-routing", methods=["GET"])
+@admin_only
+def model_routing():
+    """Model router policies, per-model latency/error rates and recent routing decisions"""
+    return jsonify(model_router.snapshot(request.args.get("limit", 50, type=int)))
+
 # ── VM API proxy routes ──────────────────────────────────────────────
 
+vm_upstream = get_upstream("vm")
+# Shared so VM calls reuse pooled connections
+vm_session = requests.Session()
+
+def _vm_request(op, method, path, timeout=30, min_timeout=1.0, hedge=False, **kwargs):
+    """Call the VM API through its circuit breaker with an adaptive timeout capped at `timeout`.
+    Pass hedge=True only for idempotent reads."""
+    with span(f"vm.{op}"):
+        return vm_upstream.call(
+            op,
+            lambda t: vm_session.request(method, f"{VM_API_BASE}{path}", timeout=t, **kwargs),
+            max_timeout=timeout,
+            min_timeout=min_timeout,
+            hedge=hedge,
+        )
+
+
+vm_cache = VMResponseCache(generations=SharedCounters("vm_cache_generation"))
+# Identical concurrent VM reads (several tabs refreshing at once) share one upstream call
+vm_flight = SingleFlight("vm")
+
+# Local copy of the Cosmos resume store, kept current from its change feed; while it is
+# caught up, document reads are answered here instead of by the VM API
+synced_documents = SyncedDocuments()
+cosmos_sync = None
+if COSMOS_SYNC_ENABLED:
+    def _invalidate_users(user_ids):
+        for user_id in user_ids:
+            vm_cache.invalidate_user(user_id)
+
+    cosmos_sync = CosmosSync(CosmosChangeFeed(), synced_documents, on_change=_invalidate_users)
+
+def _cached_vm_get(op, path, user_id):
+    """Read-through cached GET against the VM API. Returns (content, status, content_type)."""
+    def fetch(etag):
+        headers = {"If-None-Match": etag} if etag else {}
+        return vm_flight.do(
+            request_key("GET", path, etag),
+            lambda: _vm_request(op, "GET", path, timeout=30, hedge=True, headers=headers),
+        )
+    return vm_cache.fetch(user_id, path, fetch)
+
+
 @app.route("/vm/analyze", methods=["POST"])
+@rate_limited("vm_analyze")
 def vm_analyze():
     """Proxy resume upload to VM API for Doc Intelligence analysis."""
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
         file = request.files['file']
-        user_id = get_user_id()
-        resp = requests.post(
-            f"{VM_API_BASE}/analyze",
-            files={"file": (file.filename, file.read(), file.content_type)},
-            headers={"X-User-Id": user_id},
-            timeout=120,
-        )
+        user_id = g.user_id
+        file_data = file.read()
+        with llm_queue.slot(g.caller, len(file_data) // 4, "vm_analyze"):
+            resp = _vm_request(
+                "analyze", "POST", "/analyze",
+                files={"file": (file.filename, file_data, file.content_type)},
+                headers={"X-User-Id": user_id},
+                timeout=120,
+                min_timeout=15,
+            )
+        # A new resume changes this user's document list
+        vm_cache.invalidate_user(user_id)
+        if cosmos_sync:
+            cosmos_sync.poke()
         return Response(resp.content, status=resp.status_code,
                         content_type=resp.headers.get("Content-Type", "application/json"))
+    except QueueTimeoutError:
+        return _queue_timeout_response()
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "VM API is unreachable"}), 502
     except Exception as e:
@@ -181,27 +469,148 @@ def vm_match_job():
         user_id = get_user_id()
         body = request.get_json() or {}
         body["userId"] = user_id
-        resp = requests.post(
-            f"{VM_API_BASE}/match-job",
-            json=body,
-            timeout=120,
+        resp = vm_flight.do(
+            request_key("POST", "/match-job", body),
+            lambda: _vm_request(
+                "match_job", "POST", "/match-job",
+                json=body,
+                timeout=120,
+                min_timeout=10,
+            ),
         )
         return Response(resp.content, status=resp.status_code,
                         content_type=resp.headers.get("Content-Type", "application/json"))
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "VM API is unreachable"}), 502
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _fetch_resume_text(document_id, user_id):
+    """Resolve resume text from the local stores first, then from the VM API."""
+    content = file_uploader.get_document_content(document_id) or synced_documents.get_text(document_id, user_id)
+    if content:
+        return content
+    content, status, _ = _cached_vm_get("get_document", f"/documents/{document_id}?userId={user_id}", user_id)
+    if status != 200:
+        return None
+    data = json.loads(content)
+    return data.get("fullText") or data.get("extractedText") or None
+
+
+@app.route("/vm/match-jobs", methods=["POST"])
+def vm_match_jobs():
+    """Score many job descriptions against one or more resumes, streaming NDJSON results."""
+    try:
+        user_id = get_user_id()
+        body = request.get_json() or {}
+        resume_ids = body.get("resumeIds") or ([body["resumeId"]] if body.get("resumeId") else [])
+        jobs = body.get("jobs") or []
+
+        if not resume_ids or not jobs:
+            return jsonify({"error": "resumeIds and jobs are required"}), 400
+
+        # Accept plain description strings or jobs.json-style objects
+        jobs = [
+            {"description": j, "index": i} if isinstance(j, str) else {**j, "index": i}
+            for i, j in enumerate(jobs)
+        ]
+
+        # Parse and vectorize each resume once, up front
+        timings = {"fetch_ms": 0.0, "parse_ms": 0.0, "vectorize_ms": 0.0, "score_ms": 0.0}
+        profiles = []
+        for resume_id in resume_ids:
+            start = time.perf_counter()
+            features = file_uploader.get_document_features(resume_id) or synced_documents.get_features(resume_id, user_id)
+            if features:
+                # Reuse the features computed at upload time
+                profiles.append(profile_from_features(resume_id, features))
+                timings["fetch_ms"] += (time.perf_counter() - start) * 1000
+                continue
+            text = _fetch_resume_text(resume_id, user_id)
+            timings["fetch_ms"] += (time.perf_counter() - start) * 1000
+            if not text:
+                return jsonify({"error": f"Resume not found: {resume_id}"}), 404
+            profile, profile_timings = build_resume_profile(resume_id, text)
+            timings["parse_ms"] += profile_timings["parse_ms"]
+            timings["vectorize_ms"] += profile_timings["vectorize_ms"]
+            profiles.append(profile)
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
+    except requests.exceptions.ConnectionError:
+        return jsonify({"error": "VM API is unreachable"}), 502
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        results = []
+        for result, score_ms in match_jobs(profiles, jobs):
+            timings["score_ms"] += score_ms
+            results.append(result)
+            yield json.dumps({"type": "result", **result}) + "\n"
+        results.sort(key=lambda r: r["score"], reverse=True)
+        yield json.dumps({
+            "type": "summary",
+            "ranked": results,
+            "timings": {k: round(v, 2) for k, v in timings.items()},
+        }) + "\n"
+
+    return Response(generate(), content_type="application/x-ndjson")
+
+
+_graph_search = None
+_graph_search_lock = threading.Lock()
+
+def _get_graph_search():
+    global _graph_search
+    with _graph_search_lock:
+        if _graph_search is None:
+            _graph_search = graph_search_from_env()
+    return _graph_search
+
+
+@app.route("/graph/search", methods=["GET"])
+@rate_limited("graph_search")
+def graph_search():
+    """Knowledge-graph facts for ?q=, from the shared cache, AuraDB, or with ?local=1 the exported snapshot."""
+    try:
+        query = (request.args.get("q") or "").strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+        search = _get_graph_search()
+        if search is None:
+            return jsonify({"error": "Knowledge graph is not configured (set NEO4J_PASSWORD or export a snapshot)"}), 503
+        # Without an AuraDB connection the snapshot is all there is
+        local = request.args.get("local") == "1" or search.graphiti is None
+        if local and search.snapshot is None:
+            return jsonify({"error": "No graph snapshot loaded"}), 404
+        with span("graph.search", local=local):
+            results = run_sync(search.search(query, limit, local=local))
+        return jsonify({"results": results, "source": "snapshot" if local else "graph"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/vm/documents", methods=["GET"])
 def vm_documents():
-    """Proxy resume list from Cosmos DB via VM API."""
+    """Resume list from Cosmos DB: the synced local copy while it is current, otherwise via VM API."""
     try:
         user_id = get_user_id()
-        resp = requests.get(f"{VM_API_BASE}/documents?userId={user_id}", timeout=30)
-        return Response(resp.content, status=resp.status_code,
-                        content_type=resp.headers.get("Content-Type", "application/json"))
+        if cosmos_sync and cosmos_sync.serving():
+            return jsonify({"documents": synced_documents.list(user_id)})
+        content, status, content_type = _cached_vm_get("documents", f"/documents?userId={user_id}", user_id)
+        return Response(content, status=status, content_type=content_type)
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "VM API is unreachable"}), 502
     except Exception as e:
@@ -210,12 +619,21 @@ def vm_documents():
 
 @app.route("/vm/documents/<document_id>", methods=["GET"])
 def vm_get_document(document_id):
-    """Proxy single document fetch from VM API (includes fullText)."""
+    """Single document (includes fullText), from the synced local copy when it has it, otherwise via VM API."""
     try:
         user_id = get_user_id()
-        resp = requests.get(f"{VM_API_BASE}/documents/{document_id}?userId={user_id}", timeout=30)
-        return Response(resp.content, status=resp.status_code,
-                        content_type=resp.headers.get("Content-Type", "application/json"))
+        if cosmos_sync and cosmos_sync.serving():
+            document = synced_documents.get(document_id, user_id)
+            if document is not None:
+                return jsonify(document)
+        content, status, content_type = _cached_vm_get(
+            "get_document", f"/documents/{document_id}?userId={user_id}", user_id
+        )
+        return Response(content, status=status, content_type=content_type)
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "VM API is unreachable"}), 502
     except Exception as e:
@@ -227,9 +645,17 @@ def vm_delete_document(document_id):
     """Proxy resume deletion to VM API."""
     try:
         user_id = get_user_id()
-        resp = requests.delete(f"{VM_API_BASE}/documents/{document_id}?userId={user_id}", timeout=30)
+        resp = _vm_request("delete_document", "DELETE", f"/documents/{document_id}?userId={user_id}", timeout=30)
+        vm_cache.invalidate_user(user_id)
+        if resp.ok:
+            # The change feed doesn't report deletes; drop the local copy now
+            synced_documents.delete(document_id)
         return Response(resp.content, status=resp.status_code,
                         content_type=resp.headers.get("Content-Type", "application/json"))
+    except CircuitOpenError:
+        return jsonify({"error": "VM API is temporarily unavailable"}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": "VM API timed out"}), 504
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "VM API is unreachable"}), 502
     except Exception as e:
@@ -248,30 +674,159 @@ def _get_resume_agent():
     return _resume_agent
 
 
+tailor_cache = TailorCache()
+
+
+def _tailoring_stream(agent, key, inputs, caller, cost, cached=None):
+    """NDJSON events for a streamed tailoring: {"type": "delta"} pieces, then "done" (or "error")."""
+    from foundry_client import NO_SUGGESTIONS_MESSAGE
+
+    def generate():
+        if cached is not None:
+            yield json.dumps({"type": "delta", "text": cached}) + "\n"
+            yield json.dumps({"type": "done", "cached": True, "suggestions": cached}) + "\n"
+            return
+        parts = []
+        try:
+            with llm_queue.slot(caller, cost, "tailor_resume"):
+                start = time.perf_counter()
+                for piece in agent.tailor_resume_stream(*inputs):
+                    parts.append(piece)
+                    yield json.dumps({"type": "delta", "text": piece}) + "\n"
+                latency = time.perf_counter() - start
+        except QueueTimeoutError as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+            return
+        except Exception as e:
+            print(f"/tailor-resume stream error: {e}")
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+            return
+        suggestions = "".join(parts)
+        if suggestions and suggestions != NO_SUGGESTIONS_MESSAGE:
+            tailor_cache.put(key, suggestions, latency)
+        yield json.dumps({"type": "done", "cached": False, "suggestions": suggestions}) + "\n"
+
+    return Response(generate(), content_type="application/x-ndjson")
+
+
 @app.route("/tailor-resume", methods=["POST"])
+@rate_limited("tailor_resume")
 def tailor_resume():
-    """Send resume + job gaps to ResumeAgent for tailoring suggestions."""
+    """Send resume + job gaps to ResumeAgent for tailoring suggestions.
+    With "stream": true (or ?stream=1) suggestions arrive as NDJSON events while they are written."""
     try:
         data = request.get_json()
+        resume_id = data.get("resumeId")
         resume_text = data.get("resumeText", "")
         job_description = data.get("jobDescription", "")
         matched_skills = data.get("matchedSkills", [])
         missing_skills = data.get("missingSkills", [])
+        stream = bool(data.get("stream")) or request.args.get("stream") == "1"
 
-        if not resume_text or not job_description:
-            return jsonify({"error": "resumeText and jobDescription are required"}), 400
+        # Clients may send a document ID instead of the full resume text
+        if resume_id and not resume_text:
+            resume_text = _fetch_resume_text(resume_id, g.user_id) or ""
+            if not resume_text:
+                return jsonify({"error": f"Resume not found: {resume_id}"}), 404
 
+        if not resume_text or not job_description:
+            return jsonify({"error": "resumeText (or resumeId) and jobDescription are required"}), 400
+
+        # Derive skill gaps from cached features when the client didn't supply them
+        features = None
+        if resume_id:
+            features = file_uploader.get_document_features(resume_id) or synced_documents.get_features(resume_id, g.user_id)
+        if features and not matched_skills and not missing_skills:
+            job_skills = extract_skills(job_description)
+            matched_skills = sorted(job_skills & set(features["skills"]))
+            missing_skills = sorted(job_skills - set(features["skills"]))
+
+        inputs = (resume_text, job_description, matched_skills, missing_skills)
+        key = tailor_key(*inputs, os.getenv("RESUME_AGENT_ENDPOINT", ""))
+        cached = tailor_cache.get(key)
+        cost = (len(resume_text) + len(job_description)) // 4
+        if stream:
+            agent = _get_resume_agent() if cached is None else None
+            return _tailoring_stream(agent, key, inputs, g.caller, cost, cached)
+        if cached is not None:
+            return jsonify({"suggestions": cached, "cached": True})
+
+        from foundry_client import NO_SUGGESTIONS_MESSAGE
         agent = _get_resume_agent()
-        suggestions = agent.tailor_resume(
-            resume_text, job_description, matched_skills, missing_skills
-        )
-        return jsonify({"suggestions": suggestions})
+        with llm_queue.slot(g.caller, cost, "tailor_resume"):
+            start = time.perf_counter()
+            suggestions = agent.tailor_resume(*inputs)
+            latency = time.perf_counter() - start
+        if suggestions != NO_SUGGESTIONS_MESSAGE:
+            tailor_cache.put(key, suggestions, latency)
+        return jsonify({"suggestions": suggestions, "cached": False})
+    except QueueTimeoutError:
+        return _queue_timeout_response()
     except Exception as e:
         print(f"/tailor-resume error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+# ── Start-up warm-up and health ──────────────────────────────────────
+
+# Everything the first request would otherwise pay for: SDK imports, credentials,
+# access tokens and TLS connections, run concurrently once the worker starts
+warmup = Warmup()
+warmup.register("firebase", _init_firebase, enabled=bool(os.getenv("FIREBASE_PROJECT_ID")))
+warmup.register("openai", lambda: OpenAIClient().warm_up(), enabled=bool(os.getenv("OPENAI_API_KEY")))
+warmup.register("foundry", warm_up_foundry, enabled=bool(os.getenv("FOUNDRY_AGENT_ENDPOINT")))
+warmup.register("resume_agent", lambda: _get_resume_agent().warm_up(), enabled=bool(os.getenv("RESUME_AGENT_ENDPOINT")))
+warmup.register("vm", lambda: vm_session.head(VM_API_BASE, timeout=10))
+warmup.register("pymupdf", lambda: importlib.import_module("fitz"))
+warmup.register("tokenizer", lambda: get_encoding("gpt-4o"))
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Liveness: the worker is serving requests"""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """Readiness: 503 until start-up warm-up has finished, then 200; includes per-component timings"""
+    status = warmup.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+def init_worker():
+    """Per-process setup, run once the (possibly forked) worker process exists. Idempotent."""
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        init_db()
+        init_shared_state()
+        file_uploader.documents  # opens the document store, importing documents.json on first start
+        ingest_queue.start()
+        warmup.start()
+        if cosmos_sync:
+            cosmos_sync.start()
+        _worker_pid = os.getpid()
+
+
+@app.before_request
+def _init_worker_on_first_request():
+    # gunicorn runs init_worker from post_worker_init; under other servers
+    # (flask run, waitress, uWSGI) the first request in each process does
+    init_worker()
+
+
+set_gauge("startup_import_seconds", round(time.perf_counter() - _import_started, 4))
+
+
 if __name__ == "__main__":
+    init_worker()
     print("ABOUT TO RUN FLASK")
     app.run(debug=True, port=5001)
 
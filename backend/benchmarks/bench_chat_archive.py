@@ -0,0 +1,126 @@
+"""
+Archival and analytics benchmark for chat logs (chat_archive.py).
+
+Fills a fresh chatbot.db with N chat log rows spread over --days days (plus
+moderation-blocked requests), archives everything older than --retention-days
+to Parquet and times the analytics queries against the same aggregates
+computed straight from SQLite, the way the comma-joined columns had to be
+read before (SQL GROUP BY for volume, Python splitting for keywords and
+categories). Correctness of the archive and the aggregates is covered by
+tests/test_chat_archive.py.
+
+Requires pyarrow.
+
+Usage (from backend/):
+  python benchmarks/bench_chat_archive.py
+  python benchmarks/bench_chat_archive.py --rows 5000000 --days 365
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("TRACE_FILE", "")
+
+KEYWORDS = ("python", "azure", "resume", "interview", "salary", "kubernetes", "react", "sql", "remote", "cover letter",
+            "promotion", "terraform", "leadership", "machine learning", "portfolio", "referral", "offer", "Python")
+CATEGORIES = ("harassment", "hate", "violence", "self-harm", "sexual")
+
+
+def fill(path, rows, days, blocked_rate):
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(path)
+    conn.execute("BEGIN")
+    chats, blocked = [], []
+    for i in range(rows):
+        # Oldest first, like rows logged over time
+        timestamp = (now - timedelta(days=days * (1 - i / rows))).isoformat()
+        if rng.random() < blocked_rate:
+            blocked.append((timestamp, "...", ", ".join(rng.sample(CATEGORIES, rng.randint(1, 2)))))
+        else:
+            chats.append((timestamp, f"question {i}", "answer " * 20, ", ".join(rng.sample(KEYWORDS, rng.randint(0, 5))), ""))
+        if len(chats) >= 100000 or i == rows - 1:
+            conn.executemany("INSERT INTO chatlog (timestamp, user_input, bot_response, keywords, moderation_flags) "
+                             "VALUES (?, ?, ?, ?, ?)", chats)
+            conn.executemany("INSERT INTO flagged (timestamp, user_input, categories) VALUES (?, ?, ?)", blocked)
+            chats, blocked = [], []
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def sqlite_aggregates(path):
+    """Reference results from the unarchived database."""
+    conn = sqlite3.connect(path)
+    keywords = Counter()
+    for (value,) in conn.execute("SELECT keywords FROM chatlog"):
+        keywords.update(k.strip().lower() for k in (value or "").split(",") if k.strip())
+    categories = Counter()
+    for (value,) in conn.execute("SELECT categories FROM flagged"):
+        categories.update(k.strip() for k in (value or "").split(",") if k.strip())
+    volume = {}
+    for table, key in (("chatlog", "chats"), ("flagged", "blocked")):
+        for day, count in conn.execute(f"SELECT substr(timestamp, 1, 10), COUNT(*) FROM {table} GROUP BY 1"):
+            volume.setdefault(day, {"date": day, "chats": 0, "blocked": 0})[key] = count
+    conn.close()
+    return keywords, categories, [volume[day] for day in sorted(volume)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat log archival and analytics benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--retention-days", type=int, default=30)
+    parser.add_argument("--blocked-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-chat-archive-")
+    os.chdir(workdir)  # db_manager's DB_PATH is relative
+    import chat_archive
+    from db_manager import DB_PATH, init_db
+
+    init_db()
+    start = time.perf_counter()
+    fill(DB_PATH, args.rows, args.days, args.blocked_rate)
+    print(f"filled {args.rows} rows in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(DB_PATH) / 2**20:.0f} MB)")
+
+    timings = {}
+    start = time.perf_counter()
+    sqlite_aggregates(DB_PATH)
+    timings["sqlite, all rows"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moved = chat_archive.archive(args.retention_days)
+    archive_seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(chat_archive.CHAT_ARCHIVE_DIR) for name in names)
+    print(f"archived {moved} in {archive_seconds:.1f}s to {size / 2**20:.0f} MB of Parquet")
+
+    analytics = chat_archive.ChatAnalytics()
+    start = time.perf_counter()
+    analytics.top_keywords(limit=len(KEYWORDS))
+    analytics.flag_rates()
+    analytics.volume_by_day()
+    timings["archive + live"] = time.perf_counter() - start
+
+    conn = sqlite3.connect(DB_PATH)
+    live_rows = conn.execute("SELECT COUNT(*) FROM chatlog").fetchone()[0]
+    conn.close()
+
+    print(f"live rows left: {live_rows}\n")
+    print(f"{'aggregates from':<18} {'seconds':>8}")
+    for name, seconds in timings.items():
+        print(f"{name:<18} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
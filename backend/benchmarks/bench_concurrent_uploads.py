@@ -0,0 +1,73 @@
+"""
+Load test for the upload ingestion queue: many concurrent uploads against one
+FileUploader, checking that every document lands in the document store intact.
+
+Usage (from backend/):
+  python benchmarks/bench_concurrent_uploads.py
+  python benchmarks/bench_concurrent_uploads.py --uploads 500 --clients 32 --workers 4 --size-kb 256
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from file_uploader import FileUploader  # noqa: E402
+from ingest_queue import IngestQueue  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent upload load test")
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent uploading threads")
+    parser.add_argument("--workers", type=int, default=4, help="ingest worker threads")
+    parser.add_argument("--size-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="upload-bench-")
+    os.chdir(workdir)
+    uploader = FileUploader()
+    queue = IngestQueue(uploader, workers=args.workers)
+    body = ("Senior engineer. Python, Flask, Azure, React. " * (args.size_kb * 1024 // 47 + 1)).encode()
+
+    def upload(i):
+        start = time.perf_counter()
+        job = queue.submit(body, f"resume_{i % 10}.txt")  # repeated names on purpose
+        return job["job_id"], time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        submitted = list(pool.map(upload, range(args.uploads)))
+    accept_s = time.perf_counter() - start
+
+    job_ids = [job_id for job_id, _ in submitted]
+    while queue.pending():
+        time.sleep(0.01)
+    total_s = time.perf_counter() - start
+
+    statuses = [queue.status(job_id) for job_id in job_ids]
+    failed = [s for s in statuses if s["status"] != "done"]
+    missing = [s["document_id"] for s in statuses if s["document_id"] not in uploader.documents]
+
+    latencies = [lat * 1000 for _, lat in submitted]
+    print(f"Uploads: {args.uploads} x {args.size_kb} KB, {args.clients} clients, {args.workers} workers")
+    print(f"Submit latency: p50 {percentile(latencies, 50):.2f} ms, p95 {percentile(latencies, 95):.2f} ms, "
+          f"p99 {percentile(latencies, 99):.2f} ms")
+    print(f"All accepted in {accept_s:.2f} s; all processed in {total_s:.2f} s "
+          f"({args.uploads / total_s:.1f} uploads/s)")
+    print(f"Failed jobs: {len(failed)}, documents missing from the store: {len(missing)}")
+    print(f"Work dir: {workdir}")
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
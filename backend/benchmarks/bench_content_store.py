@@ -0,0 +1,189 @@
+"""
+Memory and latency of compressed document content (content_store.py).
+
+Builds corpora of N resume-like documents three ways and, in a fresh process
+for each, opens the corpus and reads document content:
+
+  dict    every document's text loaded into a Python dict from documents.json
+          (how FileUploader originally held documents)
+  inline  text in the shared database's documents.content column
+  store   text compressed in memory-mapped segments (DocumentStore.get_content)
+
+Reports private (anonymous) resident memory after opening and after the
+reads, file-backed resident pages (mapped segments; shared and reclaimable
+page cache), and get_document_content latency for uniformly random ids
+(mostly cold) and for a hot set of 100 documents. Private memory of the
+store should stay roughly flat as N grows. Storage behaviour itself is
+checked by tests/test_content_store.py.
+
+Usage (from backend/):
+  python benchmarks/bench_content_store.py
+  python benchmarks/bench_content_store.py --documents 10000,100000 --doc-chars 3000 --reads 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("TRACE_FILE", "")
+
+SKILLS = ("Python", "Flask", "React", "TypeScript", "Azure", "Kubernetes", "Terraform", "SQL", "Spark", "Go",
+          "Docker", "GraphQL", "Redis", "Kafka", "PyTorch", "FastAPI", "Node.js", "AWS", "CI/CD", "OpenAI")
+VERBS = ("Led", "Built", "Designed", "Migrated", "Scaled", "Automated", "Shipped", "Owned", "Reduced", "Improved")
+NOUNS = ("services", "pipelines", "dashboards", "APIs", "data platforms", "deployments", "search", "billing")
+HOT_SET = 100
+
+
+def make_document(rng, chars):
+    lines = [f"Candidate {rng.randrange(10**6)}", "SUMMARY", "EXPERIENCE"]
+    while sum(len(line) + 1 for line in lines) < chars:
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(NOUNS)} with {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, "
+                     f"cutting latency {rng.randrange(5, 90)}% for {rng.randrange(2, 500)}k users.")
+    lines.append("SKILLS " + ", ".join(rng.sample(SKILLS, 8)))
+    return "\n".join(lines)[:chars]
+
+
+def build(directory, count, doc_chars):
+    """Write the corpus as documents.json, an inline-content database and a content-store database."""
+    rng = random.Random(count)
+    documents = {}
+    for i in range(count):
+        content = make_document(rng, doc_chars)
+        documents[f"doc-{i:07d}"] = {
+            "id": f"doc-{i:07d}", "filename": f"resume_{i}.txt", "file_path": "", "file_type": "txt",
+            "upload_date": "", "content": content, "content_length": len(content),
+        }
+    with open(os.path.join(directory, "documents.json"), "w") as f:
+        json.dump(documents, f)
+    for mode in ("inline", "store"):
+        code = (
+            "import json, sys\n"
+            "from shared_state import connect\n"
+            "from document_store import DocumentStore\n"
+            "documents = json.load(open(sys.argv[1]))\n"
+            "if sys.argv[2] == 'inline':\n"
+            "    conn = connect()\n"
+            "    conn.execute('BEGIN')\n"
+            "    conn.executemany('INSERT INTO documents (id, filename, content, content_length) VALUES (?, ?, ?, ?)',\n"
+            "        ((d['id'], d['filename'], d['content'], d['content_length']) for d in documents.values()))\n"
+            "    conn.execute('COMMIT')\n"
+            "else:\n"
+            "    store = DocumentStore()\n"
+            "    for d in documents.values():\n"
+            "        store.put(d)\n"
+        )
+        subprocess.run([sys.executable, "-c", code, os.path.join(directory, "documents.json"), mode],
+                       cwd=BACKEND_DIR, env=_env(directory, mode), check=True)
+    return list(documents)
+
+
+def _env(directory, mode):
+    env = dict(os.environ, SHARED_STATE_DB=os.path.join(directory, mode, "shared_state.db"), TRACE_FILE="")
+    env.pop("CONTENT_STORE_DIR", None)
+    return env
+
+
+def rss_mb():
+    """(anonymous, file-backed) resident MB; peak RSS and 0 on platforms without /proc."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["RssAnon"].split()[0]) / 1024, int(fields["RssFile"].split()[0]) / 1024
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 0.0
+
+
+def measure(directory, mode, reads):
+    """Run in a fresh process: open the corpus for mode, read it, print a JSON summary."""
+    from document_store import DocumentStore
+
+    ids = json.load(open(os.path.join(directory, "ids.json")))
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    if mode == "dict":
+        with open(os.path.join(directory, "documents.json")) as f:
+            documents = json.load(f)
+
+        def get_content(document_id):
+            return documents[document_id]["content"]
+    elif mode == "inline":
+        from shared_state import connect
+
+        def get_content(document_id):
+            row = connect().execute("SELECT content FROM documents WHERE id = ?", (document_id,)).fetchone()
+            return row[0] if row else None
+    else:
+        get_content = DocumentStore().get_content
+    open_seconds = time.perf_counter() - start
+    rss_open = rss_mb()
+
+    rng = random.Random(1)
+    hot = rng.sample(ids, HOT_SET)
+    timings = {}
+    for name, picks in (("random", [rng.choice(ids) for _ in range(reads)]),
+                        ("hot", [rng.choice(hot) for _ in range(reads)])):
+        samples = []
+        for document_id in picks:
+            t = time.perf_counter()
+            if not get_content(document_id):
+                raise SystemExit(f"{mode}: no content for {document_id}")
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+        timings[name] = (statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6)
+    rss_after = rss_mb()
+    print(json.dumps({
+        "open_s": open_seconds, "rss_open_mb": rss_open[0] - rss_start[0], "rss_after_mb": rss_after[0] - rss_start[0],
+        "file_mb": rss_after[1] - rss_start[1], "timings": timings,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document content memory and latency benchmark")
+    parser.add_argument("--documents", default="10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--doc-chars", type=int, default=3000)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--measure", nargs=2, metavar=("DIR", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure, args.reads)
+        return
+
+    print(f"{'documents':>9} {'mode':<7} {'open s':>7} {'private MB':>10} {'after reads':>11} {'mapped MB':>9} "
+          f"{'random p50/p99 us':>18} {'hot p50/p99 us':>15} {'disk MB':>8}")
+    for count in (int(n) for n in args.documents.split(",")):
+        with tempfile.TemporaryDirectory(prefix="bench-content-") as directory:
+            ids = build(directory, count, args.doc_chars)
+            with open(os.path.join(directory, "ids.json"), "w") as f:
+                json.dump(ids, f)
+            disk = {
+                "dict": os.path.getsize(os.path.join(directory, "documents.json")),
+                "inline": os.path.getsize(os.path.join(directory, "inline", "shared_state.db")),
+                "store": sum(os.path.getsize(os.path.join(root, name))
+                             for root, _, names in os.walk(os.path.join(directory, "store")) for name in names),
+            }
+            results = {}
+            for mode in ("dict", "inline", "store"):
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--measure", directory, mode, "--reads", str(args.reads)],
+                    cwd=BACKEND_DIR, env=_env(directory, mode), check=True, capture_output=True, text=True,
+                ).stdout
+                r = results[mode] = json.loads(out)
+                (rp50, rp99), (hp50, hp99) = r["timings"]["random"], r["timings"]["hot"]
+                print(f"{count:>9} {mode:<7} {r['open_s']:>7.2f} {r['rss_open_mb']:>10.1f} {r['rss_after_mb']:>11.1f} "
+                      f"{r['file_mb']:>9.1f} "
+                      f"{rp50:>8.1f}/{rp99:<9.1f} {hp50:>6.1f}/{hp99:<8.1f} {disk[mode] / 2**20:>8.1f}")
+            print(f"{'':>9} store private memory after reads: "
+                  f"{results['store']['rss_after_mb'] / max(results['dict']['rss_after_mb'], 0.1):.0%} of dict")
+
+
+if __name__ == "__main__":
+    main()
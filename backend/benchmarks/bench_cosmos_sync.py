@@ -0,0 +1,143 @@
+"""
+Throughput and read latency of the Cosmos change-feed sync (cosmos_sync.py).
+
+Fills an in-memory fake change feed (fake_change_feed.py) with N resumes
+across a few users and runs CosmosSync against a fresh shared database:
+
+  initial     first sync from the beginning of the feed
+  incremental a handful of edits (one metadata-only) after the initial sync;
+              only those documents are applied
+  restart     a new CosmosSync over the same database resumes from the
+              persisted continuation and applies nothing
+  replay      the last page is re-applied after its continuation was lost;
+              every item is skipped by version
+  deletes     one soft delete (deleted flag) and one hard delete (found by
+              reconciliation against the container's ids)
+
+Then compares a local document list/fetch against the same call through a
+fake VM API with --vm-latency-ms of latency. What each phase must apply is
+checked by tests/test_cosmos_sync.py; this script reports how long it takes.
+
+Usage (from backend/):
+  python benchmarks/bench_cosmos_sync.py
+  python benchmarks/bench_cosmos_sync.py --documents 5000 --users 50 --vm-latency-ms 40
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("TRACE_FILE", "")
+os.environ["SHARED_STATE_DB"] = os.path.join(tempfile.mkdtemp(prefix="bench-cosmos-sync-"), "shared_state.db")
+os.environ.pop("CONTENT_STORE_DIR", None)
+
+from bench_content_store import make_document  # noqa: E402
+from fake_change_feed import FakeChangeFeed  # noqa: E402
+from fake_upstreams import FakeUpstream  # noqa: E402
+
+from cosmos_sync import CosmosSync, SyncedDocuments  # noqa: E402
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cosmos change-feed sync benchmark")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--doc-chars", type=int, default=3000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--vm-latency-ms", type=float, default=30)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    feed = FakeChangeFeed()
+    for i in range(args.documents):
+        feed.upsert({"id": f"doc-{i:06d}", "userId": f"user{i % args.users}", "filename": f"resume_{i}.pdf",
+                     "uploadDate": "2026-01-01", "fullText": make_document(rng, args.doc_chars)})
+
+    index = SyncedDocuments(with_embedding=False)
+    sync = CosmosSync(feed, index, page_size=args.page_size)
+    rows = []
+
+    start = time.perf_counter()
+    totals = sync.sync_once()
+    seconds = time.perf_counter() - start
+    rows.append(("initial", totals, seconds))
+
+    edited = rng.sample(range(args.documents), args.edits)
+    for n, i in enumerate(edited):
+        item = {k: v for k, v in feed._items[f"doc-{i:06d}"].items() if not k.startswith("_")}
+        if n == 0:
+            item["filename"] = "renamed.pdf"  # metadata only
+        else:
+            item["fullText"] += "\nCertified Kubernetes Administrator"
+        feed.upsert(item)
+    start = time.perf_counter()
+    totals = sync.sync_once()
+    rows.append(("incremental", totals, time.perf_counter() - start))
+
+    restarted = CosmosSync(feed, SyncedDocuments(with_embedding=False), page_size=args.page_size)
+    start = time.perf_counter()
+    totals = restarted.sync_once()
+    rows.append(("restart", totals, time.perf_counter() - start))
+
+    continuation = restarted._state()["continuation"]
+    restarted._update_state(continuation=str(int(continuation) - args.page_size))
+    start = time.perf_counter()
+    totals = restarted.sync_once()
+    rows.append(("replay", totals, time.perf_counter() - start))
+
+    soft, hard = "doc-000001", "doc-000002"
+    feed.upsert({**{k: v for k, v in feed._items[soft].items() if not k.startswith("_")}, "deleted": True})
+    feed.delete(hard)
+    restarted._update_state(reconciled_at=0)
+    start = time.perf_counter()
+    totals = restarted.sync_once()
+    rows.append(("deletes", totals, time.perf_counter() - start))
+
+    print(f"{'sync':<12} {'pages':>6} {'applied':>8} {'skipped':>8} {'deleted':>8} {'removed':>8} {'seconds':>8}")
+    for name, totals, seconds in rows:
+        print(f"{name:<12} {totals['pages']:>6} {totals['applied']:>8} {totals['skipped']:>8} "
+              f"{totals['deleted']:>8} {totals['removed']:>8} {seconds:>8.3f}")
+    print(f"initial sync: {args.documents / rows[0][2]:.0f} documents/s")
+
+    vm = FakeUpstream("vm", latency_ms=args.vm_latency_ms, payload_chars=args.doc_chars).start()
+
+    def vm_get(path):
+        with urllib.request.urlopen(f"{vm.url}{path}") as resp:
+            return json.loads(resp.read())
+
+    user, document_id = "user3", "doc-000003"
+    latency = {
+        "list": (timed(lambda: json.dumps(index.list(user)), args.requests),
+                 timed(lambda: vm_get(f"/documents?userId={user}"), args.requests)),
+        "fetch": (timed(lambda: json.dumps(index.get(document_id, user)), args.requests),
+                  timed(lambda: vm_get(f"/documents/{document_id}?userId={user}"), args.requests)),
+    }
+    vm.stop()
+    print(f"\n{'read':<8} {'local p50':>10} {'VM p50':>10}")
+    for name, (local_ms, vm_ms) in latency.items():
+        print(f"{name:<8} {local_ms:>7.2f} ms {vm_ms:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
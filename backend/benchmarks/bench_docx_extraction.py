@@ -0,0 +1,171 @@
+"""
+DOCX extraction benchmark: streaming extractor (docx_extractor.py) vs the
+previous python-docx paragraph loop.
+
+Generates resume-like .docx files of increasing size (headings, bullet lists,
+a skills table, a header and a text box), then reports extraction time, peak
+traced memory and how much text each extractor recovers. The legacy column
+is skipped when python-docx is not installed.
+
+Usage (from backend/):
+  python benchmarks/bench_docx_extraction.py
+  python benchmarks/bench_docx_extraction.py --paragraphs 1000,10000,50000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from docx_extractor import extract_docx  # noqa: E402
+
+NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+      'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+      'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+      'xmlns:v="urn:schemas-microsoft-com:vml" '
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>
+</Types>"""
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+DOC_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>
+</Relationships>"""
+
+HEADINGS = ("Summary", "Experience", "Projects", "Education", "Skills")
+SENTENCES = (
+    "Led migration of Flask services to AKS and cut deploy time by 40%.",
+    "Built CI/CD pipelines in Azure DevOps with automated test gates.",
+    "Designed React dashboards backed by PostgreSQL and Redis caches.",
+    "Mentored four engineers and introduced design reviews.",
+)
+
+
+def _run(text):
+    return f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _paragraph(text, style=None, bullet=False):
+    props = ""
+    if style or bullet:
+        props = "<w:pPr>" + (f'<w:pStyle w:val="{style}"/>' if style else "") + \
+                ('<w:numPr><w:ilvl w:val="0"/><w:numId w:val="1"/></w:numPr>' if bullet else "") + "</w:pPr>"
+    return f"<w:p>{props}{_run(text)}</w:p>"
+
+
+def _table(rows):
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def _text_box(text):
+    box = f"<w:txbxContent>{_paragraph(text)}</w:txbxContent>"
+    return ("<w:p><w:r><mc:AlternateContent>"
+            f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx>{box}</wps:txbx></w:drawing></mc:Choice>"
+            f"<mc:Fallback><w:pict><v:textbox>{box}</v:textbox></w:pict></mc:Fallback>"
+            "</mc:AlternateContent></w:r></w:p>")
+
+
+def generate_docx(path, paragraphs):
+    """Write a resume-like .docx with roughly `paragraphs` body paragraphs."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("word/_rels/document.xml.rels", DOC_RELS)
+        archive.writestr("word/header1.xml", f"<w:hdr {NS}>{_paragraph('Jane Doe | jane@example.com')}</w:hdr>")
+        with archive.open("word/document.xml", "w") as out:
+            out.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {NS}><w:body>'.encode())
+            out.write(_text_box("Open to remote roles").encode())
+            written = 0
+            while written < paragraphs:
+                for heading in HEADINGS:
+                    chunk = [_paragraph(heading, style="Heading1")]
+                    if heading == "Skills":
+                        chunk.append(_table([["Languages", "Python, TypeScript, SQL"],
+                                             ["Cloud", "Azure, AWS, Kubernetes"]]))
+                    for i in range(20):
+                        chunk.append(_paragraph(SENTENCES[i % len(SENTENCES)], bullet=i % 2 == 0))
+                    written += len(chunk)
+                    out.write("".join(chunk).encode())
+            out.write(b"<w:sectPr/></w:body></w:document>")
+
+
+def legacy_extract(path):
+    """The extractor this module replaced: python-docx paragraphs only."""
+    from docx import Document
+
+    doc = Document(path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text.strip()
+
+
+def measure(fn, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    text = result[0] if isinstance(result, tuple) else result
+    return statistics.median(times), peak, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs python-docx extraction")
+    parser.add_argument("--paragraphs", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import docx  # noqa: F401
+        have_legacy = True
+    except ImportError:
+        have_legacy = False
+        print("python-docx not installed; reporting the streaming extractor only\n")
+
+    workdir = tempfile.mkdtemp(prefix="docx-bench-")
+    print(f"{'paragraphs':>10} {'size KB':>8} {'extractor':>10} {'median ms':>10} {'peak MB':>8} "
+          f"{'chars':>9} {'skills table':>12} {'header':>6} {'text box':>8}")
+    for count in [int(p) for p in args.paragraphs.split(",")]:
+        path = os.path.join(workdir, f"resume_{count}.docx")
+        generate_docx(path, count)
+        size_kb = os.path.getsize(path) // 1024
+        runs = [("streaming", lambda p: extract_docx(p))]
+        if have_legacy:
+            runs.append(("legacy", legacy_extract))
+        for name, fn in runs:
+            seconds, peak, text = measure(fn, path, args.repeat)
+            print(f"{count:>10} {size_kb:>8} {name:>10} {seconds * 1000:>10.1f} {peak / 2**20:>8.1f} {len(text):>9} "
+                  f"{'yes' if 'Kubernetes' in text else 'no':>12} {'yes' if 'jane@example.com' in text else 'no':>6} "
+                  f"{'yes' if 'remote roles' in text else 'no':>8}")
+        sections = extract_docx(path)[1]
+        print(f"{'':>10} {'':>8} {'sections':>10} {len(sections)} (first: "
+              + ", ".join(f"{s['title']}@{s['start']}" for s in sections[:4]) + ")")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Latency of knowledge-graph search (graph_search.py).
+
+Runs a set of questions against a stub Graphiti (see stub_graph.py) with a
+fixed remote latency: first through GraphSearch with a cold cache, then again
+with the cache warm (including rephrasings that normalize to the same query),
+then in-process against an exported snapshot, and reports how closely the
+snapshot's results match the remote ones. Caching, invalidation and the
+snapshot round trip are checked by tests/test_graph_search.py.
+
+Usage (from backend/):
+  python benchmarks/bench_graph_search.py
+  python benchmarks/bench_graph_search.py --facts 20000 --latency-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("TRACE_FILE", "")
+_tmp = tempfile.mkdtemp(prefix="bench-graph-")
+os.environ["SHARED_STATE_DB"] = os.path.join(_tmp, "shared_state.db")
+
+from graph_search import GraphSearch, GraphSnapshot, export_snapshot  # noqa: E402
+from stub_graph import StubGraphiti, job_facts  # noqa: E402
+from tracing import counter_value  # noqa: E402
+
+QUESTIONS = [
+    "What companies are hiring for React and full stack roles?",
+    "What programming skills does Troy have?",
+    "Which roles require Kubernetes experience?",
+    "Who is hiring a Data Engineer?",
+    "Which roles require Python?",
+    "Has Troy used Azure?",
+]
+
+
+def _ms(samples):
+    return f"p50 {statistics.median(samples) * 1000:8.2f} ms   max {max(samples) * 1000:8.2f} ms"
+
+
+async def timed(search, questions, **kwargs):
+    samples, results = [], []
+    for question in questions:
+        start = time.perf_counter()
+        results.append(await search.search(question, num_results=5, **kwargs))
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+async def run(args):
+    graph = StubGraphiti(job_facts(args.facts), latency_ms=args.latency_ms)
+    search = GraphSearch(graph)
+
+    cold, remote_results = await timed(search, QUESTIONS)
+    warm, _ = await timed(search, QUESTIONS)
+    rephrased, _ = await timed(search, [f"  {q.upper()}  " for q in QUESTIONS])
+    remote_calls = graph.searches
+    print(f"Remote (cold cache)  {_ms(cold)}   graph searches: {len(QUESTIONS)}")
+    print(f"Cache hit            {_ms(warm)}")
+    print(f"Cache hit, rephrased {_ms(rephrased)}   graph searches after all three passes: {remote_calls}")
+
+    path = os.path.join(_tmp, "graph_snapshot.json.gz")
+    start = time.perf_counter()
+    nodes, edges = await export_snapshot(graph, path)
+    export_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    search.snapshot = GraphSnapshot.load(path)
+    load_seconds = time.perf_counter() - start
+    print(f"\nSnapshot: {nodes} nodes, {edges} edges, {os.path.getsize(path) / 1e6:.2f} MB "
+          f"(export {export_seconds:.2f}s, load {load_seconds:.2f}s, "
+          f"{'numpy' if search.snapshot._np is not None else 'pure Python'})")
+    local, local_results = await timed(search, QUESTIONS, local=True)
+    print(f"Local snapshot       {_ms(local)}")
+
+    overlap = [
+        len({r["uuid"] for r in remote} & {r["uuid"] for r in snap}) / max(len(remote), 1)
+        for remote, snap in zip(remote_results, local_results)
+    ]
+    print(f"Top-5 overlap with remote results: {statistics.mean(overlap):.0%}")
+    print(f"\nCache hits {counter_value('graph_cache_hits_total'):.0f}, "
+          f"misses {counter_value('graph_cache_misses_total'):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge-graph search cache and snapshot benchmark")
+    parser.add_argument("--facts", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=250)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
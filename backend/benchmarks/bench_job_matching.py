@@ -0,0 +1,75 @@
+"""
+Benchmark batch job matching (job_matcher.match_jobs) on the request thread and in scoring processes.
+
+Scores --resumes resumes against batches of synthetic job descriptions, once
+with every job scored inline and once per --processes setting (2 or more)
+through the process pool, so the batch size where processes start to pay off
+(and the MATCH_PARALLEL_MIN_JOBS threshold) can be read off the table. Each
+pool is started and warmed up before it is timed. Correctness is covered by
+tests/test_job_matcher.py.
+
+Usage (from backend/):
+  python benchmarks/bench_job_matching.py
+  python benchmarks/bench_job_matching.py --jobs 100,500,2000 --processes 2,4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import job_matcher  # noqa: E402
+from job_matcher import build_resume_profile, match_jobs  # noqa: E402
+
+WORDS = (
+    "python react azure kubernetes docker terraform pipelines microservices postgresql snowflake airflow "
+    "spark graphql rest apis typescript node.js aws gcp llm rag openai machine learning customers scale "
+    "ownership mentoring latency reliability on-call design reviews stakeholders roadmap delivery"
+).split()
+
+
+def make_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def run(profiles, jobs, processes, min_jobs):
+    job_matcher.MATCH_PROCESSES = processes
+    job_matcher.MATCH_PARALLEL_MIN_JOBS = min_jobs
+    start = time.perf_counter()
+    count = sum(1 for _ in match_jobs(profiles, jobs))
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch job matching benchmark")
+    parser.add_argument("--resumes", type=int, default=5)
+    parser.add_argument("--jobs", default="50,200,400,1000,2000")
+    parser.add_argument("--processes", default="2,4")
+    parser.add_argument("--job-words", type=int, default=400)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    profiles = [build_resume_profile(f"r{i}", make_text(rng, 800))[0] for i in range(args.resumes)]
+    sizes = [int(n) for n in args.jobs.split(",")]
+    settings = [int(n) for n in args.processes.split(",")]
+    all_jobs = [{"description": make_text(rng, args.job_words), "index": i} for i in range(max(sizes))]
+
+    columns = {"inline": [run(profiles, all_jobs[:size], 1, size)[0] for size in sizes]}
+    for processes in settings:
+        if job_matcher._pool is not None:
+            job_matcher._pool.shutdown()
+            job_matcher._pool = None
+        run(profiles, all_jobs[:processes * 4], processes, 1)  # start and warm up the pool
+        columns[f"{processes} procs"] = [run(profiles, all_jobs[:size], processes, 1)[0] for size in sizes]
+
+    print(f"{os.cpu_count()} CPUs, {args.resumes} resumes, {args.job_words} words per job\n")
+    print(f"{'jobs':>6} " + " ".join(f"{name + ' s':>10}" for name in columns))
+    for i, size in enumerate(sizes):
+        print(f"{size:>6} " + " ".join(f"{seconds[i]:>10.2f}" for seconds in columns.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Multi-document chat latency: one combined prompt vs map-reduce (chat_service.py).
+
+Runs handle_chat over sets of documents against a fake OpenAI upstream whose
+latency grows with prompt size (--per-1k-chars-ms), like real prompt
+processing. The single-prompt mode pays for the sum of every document; the
+map-reduce mode runs one extraction call per document chunk concurrently and
+one combining call, so it should track the largest document instead.
+
+Needs the openai package (the client talks HTTP to the fake upstream).
+
+Usage (from backend/):
+  python benchmarks/bench_map_reduce.py
+  python benchmarks/bench_map_reduce.py --documents 16 --doc-chars 30000 --per-1k-chars-ms 20 --concurrency 4
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("TRACE_FILE", "")
+
+from fake_upstreams import FakeUpstream  # noqa: E402
+
+QUESTION = "Which candidates have led an Azure migration, and what results did they report?"
+LINES = (
+    "Led migration of Flask services to AKS and cut deploy time by 40%.",
+    "Built CI/CD pipelines in Azure DevOps with automated test gates.",
+    "Designed React dashboards backed by PostgreSQL and Redis caches.",
+    "Mentored four engineers and introduced design reviews.",
+    "Owned on-call for the payments platform; reduced pages by half.",
+)
+
+
+def make_document(chars, seed):
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < chars:
+        line = rng.choice(LINES)
+        lines.append(line if rng.random() > 0.1 else "")
+        size += len(line) + 1
+    return "\n".join(lines)[:chars]
+
+
+def run(chat_service, documents, repeat, map_reduce):
+    # The thresholds are read per call, so the mode can be forced per run
+    chat_service.MAP_REDUCE_MIN_DOCUMENTS = 1 if map_reduce else 10**9
+    chat_service.MAP_REDUCE_MIN_CHARS = 0 if map_reduce else 10**12
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chat_service.handle_chat(QUESTION, "gpt-4o", documents=documents)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single prompt vs map-reduce multi-document chat")
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--doc-chars", type=int, default=20000, help="size of each regular document")
+    parser.add_argument("--large-chars", type=int, default=60000, help="size of the one large document")
+    parser.add_argument("--latency-ms", type=float, default=150, help="fixed latency per upstream call")
+    parser.add_argument("--per-1k-chars-ms", type=float, default=15, help="added latency per 1000 prompt chars")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        print("openai package not installed; this benchmark calls the fake upstream through the real client")
+        return 1
+
+    openai_upstream = FakeUpstream("openai", latency_ms=args.latency_ms, payload_chars=400,
+                                   latency_per_1k_chars_ms=args.per_1k_chars_ms).start()
+    os.environ.update({"OPENAI_API_KEY": "sk-bench", "OPENAI_BASE_URL": openai_upstream.url + "/v1"})
+    os.chdir(tempfile.mkdtemp(prefix="map-reduce-bench-"))
+
+    import chat_service
+    chat_service.MAP_REDUCE_CONCURRENCY = args.concurrency
+
+    scenarios = [
+        ("1 document", [("resume_0.txt", make_document(args.doc_chars, 0))]),
+        (f"{args.documents} documents", [
+            (f"resume_{i}.txt", make_document(args.doc_chars, i)) for i in range(args.documents)
+        ]),
+        (f"{args.documents} + 1 large", [
+            (f"resume_{i}.txt", make_document(args.doc_chars, i)) for i in range(args.documents)
+        ] + [("portfolio.txt", make_document(args.large_chars, 99))]),
+        (f"{args.documents * 2} documents", [
+            (f"resume_{i}.txt", make_document(args.doc_chars, i)) for i in range(args.documents * 2)
+        ]),
+    ]
+
+    print(f"fake upstream: {args.latency_ms:.0f} ms + {args.per_1k_chars_ms:.0f} ms per 1k prompt chars; "
+          f"map concurrency {args.concurrency}, chunk {chat_service.MAP_CHUNK_CHARS} chars\n")
+    print(f"{'scenario':<20} {'total KB':>8} {'largest KB':>10} {'single s':>9} {'map-reduce s':>12} "
+          f"{'calls':>6} {'speedup':>8}")
+    for name, documents in scenarios:
+        total = sum(len(c) for _, c in documents)
+        largest = max(len(c) for _, c in documents)
+        single = run(chat_service, documents, args.repeat, map_reduce=False)
+        openai_upstream.reset_counts()
+        mapped = run(chat_service, documents, args.repeat, map_reduce=True)
+        calls = openai_upstream.paths.get("/v1/chat/completions", 0) // args.repeat
+        print(f"{name:<20} {total / 1024:>8.0f} {largest / 1024:>10.0f} {single:>9.2f} {mapped:>12.2f} "
+              f"{calls:>6} {single / mapped:>7.1f}x")
+
+    openai_upstream.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
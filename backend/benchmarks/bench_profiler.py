@@ -0,0 +1,98 @@
+"""
+Overhead of on-demand profiling (profiler.py).
+
+Runs a CPU-bound request stand-in (resume feature extraction over a few
+documents) unprofiled and under the sampling profiler, on several threads
+at once as a worker would, alternating between the two in rounds so
+machine noise hits both alike; then a few requests with allocation
+tracking (tracemalloc slows the profiled code several times over, so it
+is meant for single requests). Reports median latency per mode and what
+the last profiles captured; their contents and the on-disk ring are
+checked by tests/test_profiler.py.
+
+Usage (from backend/):
+  python benchmarks/bench_profiler.py
+  python benchmarks/bench_profiler.py --requests 100 --threads 8 --interval-ms 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("TRACE_FILE", "")
+os.environ["PROFILE_DIR"] = tempfile.mkdtemp(prefix="bench-profiler-")
+os.environ["PROFILE_RING_SIZE"] = "20"
+
+from bench_content_store import make_document  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profiler overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20, help="requests per mode per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=4, help="documents featurized per request")
+    parser.add_argument("--doc-chars", type=int, default=6000)
+    parser.add_argument("--memory-requests", type=int, default=3)
+    parser.add_argument("--interval-ms", type=float, default=10)
+    args = parser.parse_args()
+    os.environ["PROFILE_INTERVAL_MS"] = str(args.interval_ms)
+
+    import profiler
+    from resume_features import compute_features
+
+    rng = random.Random(0)
+    documents = [make_document(rng, args.doc_chars) for _ in range(args.documents)]
+    spike_mb = 20
+
+    def handle(modes):
+        start = time.perf_counter()
+
+        def work():
+            for text in documents:
+                compute_features(text, with_embedding=False)
+            if "memory" in modes:
+                spike = [bytearray(1024) for _ in range(spike_mb * 1024)]  # like a large page buffer
+                del spike
+
+        if modes:
+            with profiler.profile("bench request", modes):
+                work()
+        else:
+            work()
+        return time.perf_counter() - start
+
+    samples = {"off": [], "cpu": []}
+    with ThreadPoolExecutor(args.threads) as pool:
+        for _ in range(args.rounds):
+            for name, modes in (("off", ()), ("cpu", ("cpu",))):
+                samples[name] += pool.map(handle, [modes] * args.requests)
+    cpu = profiler.list_profiles(1)[0]
+    samples["cpu+memory"] = [handle(("cpu", "memory")) for _ in range(args.memory_requests)]
+    results = {name: statistics.median(values) * 1000 for name, values in samples.items()}
+
+    baseline = results["off"]
+    print(f"{'mode':<12} {'p50 ms':>8} {'overhead':>9}")
+    for name, ms in results.items():
+        print(f"{name:<12} {ms:>8.1f} {ms / baseline - 1:>+8.1%}")
+
+    memory = profiler.list_profiles(1)[0]
+    with open(profiler.artifact_path(cpu["id"], "cpu")) as f:
+        collapsed = f.read()
+    print(f"\nprofile {cpu['id']}: {cpu['samples']} samples in {cpu['seconds'] * 1000:.0f} ms")
+    print("hottest stack:", collapsed.splitlines()[0][-160:])
+    print(f"profile {memory['id']}: peak {memory['memory']['peak_bytes'] / 2**20:.1f} MiB "
+          f"({spike_mb} MiB allocated per request)")
+
+
+if __name__ == "__main__":
+    main()
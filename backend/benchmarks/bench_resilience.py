@@ -0,0 +1,141 @@
+"""
+Fault-injection harness for resilience.py: runs calls against a local fake
+upstream while injecting errors and latency, and reports how the circuit
+breaker, adaptive timeouts and hedged requests behave. The behaviour itself
+is checked by tests/test_resilience.py.
+
+Usage (from backend/):
+  python benchmarks/bench_resilience.py
+  python benchmarks/bench_resilience.py --scenario hedging --calls 500
+"""
+
+import argparse
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_upstreams import FakeUpstream  # noqa: E402
+from resilience import CircuitOpenError, Upstream  # noqa: E402
+
+
+class _Result:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def _get(url):
+    def call(timeout):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                resp.read()
+                return _Result(resp.status)
+        except urllib.error.HTTPError as e:
+            return _Result(e.code)
+    return call
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def breaker_scenario(calls):
+    fake = FakeUpstream("vm", latency_ms=100, error_rate=1.0).start()
+    upstream = Upstream("fake-vm", failure_threshold=5, reset_timeout=1.0)
+    call = _get(fake.url + "/documents?userId=bench")
+
+    outcomes = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            upstream.call("documents", call, max_timeout=5)
+            outcome = "upstream-error"
+        except CircuitOpenError:
+            outcome = "rejected"
+        outcomes.append((outcome, (time.perf_counter() - start) * 1000))
+
+    rejected = [ms for o, ms in outcomes if o == "rejected"]
+    errors = [ms for o, ms in outcomes if o == "upstream-error"]
+    print("Circuit breaker (100% injected 503s, 100 ms latency):")
+    print(f"  upstream attempts: {fake.requests} of {calls} calls")
+    print(f"  failed at upstream: {len(errors)} (mean {sum(errors) / max(len(errors), 1):.1f} ms)")
+    print(f"  failed fast:        {len(rejected)} (mean {sum(rejected) / max(len(rejected), 1):.3f} ms)")
+
+    fake.error_rate = 0.0
+    time.sleep(1.1)
+    upstream.call("documents", call, max_timeout=5)
+    print(f"  after recovery + reset timeout: breaker {upstream.breaker.state}")
+    fake.stop()
+
+
+def adaptive_timeout_scenario(calls):
+    fake = FakeUpstream("vm", latency_ms=20, jitter_ms=5).start()
+    upstream = Upstream("fake-vm")
+    call = _get(fake.url + "/documents?userId=bench")
+    for _ in range(calls):
+        upstream.call("documents", call, max_timeout=30, min_timeout=0.1)
+    learned = upstream.timeout_for("documents", 30).current()
+
+    # Upstream starts hanging: calls should give up at the learned timeout, not at 30 s
+    fake.slow_rate, fake.slow_latency_ms = 1.0, 3000
+    start = time.perf_counter()
+    try:
+        upstream.call("documents", call, max_timeout=30, min_timeout=0.1)
+        timed_out = False
+    except Exception:
+        timed_out = True
+    waited = time.perf_counter() - start
+    print("Adaptive timeout (20 +/- 5 ms upstream, then a 3 s hang):")
+    print(f"  learned timeout after {calls} calls: {learned * 1000:.0f} ms (ceiling 30000 ms)")
+    print(f"  hung call {'timed out' if timed_out else 'completed'} after {waited * 1000:.0f} ms")
+    fake.stop()
+
+
+def hedging_scenario(calls):
+    fake = FakeUpstream("vm", latency_ms=20, slow_rate=0.05, slow_latency_ms=400).start()
+    call = _get(fake.url + "/documents?userId=bench")
+    results = {}
+    for hedge in (False, True):
+        upstream = Upstream(f"fake-vm-hedge-{hedge}")
+        # Learn the latency profile first so the hedge delay (observed p95) is meaningful
+        for _ in range(50):
+            upstream.call("documents", call, max_timeout=5, hedge=False)
+        fake.reset_counts()
+        latencies = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            upstream.call("documents", call, max_timeout=5, hedge=hedge)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[hedge] = (_percentile(latencies, 50), _percentile(latencies, 99), fake.requests)
+    print("Hedged requests (20 ms upstream, 5% of requests take 400 ms):")
+    for hedge, (p50, p99, upstream_requests) in results.items():
+        label = "hedged  " if hedge else "unhedged"
+        print(f"  {label} p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  upstream requests {upstream_requests} / {calls}")
+    fake.stop()
+
+
+SCENARIOS = {
+    "breaker": breaker_scenario,
+    "adaptive_timeout": adaptive_timeout_scenario,
+    "hedging": hedging_scenario,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resilience fault-injection harness")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="run a single scenario")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    for name in [args.scenario] if args.scenario else list(SCENARIOS):
+        SCENARIOS[name](args.calls)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Cold-start benchmark for the backend.
+
+Imports app.py (or another module) in fresh interpreters under
+`python -X importtime` and reports wall-clock import time, the memory the
+import added (peak RSS delta, and traced Python allocations with
+--tracemalloc), the slowest imports it makes, and whether any module that
+should load lazily (PDF/DOCX parsers, OpenAI SDK, Azure identity) was pulled
+in at startup. Results are stored as JSON so runs can be compared.
+
+Usage (from backend/):
+  python benchmarks/bench_startup.py --label baseline
+  python benchmarks/bench_startup.py --label my-change --compare benchmarks/results/startup-baseline.json
+  python benchmarks/bench_startup.py --module chat_service --runs 10 --tracemalloc
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Compared against a baseline, a change beyond this fraction counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# Modules that are only needed on first use and must not load at startup
+LAZY_MODULES = ("openai", "fitz", "docx", "lxml", "azure.identity", "firebase_admin", "tiktoken", "pyarrow")
+
+CHILD = """
+import json, resource, sys, time
+trace = {tracemalloc}
+if trace:
+    import tracemalloc
+    tracemalloc.start()
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+result = {{
+    "import_s": elapsed,
+    "rss_delta_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+    "lazy_loaded": sorted(m for m in {lazy!r} if m in sys.modules),
+}}
+if trace:
+    result["traced_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+print("BENCH_RESULT " + json.dumps(result))
+"""
+
+
+def parse_importtime(stderr, module):
+    """Cumulative microseconds of each import made directly by `module`, from -X importtime output.
+
+    Nested imports are reported (indented one level deeper) before the module that imported them.
+    """
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                children[module] = int(cumulative)
+                return children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = children.get(name.strip(), 0) + int(cumulative)
+    return {}
+
+
+def run_once(module, tracemalloc, workdir):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, TRACE_FILE="", PYTHONDONTWRITEBYTECODE="1")
+    code = CHILD.format(module=module, tracemalloc=tracemalloc, lazy=LAZY_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir, env=env,
+                          capture_output=True, text=True)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")]
+    if proc.returncode != 0 or not lines:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"importing {module} failed:\n{tail}")
+    result = json.loads(lines[-1][len("BENCH_RESULT "):])
+    result["imports_us"] = parse_importtime(proc.stderr, module)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    """Print deltas against a stored run. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison vs {baseline['label']} ({baseline['git_rev']}):")
+    regressions = 0
+    for metric in ("import_ms_median", "rss_delta_kb_median", "traced_peak_kb_median"):
+        old, new = baseline["summary"].get(metric), current["summary"].get(metric)
+        if not old or new is None:
+            continue
+        delta = (new - old) / old
+        regressed = delta > REGRESSION_THRESHOLD
+        regressions += regressed
+        print(f"  {metric:<24} {old:>10.1f} -> {new:>10.1f}  {delta:+7.1%}{'  <-- REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend cold-start (import time and memory) benchmark")
+    parser.add_argument("--label", default=None, help="name for the stored result (default: git revision)")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to show")
+    parser.add_argument("--tracemalloc", action="store_true", help="also measure traced Python allocations")
+    parser.add_argument("--compare", help="path to a stored result to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="backend-startup-")
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(args.module, False, workdir))
+        print(f"run {i + 1}: {runs[-1]['import_s'] * 1000:.1f} ms, +{runs[-1]['rss_delta_kb'] / 1024:.1f} MB RSS")
+    traced = run_once(args.module, True, workdir)["traced_peak_kb"] if args.tracemalloc else None
+
+    summary = {
+        "import_ms_median": round(statistics.median(r["import_s"] for r in runs) * 1000, 2),
+        "import_ms_min": round(min(r["import_s"] for r in runs) * 1000, 2),
+        "rss_delta_kb_median": statistics.median(r["rss_delta_kb"] for r in runs),
+    }
+    if traced is not None:
+        summary["traced_peak_kb_median"] = traced
+
+    imports = {}
+    for r in runs:
+        for name, us in r["imports_us"].items():
+            imports.setdefault(name, []).append(us)
+    slowest = sorted(((statistics.median(v), k) for k, v in imports.items()), reverse=True)[: args.top]
+    lazy_loaded = sorted({m for r in runs for m in r["lazy_loaded"]})
+
+    print(f"\nimport {args.module}: median {summary['import_ms_median']} ms "
+          f"(min {summary['import_ms_min']} ms), +{summary['rss_delta_kb_median'] / 1024:.1f} MB RSS"
+          + (f", {traced / 1024:.1f} MB traced peak" if traced is not None else ""))
+    print(f"slowest imports made by {args.module} (cumulative):")
+    for us, name in slowest:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+    print(f"lazy modules loaded at startup: {', '.join(lazy_loaded) or 'none'}")
+
+    result = {
+        "label": args.label or git_revision(),
+        "git_rev": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "module": args.module,
+        "runs": args.runs,
+        "summary": summary,
+        "slowest_imports_ms": {name: round(us / 1000, 2) for us, name in slowest},
+        "lazy_loaded": lazy_loaded,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"startup-{result['label']}.json")
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {out_path}")
+
+    failed = bool(lazy_loaded) and args.module == "app"
+    if args.compare:
+        failed = compare(result, args.compare) or failed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
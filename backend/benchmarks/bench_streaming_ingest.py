@@ -0,0 +1,100 @@
+"""
+Memory and throughput of streaming TXT/CSV ingestion (text_ingest.py).
+
+Generates job-listing CSV exports and plain-text files of increasing size,
+ingests each through FileUploader.process_stored_file, and reports time,
+peak traced memory, stored rows and content size. Peak memory should stay
+flat as the files grow. Stored rows and counts are checked by
+tests/test_text_ingest.py.
+
+Usage (from backend/):
+  python benchmarks/bench_streaming_ingest.py
+  python benchmarks/bench_streaming_ingest.py --csv-rows 10000,100000,1000000 --txt-mb 1,10,100
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.pop("OPENAI_API_KEY", None)  # keep feature computation local
+
+from file_uploader import FileUploader  # noqa: E402
+
+TITLES = ("Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "QA Analyst")
+COMPANIES = ("Contoso", "Fabrikam", "Northwind", "Tailspin", "Woodgrove", "Litware")
+SKILLS = ("Python", "Azure", "React", "SQL", "Kubernetes", "Terraform", "TypeScript")
+
+
+def write_csv(path, rows):
+    rng = random.Random(rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["job_id", "title", "company", "salary", "skills", "description"])
+        for i in range(rows):
+            writer.writerow([
+                i, rng.choice(TITLES), rng.choice(COMPANIES), rng.randrange(60_000, 220_000, 500),
+                ", ".join(rng.sample(SKILLS, 3)),
+                f"Build and run services at {rng.choice(COMPANIES)}; on-call one week in six.",
+            ])
+
+
+def write_txt(path, megabytes):
+    line = "Senior engineer with Python, Azure and React experience; led platform migrations.\n"
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(megabytes * 1024 * 1024 // len(line)):
+            f.write(line)
+
+
+def ingest(uploader, path, filename):
+    """Time an untraced run, then re-ingest under tracemalloc for the peak (tracing slows it several-fold)."""
+    start = time.perf_counter()
+    uploader.process_stored_file(os.path.basename(path), filename, path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    info = uploader.process_stored_file(os.path.basename(path), filename, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return info, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming TXT/CSV ingestion benchmark")
+    parser.add_argument("--csv-rows", default="10000,100000,500000")
+    parser.add_argument("--txt-mb", default="1,10,50")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ingest-bench-")
+    os.chdir(workdir)
+    uploader = FileUploader()
+
+    print(f"{'file':<22} {'size MB':>8} {'seconds':>8} {'MB/s':>7} {'peak MB':>8} {'rows':>9} {'content KB':>10}")
+    for rows in [int(r) for r in args.csv_rows.split(",") if r]:
+        path = os.path.join(workdir, f"jobs_{rows}.csv")
+        write_csv(path, rows)
+        info, seconds, peak = ingest(uploader, path, os.path.basename(path))
+        size = os.path.getsize(path) / 2**20
+        stored = info["stats"]["rows"]
+        print(f"{os.path.basename(path):<22} {size:>8.1f} {seconds:>8.2f} {size / seconds:>7.1f} "
+              f"{peak / 2**20:>8.1f} {stored:>9} {len(info['content']) / 1024:>10.1f}")
+
+    for megabytes in [int(m) for m in args.txt_mb.split(",") if m]:
+        path = os.path.join(workdir, f"notes_{megabytes}mb.txt")
+        write_txt(path, megabytes)
+        info, seconds, peak = ingest(uploader, path, os.path.basename(path))
+        size = os.path.getsize(path) / 2**20
+        stats = info["stats"]
+        print(f"{os.path.basename(path):<22} {size:>8.1f} {seconds:>8.2f} {size / seconds:>7.1f} "
+              f"{peak / 2**20:>8.1f} {stats['pages']:>9} {len(info['content']) / 1024:>10.1f}")
+
+    print("\nrows column: CSV records stored, or text pages for TXT")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Benchmark local token counting throughput on large documents.
+
+Usage (from backend/):
+  python benchmarks/bench_token_count.py
+  python benchmarks/bench_token_count.py --size-mb 4 --model gpt-4.1 --repeat 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from prompt_budget import count_tokens, fit_text, get_encoding  # noqa: E402
+
+WORDS = (
+    "python react azure kubernetes pipeline resume experience developer "
+    "engineered scalable services latency throughput database migration "
+    "led team of five 2019-2023 improved by 35% C# .NET SQL Server"
+).split()
+
+
+def make_document(size_bytes, seed=0):
+    """Generate resume-like text of roughly size_bytes."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))) + ".\n"
+        parts.append(line)
+        total += len(line)
+    return "".join(parts)[:size_bytes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token counting throughput benchmark")
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_document(int(args.size_mb * 1024 * 1024))
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    start = time.perf_counter()
+    encoding = get_encoding(args.model)
+    load_ms = (time.perf_counter() - start) * 1000
+    backend = encoding.name if encoding is not None else "heuristic (tiktoken not installed)"
+    print(f"Tokenizer: {backend}, first load {load_ms:.1f} ms")
+
+    start = time.perf_counter()
+    get_encoding(args.model)
+    print(f"Cached tokenizer lookup: {(time.perf_counter() - start) * 1e6:.1f} us")
+
+    timings = []
+    tokens = 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        tokens = count_tokens(text, args.model)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    mean = sum(timings) / len(timings)
+    print(f"Document: {size_mb:.2f} MB -> {tokens:,} tokens")
+    print(f"count_tokens: best {best * 1000:.1f} ms, mean {mean * 1000:.1f} ms, "
+          f"{size_mb / best:.1f} MB/s, {tokens / best / 1e6:.2f} M tokens/s")
+
+    start = time.perf_counter()
+    fit_text(text, 8000, args.model)
+    print(f"fit_text to 8k tokens: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
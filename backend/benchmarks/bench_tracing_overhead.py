@@ -0,0 +1,84 @@
+"""
+Measure per-span instrumentation overhead of tracing.span().
+
+Usage (from backend/):
+  python benchmarks/bench_tracing_overhead.py
+  python benchmarks/bench_tracing_overhead.py --iterations 500000 --threads 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("TRACE_FILE", os.path.join(tempfile.mkdtemp(prefix="trace-bench-"), "traces.jsonl"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tracing  # noqa: E402
+
+BUDGET_US = 5.0
+
+
+def baseline(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return time.perf_counter() - start
+
+
+def with_spans(n):
+    span = tracing.span
+    start = time.perf_counter()
+    for i in range(n):
+        with span("bench.op"):
+            pass
+    return time.perf_counter() - start
+
+
+def with_attr_spans(n):
+    span = tracing.span
+    start = time.perf_counter()
+    for i in range(n):
+        with span("bench.op", model="gpt-4o", route="chat"):
+            pass
+    return time.perf_counter() - start
+
+
+def threaded(n, threads):
+    per_thread = n // threads
+    workers = [threading.Thread(target=with_spans, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracing overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    n = args.iterations
+
+    base = baseline(n)
+    results = {
+        "span": (with_spans(n) - base) / n * 1e6,
+        "span+attrs": (with_attr_spans(n) - base) / n * 1e6,
+        f"span x{args.threads} threads": (threaded(n, args.threads) - base) / n * 1e6,
+    }
+    tracing.flush()
+
+    print(f"Iterations: {n:,}")
+    for name, per_span_us in results.items():
+        verdict = "OK" if per_span_us <= BUDGET_US else "OVER BUDGET"
+        print(f"  {name:<20} {per_span_us:6.2f} us/span  [{verdict}, budget {BUDGET_US} us]")
+    print(f"Trace file: {tracing.TRACE_FILE}")
+    return 0 if all(v <= BUDGET_US for v in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+First-request latency with and without start-up warm-up (warmup.py).
+
+Starts the fake upstreams with a per-connection cost standing in for TCP+TLS
+handshakes to remote regions, serves app.py in a fresh process, and times the
+first request to each route against the median of the requests that follow.
+Runs once with warm-up disabled and once with it enabled, waiting for
+/health/ready before sending traffic. With warm-up, first requests should
+cost about the same as steady state. Warmup's scheduling and readiness are
+checked by tests/test_warmup.py.
+
+Usage (from backend/):
+  python benchmarks/bench_warmup.py
+  python benchmarks/bench_warmup.py --connect-ms 250 --token-latency-ms 400 --requests 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import requests  # noqa: E402
+
+from run_benchmarks import JOB_DESCRIPTION, RESUME_TEXT, start_backend, start_upstreams  # noqa: E402
+
+ROUTES = {
+    "chat": lambda s, base: s.post(f"{base}/chat", json={
+        "message": f"How should I describe my Azure migration work? ({uuid.uuid4().hex[:6]})", "model": "gpt-4o"}),
+    "chat_assistant": lambda s, base: s.post(f"{base}/chat", json={
+        "message": f"Summarize my strongest skills ({uuid.uuid4().hex[:6]})", "model": "PersonalAssistant"}),
+    "vm_match_job": lambda s, base: s.post(f"{base}/vm/match-job", json={"jobDescription": JOB_DESCRIPTION}),
+    # A fresh job description each time, so the tailoring cache never answers
+    "tailor_resume": lambda s, base: s.post(f"{base}/tailor-resume", json={
+        "resumeText": RESUME_TEXT, "jobDescription": f"{JOB_DESCRIPTION} ({uuid.uuid4().hex})",
+        "matchedSkills": ["python"], "missingSkills": ["terraform"]}),
+}
+
+
+def run_mode(args):
+    """In a fresh process: start upstreams and the backend, then time first and steady-state requests."""
+    upstreams = start_upstreams(args)
+    for upstream in upstreams.values():
+        upstream.connect_latency_ms = args.connect_ms
+    workdir = tempfile.mkdtemp(prefix="bench-warmup-")
+    started = time.perf_counter()
+    server, base = start_backend(workdir, upstreams["azure_token"].url)
+    sys.modules["app"].init_worker()
+
+    session = requests.Session()
+    ready = None
+    if args.mode == "warm":
+        while True:
+            resp = session.get(f"{base}/health/ready")
+            if resp.status_code == 200:
+                ready = resp.json()
+                break
+            time.sleep(0.01)
+    ready_seconds = time.perf_counter() - started
+
+    routes = {}
+    for name, call in ROUTES.items():
+        samples = []
+        for _ in range(args.requests + 1):
+            start = time.perf_counter()
+            resp = call(session, base)
+            samples.append((time.perf_counter() - start) * 1000)
+            if resp.status_code >= 400:
+                raise SystemExit(f"{name}: HTTP {resp.status_code} {resp.text[:200]}")
+        routes[name] = {"first_ms": samples[0], "steady_ms": statistics.median(samples[1:])}
+    server.shutdown()
+    print(json.dumps({"ready_seconds": ready_seconds, "warmup": ready, "routes": routes}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up warm-up first-request latency check")
+    parser.add_argument("--connect-ms", type=float, default=150, help="cost of each new upstream connection")
+    parser.add_argument("--requests", type=int, default=10, help="steady-state requests per route")
+    parser.add_argument("--openai-latency-ms", type=float, default=50)
+    parser.add_argument("--foundry-latency-ms", type=float, default=150)
+    parser.add_argument("--token-latency-ms", type=float, default=200)
+    parser.add_argument("--vm-latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--payload-chars", type=int, default=1500)
+    parser.add_argument("--mode", choices=("cold", "warm"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        run_mode(args)
+        return
+
+    results = {}
+    for mode in ("cold", "warm"):
+        env = dict(os.environ, WARMUP_ENABLED="1" if mode == "warm" else "0", TRACE_FILE="")
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--mode", mode],
+                             cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    warm = results["warm"]
+    print(f"Warm-up finished in {warm['warmup']['seconds']:.2f}s:")
+    for name, component in warm["warmup"]["components"].items():
+        detail = f"{component['seconds'] * 1000:8.1f} ms" if "seconds" in component else ""
+        print(f"  {name:<14} {component['status']:<8} {detail}")
+
+    print(f"\n{'route':<16} {'cold first':>11} {'warm first':>11} {'steady p50':>11}")
+    for name in ROUTES:
+        cold, warm_route = results["cold"]["routes"][name], warm["routes"][name]
+        print(f"{name:<16} {cold['first_ms']:>8.1f} ms {warm_route['first_ms']:>8.1f} ms "
+              f"{warm_route['steady_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
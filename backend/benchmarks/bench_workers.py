@@ -0,0 +1,125 @@
+"""
+Worker scaling load test for the production server (gunicorn.conf.py).
+
+Starts gunicorn with 1, 2, 4, ... worker processes and drives synchronous
+uploads (/upload?sync=1) of a large text resume, which keeps each request
+CPU-bound in extraction and feature computation. Reports throughput per
+worker count and the scaling efficiency relative to a single worker
+(1.0 = perfectly linear). State shared between worker processes is
+checked by tests/test_shared_state.py.
+
+Usage (from backend/):
+  python benchmarks/bench_workers.py
+  python benchmarks/bench_workers.py --workers 1,2,4,8 --requests 200 --size-kb 512
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, BACKEND_DIR)
+
+import requests  # noqa: E402
+
+from run_benchmarks import RESUME_TEXT, percentile  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, threads, workdir):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), PORT=str(port),
+               PYTHONPATH=BACKEND_DIR, TRACE_FILE="")
+    # No API key: feature computation stays local instead of waiting on embeddings
+    env.pop("OPENAI_API_KEY", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(BACKEND_DIR, "gunicorn.conf.py"),
+         "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited:\n{proc.stderr.read().decode()[-2000:]}")
+        try:
+            requests.get(f"{base}/metrics", timeout=1)
+            return proc, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start within 60s")
+
+
+def run_level(base, body, concurrency, total):
+    def one(i):
+        start = time.perf_counter()
+        resp = requests.post(f"{base}/upload?sync=1", files={"file": (f"resume_{i}.txt", body)}, timeout=120)
+        return time.perf_counter() - start, resp.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))  # warm-up: imports and first connections
+        start = time.perf_counter()
+        outcomes = list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    latencies = sorted(lat * 1000 for lat, _ in outcomes)
+    return {
+        "requests": total,
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "throughput_rps": round(total / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn worker scaling on CPU-bound uploads")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=2, help="gunicorn threads per worker")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--label", default="workers")
+    args = parser.parse_args()
+
+    body = (RESUME_TEXT * (args.size_kb * 1024 // len(RESUME_TEXT) + 1)).encode()[: args.size_kb * 1024]
+    results = {}
+    print(f"{'workers':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>6} {'efficiency':>10}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        workdir = tempfile.mkdtemp(prefix="backend-workers-")
+        proc, base = start_server(workers, args.threads, workdir)
+        try:
+            stats = run_level(base, body, workers * args.threads, args.requests)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+            shutil.rmtree(workdir, ignore_errors=True)
+        single = results.get("1", stats)["throughput_rps"]
+        stats["efficiency"] = round(stats["throughput_rps"] / (single * workers), 2) if single else None
+        results[str(workers)] = stats
+        print(f"{workers:>7} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['errors']:>6} {stats['efficiency']:>10}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{args.label}.json")
+    with open(out_path, "w") as f:
+        json.dump({"config": vars(args), "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+    print(f"\nSaved {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
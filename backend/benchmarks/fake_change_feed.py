@@ -0,0 +1,59 @@
+"""
+In-memory stand-in for the Cosmos DB resume container and its change feed.
+
+Behaves like the change feed in latest-version mode: each upsert gets a new
+_ts/_etag and log position, a read returns the latest version of every item
+changed after the continuation (in change order, a page at a time), and hard
+deletes are not reported (only ids() reflects them).
+
+Usage (from a script in backend/benchmarks/, or tests/test_cosmos_sync.py):
+  from fake_change_feed import FakeChangeFeed
+  feed = FakeChangeFeed()
+  feed.upsert({"id": "doc-1", "userId": "user1", "filename": "resume.pdf", "fullText": "..."})
+  sync = CosmosSync(feed, SyncedDocuments())
+"""
+
+import threading
+import time
+import uuid
+
+
+class FakeChangeFeed:
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.reads = 0
+        self._items = {}
+        self._positions = {}  # id -> log position of its latest version
+        self._lsn = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, item):
+        with self._lock:
+            self._lsn += 1
+            stored = {**item, "_ts": int(time.time()), "_etag": f'"{uuid.uuid4()}"', "_lsn": self._lsn,
+                      "_rid": uuid.uuid4().hex[:8], "_self": f"dbs/x/colls/y/docs/{item['id']}"}
+            self._items[item["id"]] = stored
+            self._positions[item["id"]] = self._lsn
+            return dict(stored)
+
+    def delete(self, document_id):
+        """Hard delete: the item disappears without a change feed entry."""
+        with self._lock:
+            self._items.pop(document_id, None)
+            self._positions.pop(document_id, None)
+
+    def read(self, continuation, max_items):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        after = int(continuation or 0)
+        with self._lock:
+            self.reads += 1
+            changed = sorted((lsn, document_id) for document_id, lsn in self._positions.items() if lsn > after)
+            page = [dict(self._items[document_id]) for _, document_id in changed[:max_items]]
+        if not page:
+            return [], continuation
+        return page, str(page[-1]["_lsn"])
+
+    def ids(self):
+        with self._lock:
+            return set(self._items)
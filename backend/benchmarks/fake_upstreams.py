@@ -0,0 +1,242 @@
+"""
+Local stand-ins for the services the backend calls: the OpenAI chat,
+moderation and embeddings APIs, the Foundry agent endpoints, the Azure AD
+token endpoint and the VM API. Each upstream runs as its own HTTP server so
+latency, payload size, tail latency and failure injection can be set per
+upstream (and changed while it runs).
+
+Usage (from a script in backend/benchmarks/):
+  from fake_upstreams import FakeUpstream
+  openai = FakeUpstream("openai", latency_ms=50).start()
+  os.environ["OPENAI_BASE_URL"] = openai.url + "/v1"
+  ...
+  openai.stop()
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KINDS = ("openai", "foundry", "azure_token", "vm")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connection bursts from highly concurrent clients
+    request_queue_size = 256
+
+
+class FakeUpstream:
+    """A threaded HTTP server impersonating one upstream service."""
+
+    def __init__(self, kind, latency_ms=0, jitter_ms=0, payload_chars=1000, error_rate=0.0,
+                 error_status=503, slow_rate=0.0, slow_latency_ms=0, latency_per_1k_chars_ms=0,
+                 connect_latency_ms=0, port=0):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown upstream kind {kind!r}; expected one of {KINDS}")
+        self.kind = kind
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.payload_chars = payload_chars
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # A slow_rate fraction of requests takes slow_latency_ms instead (tail-latency injection)
+        self.slow_rate = slow_rate
+        self.slow_latency_ms = slow_latency_ms
+        # Extra latency per 1000 request-body characters, like prompt processing time upstream
+        self.latency_per_1k_chars_ms = latency_per_1k_chars_ms
+        # Paid once per new client connection, like TCP + TLS handshakes to a remote region
+        self.connect_latency_ms = connect_latency_ms
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.paths = {}
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), _make_handler(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{self.kind}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+            self.errors = 0
+            self.paths = {}
+
+    def _count(self, path, failed):
+        with self._lock:
+            self.requests += 1
+            self.paths[path] = self.paths.get(path, 0) + 1
+            if failed:
+                self.errors += 1
+
+    def _delay(self, body_chars=0):
+        if self.slow_rate and random.random() < self.slow_rate:
+            time.sleep(self.slow_latency_ms / 1000)
+            return
+        delay = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        delay += self.latency_per_1k_chars_ms * body_chars / 1000
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _text(self):
+        words = ("resume", "python", "azure", "experience", "impact", "skills", "project", "team")
+        out = []
+        size = 0
+        while size < self.payload_chars:
+            word = random.choice(words)
+            out.append(word)
+            size += len(word) + 1
+        return " ".join(out)[: self.payload_chars]
+
+    # ── Responses per upstream ────────────────────────────────────────
+
+    def respond(self, method, path, body):
+        """Return (status, headers, payload dict or bytes) for a request."""
+        if self.kind == "openai":
+            return self._openai(path, body)
+        if self.kind == "foundry":
+            return 200, {}, {
+                "output_text": self._text(),
+                "usage": {"input_tokens": len(json.dumps(body)) // 4, "output_tokens": self.payload_chars // 4},
+            }
+        if self.kind == "azure_token":
+            return 200, {}, {"token_type": "Bearer", "expires_in": 3599, "access_token": uuid.uuid4().hex}
+        return self._vm(method, path, body)
+
+    def _openai(self, path, body):
+        if path.endswith("/models"):
+            return 200, {}, {"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "system"}
+                for model in ("gpt-4o", "gpt-4o-mini", "gpt-4.1-mini")
+            ]}
+        if path.endswith("/chat/completions"):
+            content = self._text()
+            prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+            return 200, {}, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_chars // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (prompt_chars + len(content)) // 4,
+                },
+            }
+        if path.endswith("/moderations"):
+            categories = {c: False for c in ("harassment", "hate", "self-harm", "sexual", "violence")}
+            return 200, {}, {
+                "id": f"modr-{uuid.uuid4().hex[:12]}",
+                "model": "omni-moderation-latest",
+                "results": [{
+                    "flagged": False,
+                    "categories": categories,
+                    "category_scores": {c: 0.0 for c in categories},
+                }],
+            }
+        if path.endswith("/embeddings"):
+            return 200, {}, {
+                "object": "list",
+                "data": [{"object": "embedding", "index": 0, "embedding": [random.random() for _ in range(256)]}],
+                "model": body.get("model", "text-embedding-3-small"),
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            }
+        return 404, {}, {"error": {"message": f"unknown path {path}"}}
+
+    def _vm(self, method, path, body):
+        route = path.split("?")[0]
+        if route == "/analyze" and method == "POST":
+            return 200, {}, {"id": uuid.uuid4().hex, "status": "analyzed"}
+        if route == "/match-job" and method == "POST":
+            return 200, {}, {"results": [{
+                "documentId": f"doc-{i}",
+                "score": round(random.uniform(40, 95), 2),
+                "matchedSkills": ["python", "azure"],
+                "missingSkills": ["kubernetes"],
+            } for i in range(5)]}
+        if route == "/documents" and method == "GET":
+            return 200, {"ETag": '"v1"'}, {"documents": [
+                {"id": f"doc-{i}", "filename": f"resume_{i}.pdf"} for i in range(10)
+            ]}
+        match = re.fullmatch(r"/documents/([^/]+)", route)
+        if match and method == "GET":
+            return 200, {"ETag": '"v1"'}, {"id": match.group(1), "fullText": self._text()}
+        if match and method == "DELETE":
+            return 200, {}, {"deleted": match.group(1)}
+        return 404, {}, {"error": f"unknown route {method} {route}"}
+
+
+def _make_handler(upstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with upstream._lock:
+                upstream.connections += 1
+            if upstream.connect_latency_ms:
+                time.sleep(upstream.connect_latency_ms / 1000)
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body = {}
+            if raw and "json" in (self.headers.get("Content-Type") or ""):
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    body = {}
+
+            upstream._delay(len(raw))
+            failed = upstream.error_rate and random.random() < upstream.error_rate
+            upstream._count(self.path.split("?")[0], failed)
+            if failed:
+                status, headers, payload = upstream.error_status, {}, {"error": "injected failure"}
+            else:
+                status, headers, payload = upstream.respond(self.command, self.path, body)
+
+            if status == 200 and headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+                status, payload = 304, b""
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (timed out or lost a hedge race)
+                self.close_connection = True
+
+        do_GET = do_POST = do_DELETE = do_PUT = do_HEAD = _handle
+
+    return Handler
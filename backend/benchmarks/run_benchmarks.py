@@ -0,0 +1,265 @@
+"""
+End-to-end benchmark of the Flask backend against local stand-in upstreams.
+
+Starts fake OpenAI, Foundry, Azure token and VM API servers (see
+fake_upstreams.py), points the backend at them, serves app.py in-process and
+drives its routes at fixed concurrency levels. Reports throughput and
+p50/p95/p99 latency per route and concurrency, and stores results as JSON so
+two versions can be compared.
+
+Usage (from backend/):
+  python benchmarks/run_benchmarks.py --label baseline
+  python benchmarks/run_benchmarks.py --label my-change --compare benchmarks/results/baseline.json
+  python benchmarks/run_benchmarks.py --scenarios chat,vm_documents --concurrency 1,8,32 --requests 400
+  python benchmarks/run_benchmarks.py --openai-latency-ms 300 --vm-latency-ms 80 --payload-chars 4000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, BACKEND_DIR)
+
+import requests  # noqa: E402
+
+from fake_upstreams import FakeUpstream  # noqa: E402
+
+# Compared against a baseline, a change beyond this fraction counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+RESUME_TEXT = (
+    "SUMMARY\nSenior software engineer with 8 years building Python and React applications on Azure.\n"
+    "EXPERIENCE\nLed migration of Flask services to AKS; built CI/CD pipelines in Azure DevOps.\n"
+    "SKILLS\nPython, Flask, React, TypeScript, SQL, Docker, Kubernetes, Azure, OpenAI\n"
+) * 20
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Full-Stack AI Engineer. Python, FastAPI, React, AWS Lambda, "
+    "Terraform, LLM prompt engineering and CI/CD experience required."
+)
+
+
+def _scenarios(upload_bytes):
+    return {
+        "chat": lambda s, base: s.post(f"{base}/chat", json={
+            "message": "How should I describe my Azure migration work?", "model": "gpt-4o"}),
+        "chat_assistant": lambda s, base: s.post(f"{base}/chat", json={
+            "message": "Summarize my strongest skills", "model": "PersonalAssistant"}),
+        "upload": lambda s, base: s.post(f"{base}/upload", files={"file": ("resume.txt", upload_bytes)}),
+        "upload_sync": lambda s, base: s.post(f"{base}/upload?sync=1", files={"file": ("resume.txt", upload_bytes)}),
+        "vm_documents": lambda s, base: s.get(f"{base}/vm/documents"),
+        "vm_get_document": lambda s, base: s.get(f"{base}/vm/documents/doc-1"),
+        "vm_match_job": lambda s, base: s.post(f"{base}/vm/match-job", json={"jobDescription": JOB_DESCRIPTION}),
+        "vm_analyze": lambda s, base: s.post(f"{base}/vm/analyze", files={"file": ("resume.pdf", upload_bytes)}),
+        "tailor_resume": lambda s, base: s.post(f"{base}/tailor-resume", json={
+            "resumeText": RESUME_TEXT, "jobDescription": JOB_DESCRIPTION,
+            "matchedSkills": ["python"], "missingSkills": ["terraform"]}),
+    }
+
+
+class _FakeAccessToken:
+    def __init__(self, token, expires_on):
+        self.token = token
+        self.expires_on = expires_on
+
+
+def _fake_credential_factory(token_url):
+    """Credential that gets tokens from the fake Azure AD endpoint, cached like the real one."""
+    class FakeClientSecretCredential:
+        def __init__(self, tenant_id, client_id, client_secret):
+            self._url = f"{token_url}/{tenant_id}/oauth2/v2.0/token"
+            self._data = {"grant_type": "client_credentials", "client_id": client_id, "client_secret": client_secret}
+            self._token = None
+            self._lock = threading.Lock()
+
+        def get_token(self, *scopes, **kwargs):
+            with self._lock:
+                if self._token is None or self._token.expires_on - time.time() < 300:
+                    resp = requests.post(self._url, data={**self._data, "scope": " ".join(scopes)}, timeout=10)
+                    resp.raise_for_status()
+                    body = resp.json()
+                    self._token = _FakeAccessToken(body["access_token"], time.time() + body["expires_in"])
+                return self._token
+
+    return lambda tenant_id, client_id, client_secret: FakeClientSecretCredential(tenant_id, client_id, client_secret)
+
+
+def start_upstreams(args):
+    upstreams = {
+        "openai": FakeUpstream("openai", args.openai_latency_ms, args.jitter_ms, args.payload_chars).start(),
+        "foundry": FakeUpstream("foundry", args.foundry_latency_ms, args.jitter_ms, args.payload_chars).start(),
+        "azure_token": FakeUpstream("azure_token", args.token_latency_ms).start(),
+        "vm": FakeUpstream("vm", args.vm_latency_ms, args.jitter_ms, args.payload_chars).start(),
+    }
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": upstreams["openai"].url + "/v1",
+        "VM_API_BASE": upstreams["vm"].url,
+        "AZURE_CLIENT_ID": "bench", "AZURE_CLIENT_SECRET": "bench", "AZURE_TENANT_ID": "bench-tenant",
+        "FOUNDRY_AGENT_ENDPOINT": upstreams["foundry"].url + "/agents/personal-assistant",
+        "RESUME_AGENT_CLIENT_ID": "bench", "RESUME_AGENT_CLIENT_SECRET": "bench",
+        "RESUME_AGENT_TENANT_ID": "bench-tenant",
+        "RESUME_AGENT_ENDPOINT": upstreams["foundry"].url + "/agents/resume-agent",
+        # Every benchmark request comes from the same local user; measure throughput, not the limiter
+        "RATE_LIMIT_PER_MINUTE": os.getenv("RATE_LIMIT_PER_MINUTE", "1000000"),
+        "RATE_LIMIT_BURST": os.getenv("RATE_LIMIT_BURST", "1000000"),
+    })
+    return upstreams
+
+
+def start_backend(workdir, token_url):
+    """Import app.py inside a scratch working directory and serve it on a free port."""
+    os.chdir(workdir)
+    os.environ.setdefault("TRACE_FILE", os.path.join(workdir, "traces.jsonl"))
+    from werkzeug.serving import make_server
+
+    import app as backend_app
+    import foundry_client
+    foundry_client._make_credential = _fake_credential_factory(token_url)
+
+    server = make_server("127.0.0.1", 0, backend_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-backend", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * pct / 100), len(sorted_values) - 1)]
+
+
+def run_level(call, base, concurrency, total_requests):
+    local = threading.local()
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            resp = call(session, base)
+            ok = resp.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    # Warm up connections and lazy clients outside the measured window
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total_requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(lat * 1000 for lat, _ in outcomes)
+    return {
+        "requests": total_requests,
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "throughput_rps": round(total_requests / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    """Print per-route deltas against a stored run. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison vs {baseline['label']} ({baseline['git_rev']}):")
+    regressions = 0
+    for scenario, levels in current["results"].items():
+        for level, stats in levels.items():
+            old = baseline["results"].get(scenario, {}).get(level)
+            if not old:
+                continue
+            rps_delta = (stats["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] if old["throughput_rps"] else 0
+            p95_delta = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0
+            regressed = rps_delta < -REGRESSION_THRESHOLD or p95_delta > REGRESSION_THRESHOLD
+            regressions += regressed
+            print(f"  {scenario:<16} c={level:<4} rps {rps_delta:+7.1%}  p95 {p95_delta:+7.1%}"
+                  f"{'  <-- REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend benchmark against local fake upstreams")
+    parser.add_argument("--label", default=None, help="name for the stored result (default: git revision)")
+    parser.add_argument("--scenarios", default="chat,chat_assistant,upload,vm_documents,vm_get_document,"
+                                                "vm_match_job,vm_analyze,tailor_resume")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--openai-latency-ms", type=float, default=50)
+    parser.add_argument("--foundry-latency-ms", type=float, default=150)
+    parser.add_argument("--token-latency-ms", type=float, default=20)
+    parser.add_argument("--vm-latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--payload-chars", type=int, default=1500, help="size of generated completions/documents")
+    parser.add_argument("--upload-kb", type=int, default=32)
+    parser.add_argument("--compare", help="path to a stored result to compare against")
+    args = parser.parse_args()
+
+    upstreams = start_upstreams(args)
+    workdir = tempfile.mkdtemp(prefix="backend-bench-")
+    server, base = start_backend(workdir, upstreams["azure_token"].url)
+
+    upload_bytes = (RESUME_TEXT * (args.upload_kb * 1024 // len(RESUME_TEXT) + 1)).encode()[: args.upload_kb * 1024]
+    scenarios = _scenarios(upload_bytes)
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in selected if s not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}; choose from {', '.join(scenarios)}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    result = {
+        "label": args.label or git_revision(),
+        "git_rev": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("label", "compare")},
+        "results": {},
+    }
+
+    print(f"{'scenario':<16} {'conc':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    for name in selected:
+        result["results"][name] = {}
+        for level in levels:
+            stats = run_level(scenarios[name], base, level, args.requests)
+            result["results"][name][str(level)] = stats
+            print(f"{name:<16} {level:>4} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>6}")
+
+    server.shutdown()
+    for upstream in upstreams.values():
+        upstream.stop()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{result['label']}.json")
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {out_path}")
+
+    if args.compare:
+        return 1 if compare(result, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
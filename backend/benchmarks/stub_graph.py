@@ -0,0 +1,121 @@
+"""
+In-process stand-in for a Graphiti instance backed by Neo4j AuraDB.
+
+Implements the parts graph_search.py uses: async search(query=, num_results=)
+with configurable latency, embedder.create(), and driver.execute_query() for
+the snapshot export queries. Facts and queries are embedded with a hashed
+bag-of-words, so vector search over an exported snapshot behaves sensibly.
+
+Usage (from a script in backend/benchmarks/, or tests/test_graph_search.py):
+  from stub_graph import StubGraphiti, job_facts
+  graph = StubGraphiti(job_facts(1000), latency_ms=250)
+  search = GraphSearch(graph)
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import uuid
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+ROLES = ("Full Stack Engineer", "Data Engineer", "ML Engineer", "DevOps Engineer", "Frontend Developer",
+         "Backend Developer", "Cloud Architect", "Site Reliability Engineer")
+COMPANIES = ("Microsoft", "Contoso", "Fabrikam", "Northwind", "Tailspin", "Woodgrove", "Litware", "Adatum")
+SKILLS = ("React", "Python", "Azure", "Kubernetes", "TypeScript", "PostgreSQL", "Terraform", "Go", "Spark",
+          "PyTorch", ".NET", "GraphQL", "Redis", "Kafka")
+
+
+def _embed(text, dim):
+    vector = [0.0] * dim
+    for word in _WORD.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+        vector[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def job_facts(count, seed=7):
+    """(source, relation, target, fact) tuples resembling job-posting episodes."""
+    rng = random.Random(seed)
+    facts = []
+    for i in range(count):
+        company, role, skill = rng.choice(COMPANIES), rng.choice(ROLES), rng.choice(SKILLS)
+        kind = i % 3
+        if kind == 0:
+            facts.append((company, "HIRING_FOR", role, f"{company} is hiring a {role} ({i})"))
+        elif kind == 1:
+            facts.append((role, "REQUIRES", skill, f"The {role} role at {company} requires {skill} experience ({i})"))
+        else:
+            facts.append(("Troy Lorents", "HAS_SKILL", skill, f"Troy Lorents has used {skill} with {company} ({i})"))
+    return facts
+
+
+class _Embedder:
+    def __init__(self, dim):
+        self.dim = dim
+
+    async def create(self, input_data):
+        return _embed(input_data if isinstance(input_data, str) else " ".join(input_data), self.dim)
+
+
+class _Driver:
+    def __init__(self, graph):
+        self.graph = graph
+
+    async def execute_query(self, query, **params):
+        await asyncio.sleep(self.graph.latency_ms / 1000)
+        records = self.graph.edges if "RELATES_TO" in query else self.graph.nodes
+        return [dict(r) for r in records], None, None
+
+
+class StubGraphiti:
+    """Graphiti look-alike over an in-memory list of facts."""
+
+    def __init__(self, facts, latency_ms=200, dim=256):
+        self.latency_ms = latency_ms
+        self.searches = 0
+        self.embedder = _Embedder(dim)
+        self.driver = _Driver(self)
+        names = {}
+        self.nodes = []
+        for source, _, target, _ in facts:
+            for name in (source, target):
+                if name not in names:
+                    names[name] = str(uuid.uuid5(uuid.NAMESPACE_OID, name))
+                    self.nodes.append({"uuid": names[name], "name": name, "summary": "", "group_id": "",
+                                       "name_embedding": _embed(name, dim)})
+        self.edges = [{
+            "uuid": str(uuid.uuid5(uuid.NAMESPACE_OID, fact)), "name": relation, "fact": fact,
+            "fact_embedding": _embed(fact, dim), "source_node_uuid": names[source],
+            "target_node_uuid": names[target], "valid_at": None, "invalid_at": None, "expired_at": None,
+            "created_at": "2026-01-01T00:00:00+00:00", "group_id": "",
+        } for source, relation, target, fact in facts]
+
+    def add_fact(self, source, relation, target, fact):
+        """Simulate an ingestion run adding one edge."""
+        for name in (source, target):
+            if not any(n["name"] == name for n in self.nodes):
+                self.nodes.append({"uuid": str(uuid.uuid5(uuid.NAMESPACE_OID, name)), "name": name, "summary": "",
+                                   "group_id": "", "name_embedding": _embed(name, self.embedder.dim)})
+        self.edges.append({
+            "uuid": str(uuid.uuid5(uuid.NAMESPACE_OID, fact)), "name": relation, "fact": fact,
+            "fact_embedding": _embed(fact, self.embedder.dim),
+            "source_node_uuid": str(uuid.uuid5(uuid.NAMESPACE_OID, source)),
+            "target_node_uuid": str(uuid.uuid5(uuid.NAMESPACE_OID, target)),
+            "valid_at": None, "invalid_at": None, "expired_at": None,
+            "created_at": "2026-01-01T00:00:00+00:00", "group_id": "",
+        })
+
+    async def search(self, query, num_results=10):
+        """Remote hybrid search stand-in: network latency, then cosine ranking over every edge."""
+        self.searches += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        q = _embed(query, self.embedder.dim)
+        scored = sorted(self.edges, key=lambda e: -sum(a * b for a, b in zip(e["fact_embedding"], q)))
+        return [{k: v for k, v in e.items() if k != "fact_embedding"} for e in scored[:num_results]]
+
+    async def close(self):
+        pass
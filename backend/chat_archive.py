@@ -0,0 +1,202 @@
+# chat_archive.py
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from db_manager import DB_PATH, init_db
+from tracing import inc, span
+
+# Parquet files partitioned by table and day: <dir>/<table>/date=YYYY-MM-DD/part-<first id>-<last id>.parquet
+CHAT_ARCHIVE_DIR = os.getenv("CHAT_ARCHIVE_DIR", "db/archive")
+# Whole days older than this many days are moved out of chatbot.db
+CHAT_RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "30"))
+CHAT_ARCHIVE_ROWS_PER_FILE = int(os.getenv("CHAT_ARCHIVE_ROWS_PER_FILE", "500000"))
+
+# Archived tables and their comma-joined columns, stored as list<string> in Parquet
+TABLES = {
+    "chatlog": ("id", "timestamp", "user_input", "bot_response", "keywords", "moderation_flags"),
+    "flagged": ("id", "timestamp", "user_input", "categories"),
+}
+LIST_COLUMNS = ("keywords", "moderation_flags", "categories")
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _schema(table):
+    import pyarrow as pa
+
+    types = {"id": pa.int64(), "timestamp": pa.timestamp("us"), "date": pa.string()}
+    fields = [(column, types.get(column, pa.list_(pa.string()) if column in LIST_COLUMNS else pa.string()))
+              for column in TABLES[table]]
+    return pa.schema(fields)
+
+
+def _to_arrow(table, rows, columns=None):
+    """Arrow table from SQLite rows (in TABLES column order), with list columns split and a date column."""
+    import pyarrow as pa
+
+    data = {column: [] for column in TABLES[table]}
+    data["date"] = []
+    for row in rows:
+        for column, value in zip(TABLES[table], row):
+            if column in LIST_COLUMNS:
+                value = _split(value)
+            elif column == "timestamp":
+                data["date"].append((value or "")[:10])
+                value = datetime.fromisoformat(value) if value else None
+            data[column].append(value)
+    schema = _schema(table).append(pa.field("date", pa.string()))
+    arrow = pa.table(data, schema=schema)
+    return arrow.select(columns) if columns else arrow
+
+
+def _connect():
+    init_db()
+    return sqlite3.connect(DB_PATH)
+
+
+def archive(retention_days=CHAT_RETENTION_DAYS, archive_dir=CHAT_ARCHIVE_DIR,
+            rows_per_file=CHAT_ARCHIVE_ROWS_PER_FILE, now=None):
+    """Move whole days older than retention_days from chatbot.db to Parquet; returns rows moved per table.
+
+    Safe to re-run after a crash: a day's rows are fixed once the day is past
+    the cutoff, so the same rows always land in the same files, which are
+    written under a temporary name and renamed before the rows are deleted.
+    """
+    import pyarrow.parquet as pq
+
+    cutoff = ((now or datetime.utcnow()).date() - timedelta(days=retention_days)).isoformat()
+    moved = {}
+    conn = _connect()
+    try:
+        for table in TABLES:
+            moved[table] = 0
+            days = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT substr(timestamp, 1, 10) FROM {table} WHERE timestamp < ? ORDER BY 1", (cutoff,)
+            )]
+            for day in days:
+                with span("chat_archive.day", table=table, day=day):
+                    next_day = (datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()
+                    cursor = conn.execute(
+                        f"SELECT {', '.join(TABLES[table])} FROM {table} "
+                        f"WHERE timestamp >= ? AND timestamp < ? ORDER BY id",
+                        (day, next_day),
+                    )
+                    partition = os.path.join(archive_dir, table, f"date={day}")
+                    os.makedirs(partition, exist_ok=True)
+                    while True:
+                        rows = cursor.fetchmany(rows_per_file)
+                        if not rows:
+                            break
+                        first, last = rows[0][0], rows[-1][0]
+                        name = f"part-{first:012d}-{last:012d}.parquet"
+                        path = os.path.join(partition, name)
+                        # Dot-prefixed so analytics scans skip files still being written
+                        tmp_path = os.path.join(partition, f".{name}.{os.getpid()}.tmp")
+                        pq.write_table(_to_arrow(table, rows, list(TABLES[table])), tmp_path, compression="zstd")
+                        os.replace(tmp_path, path)
+                        conn.execute(
+                            f"DELETE FROM {table} WHERE id BETWEEN ? AND ? AND timestamp >= ? AND timestamp < ?",
+                            (first, last, day, next_day),
+                        )
+                        conn.commit()
+                        moved[table] += len(rows)
+            inc("chat_archive_rows_total", moved[table], table=table)
+    finally:
+        conn.close()
+    return moved
+
+
+class ChatAnalytics:
+    """Aggregates over archived Parquet partitions plus the rows still in chatbot.db.
+
+    Reads only the columns a query needs and prunes partitions by day, so
+    scans over millions of archived rows stay in Arrow compute kernels.
+    since/until are inclusive YYYY-MM-DD days.
+    """
+
+    def __init__(self, archive_dir=CHAT_ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+
+    def _scan(self, table, columns, since=None, until=None):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        parts = []
+        path = os.path.join(self.archive_dir, table)
+        if os.path.isdir(path):
+            dataset = ds.dataset(path, format="parquet", partitioning=ds.partitioning(
+                pa.schema([("date", pa.string())]), flavor="hive"))
+            condition = None
+            for bound in ((ds.field("date") >= since) if since else None,
+                          (ds.field("date") <= until) if until else None):
+                if bound is not None:
+                    condition = bound if condition is None else condition & bound
+            parts.append(dataset.to_table(columns=columns, filter=condition))
+
+        query = f"SELECT {', '.join(TABLES[table])} FROM {table} WHERE timestamp >= ?"
+        params = [since or ""]
+        if until:
+            query += " AND substr(timestamp, 1, 10) <= ?"
+            params.append(until)
+        conn = _connect()
+        try:
+            parts.append(_to_arrow(table, conn.execute(query, params).fetchall(), columns))
+        finally:
+            conn.close()
+        return pa.concat_tables([part.cast(parts[-1].schema) for part in parts])
+
+    def top_keywords(self, since=None, until=None, limit=20):
+        """Most frequent chat keywords (case-insensitive) with their counts."""
+        import pyarrow.compute as pc
+
+        with span("chat_analytics.top_keywords"):
+            keywords = pc.utf8_lower(pc.list_flatten(self._scan("chatlog", ["keywords"], since, until)["keywords"]))
+            counts = pc.value_counts(keywords)
+            order = pc.array_sort_indices(counts.field("counts"), order="descending")
+            top = counts.take(order[:limit]).to_pylist()
+        return [{"keyword": item["values"], "count": item["counts"]} for item in top]
+
+    def flag_rates(self, since=None, until=None):
+        """Share of chat requests blocked by moderation, overall and per category."""
+        import pyarrow.compute as pc
+
+        with span("chat_analytics.flag_rates"):
+            chats = self._scan("chatlog", ["id"], since, until).num_rows
+            flagged = self._scan("flagged", ["categories"], since, until)
+            counts = pc.value_counts(pc.list_flatten(flagged["categories"])).to_pylist()
+        requests = chats + flagged.num_rows
+        return {
+            "requests": requests,
+            "blocked": flagged.num_rows,
+            "flag_rate": round(flagged.num_rows / requests, 6) if requests else None,
+            "categories": {
+                item["values"]: {"count": item["counts"], "rate": round(item["counts"] / requests, 6)}
+                for item in sorted(counts, key=lambda item: -item["counts"])
+            },
+        }
+
+    def volume_by_day(self, since=None, until=None):
+        """Chats and moderation-blocked requests per day, oldest first."""
+        days = {}
+        with span("chat_analytics.volume_by_day"):
+            for table, key in (("chatlog", "chats"), ("flagged", "blocked")):
+                grouped = self._scan(table, ["id", "date"], since, until).group_by("date").aggregate(
+                    [("id", "count")])
+                for date, count in zip(grouped["date"].to_pylist(), grouped["id_count"].to_pylist()):
+                    days.setdefault(date, {"date": date, "chats": 0, "blocked": 0})[key] = count
+        return [days[date] for date in sorted(days)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old chat logs from chatbot.db to Parquet")
+    parser.add_argument("--days", type=int, default=CHAT_RETENTION_DAYS, help="keep this many days in chatbot.db")
+    parser.add_argument("--archive-dir", default=CHAT_ARCHIVE_DIR)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    moved = archive(args.days, args.archive_dir)
+    print(f"Archived {moved} rows to {args.archive_dir} in {time.perf_counter() - start:.1f}s")
@@ -1,11 +1,46 @@
 # chat_service.py
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import QueueTimeoutError
 from openai_client import OpenAIClient
 from extractor import extract_keywords
 from db_manager import log_chat, log_flagged
+from conversation_store import ConversationStore
+from prompt_budget import MESSAGE_OVERHEAD_TOKENS, count_message_tokens, count_tokens, fit_text
+from prompt_builder import DOCUMENT_CONTEXT_HEADER, document_context, document_question
+from tracing import inc, span
+
+# Questions over this many documents, or this much document text, are answered
+# map-reduce style: one extraction call per document chunk, then a combining call
+MAP_REDUCE_MIN_DOCUMENTS = int(os.getenv("MAP_REDUCE_MIN_DOCUMENTS", "3"))
+MAP_REDUCE_MIN_CHARS = int(os.getenv("MAP_REDUCE_MIN_CHARS", "120000"))
+# Concurrent extraction calls per question
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "8"))
+# Largest piece of a document sent to one extraction call (~12k tokens)
+MAP_CHUNK_CHARS = int(os.getenv("MAP_CHUNK_CHARS", "48000"))
+MAP_NOTE_TOKENS = 500
+
+# The PersonalAssistant agent's model, and the most input (history, documents and
+# question) sent to it; its own instructions and answer need the rest of the window
+FOUNDRY_AGENT_MODEL = os.getenv("FOUNDRY_AGENT_MODEL", "gpt-4o")
+FOUNDRY_AGENT_MAX_INPUT_TOKENS = int(os.getenv("FOUNDRY_AGENT_MAX_INPUT_TOKENS", "100000"))
+
+NO_RELEVANT_CONTENT = "NO_RELEVANT_CONTENT"
+MAP_SYSTEM_MESSAGE = f"""You extract information from one part of an uploaded document to help answer a user's question. A later step combines your notes with notes from the other documents.
+
+Guidelines:
+- List the facts and passages relevant to the question as short bullets
+- Keep names, numbers, dates and technical terms exactly as written
+- Do not answer the question yourself or add outside knowledge
+- If this part contains nothing relevant, reply with exactly {NO_RELEVANT_CONTENT}"""
 
 # Foundry client is lazily initialized to avoid errors when credentials aren't set
 _foundry_client = None
 
+conversation_store = ConversationStore()
+
 
 def _get_foundry_client():
     global _foundry_client
@@ -19,10 +54,60 @@ def _get_foundry_client():
     return _foundry_client
 
 
-def handle_chat(prompt, model="gpt-4o", mode="general"):
+def warm_up_foundry():
+    """Create the Foundry client, fetch its token and connect, ahead of the first agent chat."""
+    _get_foundry_client().warm_up()
+
+
+def _user_question(prompt):
+    """The user's own question, without any document context wrapped around it."""
+    return prompt.split('User question: ')[-1] if 'User question: ' in prompt else prompt
+
+
+def document_prompt(question, documents, history=None):
+    """Single-prompt form of a document question, for agents that take one input string.
+
+    The documents are trimmed so that they, the history and the question fit
+    FOUNDRY_AGENT_MAX_INPUT_TOKENS.
+    """
+    model = FOUNDRY_AGENT_MODEL
+    suffix = f"\n\nUser question: {question}"
+    budget = (
+        FOUNDRY_AGENT_MAX_INPUT_TOKENS
+        - count_message_tokens(history or [], model)
+        - count_tokens(suffix, model)
+        - MESSAGE_OVERHEAD_TOKENS
+    )
+    return fit_text(document_context(documents), budget, model) + suffix
+
+
+def _use_map_reduce(documents):
+    return len(documents) >= MAP_REDUCE_MIN_DOCUMENTS or sum(len(c) for _, c in documents) > MAP_REDUCE_MIN_CHARS
+
+
+def _finish(logged_prompt, question, response, categories, user_id, session_id):
+    keywords = extract_keywords(question)
+    log_chat(logged_prompt, response, keywords, categories)
+    if session_id:
+        conversation_store.record_turn(user_id, session_id, question, response)
+    return response
+
+
+def handle_chat(prompt, model="gpt-4o", mode="general", user_id=None, session_id=None, documents=None):
+    """Answer prompt; documents is an optional list of (filename, content) to answer from."""
+    # Conversation memory is only kept when the client identifies a session
+    history = conversation_store.history(user_id, session_id) if session_id else []
+
+    if documents:
+        if model == "PersonalAssistant":
+            return _handle_foundry_chat(document_prompt(prompt, documents, history), history, user_id, session_id)
+        if _use_map_reduce(documents):
+            return _handle_map_reduce(prompt, documents, model, mode, history, user_id, session_id)
+        return _handle_document_chat(prompt, documents, model, mode, history, user_id, session_id)
+
     # Route to Foundry agent if PersonalAssistant is selected
     if model == "PersonalAssistant":
-        return _handle_foundry_chat(prompt)
+        return _handle_foundry_chat(prompt, history, user_id, session_id)
 
     client = OpenAIClient()
     flagged, categories = client.moderate_content(prompt)
@@ -31,46 +116,155 @@ def handle_chat(prompt, model="gpt-4o", mode="general"):
         log_flagged(prompt, categories)
         return "I apologize, but I cannot respond to that type of content!"
 
-    # Check if the prompt contains document context
-    has_document_context = "Context from uploaded documents:" in prompt
-
-    # Add context based on the type of question and whether documents are present
-    if has_document_context:
-        # Enhanced prompt for document-based questions
-        enhanced_prompt = f"""You are an AI assistant with access to uploaded documents. Please analyze the provided document content and answer the user's question based on that information.
-
-Document Context:
-{prompt}
-
-Please provide a comprehensive answer that:
-- Directly addresses the user's question using information from the documents
-- Cites specific parts of the documents when relevant
-- Acknowledges if the documents don't contain information needed to answer the question
-- Provides helpful insights and analysis based on the document content
-
-User Question: {prompt.split('User question: ')[-1] if 'User question: ' in prompt else prompt}"""
-    else:
-        # Regular prompt enhancement for general questions
-        enhanced_prompt = prompt
-        if any(word in prompt.lower() for word in ['help', 'how', 'what', 'why', 'when', 'where']):
-            enhanced_prompt = f"Please provide a helpful and well-structured response to: {prompt}"
-        elif len(prompt.split()) < 5:  # Short messages
-            enhanced_prompt = f"User said: '{prompt}'. Please respond naturally and engagingly."
-
-    response = client.chat_completion(enhanced_prompt, model, mode)
-    keywords = extract_keywords(prompt)
-    log_chat(prompt, response, keywords, categories)
-    return response
+    # Regular prompt enhancement for general questions
+    enhanced_prompt = prompt
+    if any(word in prompt.lower() for word in ['help', 'how', 'what', 'why', 'when', 'where']):
+        enhanced_prompt = f"Please provide a helpful and well-structured response to: {prompt}"
+    elif len(prompt.split()) < 5:  # Short messages
+        enhanced_prompt = f"User said: '{prompt}'. Please respond naturally and engagingly."
+
+    response = client.chat_completion(enhanced_prompt, model, mode, history=history)
+    return _finish(prompt, _user_question(prompt), response, categories, user_id, session_id)
+
+
+def _handle_document_chat(question, documents, model, mode, history, user_id, session_id):
+    """Answer from a few documents in one call, with the documents ahead of the question."""
+    client = OpenAIClient()
+    context = document_context(documents)
+    flagged, categories = client.moderate_content(f"{context}\n\nUser question: {question}")
+    if flagged:
+        log_flagged(question, categories)
+        return "I apologize, but I cannot respond to that type of content!"
+
+    response = client.chat_completion(document_question(question), model, mode, history=history, context=context)
+    return _finish(question, question, response, categories, user_id, session_id)
+
+
+def _chunks(filename, content):
+    """Split a document into MAP_CHUNK_CHARS pieces, preferring paragraph then line breaks."""
+    pieces = []
+    while len(content) > MAP_CHUNK_CHARS:
+        cut = content.rfind("\n\n", MAP_CHUNK_CHARS // 2, MAP_CHUNK_CHARS)
+        if cut < 0:
+            cut = content.rfind("\n", MAP_CHUNK_CHARS // 2, MAP_CHUNK_CHARS)
+        if cut < 0:
+            cut = MAP_CHUNK_CHARS
+        pieces.append(content[:cut])
+        content = content[cut:].lstrip("\n")
+    pieces.append(content)
+    if len(pieces) == 1:
+        return [(filename, pieces[0])]
+    return [(f"{filename}, part {i}/{len(pieces)}", piece) for i, piece in enumerate(pieces, 1)]
+
+
+def _extract_notes(client, question, label, text, model):
+    """Map step: notes from one document chunk that bear on the question."""
+    return client.chat_completion(
+        f"User question: {question}",
+        model,
+        route="chat_map",
+        system_message=MAP_SYSTEM_MESSAGE,
+        max_tokens=MAP_NOTE_TOKENS,
+        temperature=0.2,
+        context=f"Document: {label}\n\n{text}",
+    )
+
+
+def _fan_out(fn, chunks):
+    """fn(label, text) over every chunk concurrently; returns [(label, result or None, error or None)].
+
+    Every upstream call inside still takes its own fair-queue slot, so at most
+    MAP_REDUCE_CONCURRENCY of them wait in the queue for one question.
+    """
+    def run(label, text):
+        try:
+            return label, fn(label, text), None
+        except Exception as e:
+            return label, None, e
+
+    workers = max(1, min(MAP_REDUCE_CONCURRENCY, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-map") as pool:
+        # Each call runs in a copy of this context so its spans and queue caller follow the request
+        futures = [pool.submit(contextvars.copy_context().run, run, label, text) for label, text in chunks]
+        return [future.result() for future in futures]
+
+
+def _moderate_chunks(client, question, chunks):
+    """Moderate each chunk with the question, as the single-prompt path moderates its whole context.
+
+    Returns (flagged, categories) over all chunks; raises if any check failed.
+    """
+    results = _fan_out(
+        lambda label, text: client.moderate_content(f"Document: {label}\n\n{text}\n\nUser question: {question}"),
+        chunks,
+    )
+    flagged, categories = False, []
+    for _, result, error in results:
+        if error is not None:
+            raise error
+        flagged = flagged or result[0]
+        categories += [category for category in result[1] if category not in categories]
+    return flagged, categories
+
+
+def _map_chunks(client, question, chunks, model):
+    """Run the map step over every chunk concurrently; returns [(label, notes or None, error or None)]."""
+    results = _fan_out(lambda label, text: _extract_notes(client, question, label, text, model), chunks)
+    for label, _, error in results:
+        if error is not None:
+            inc("chat_map_failures_total")
+            print(f"Map step failed for {label}: {error}")
+    return results
+
+
+def _handle_map_reduce(question, documents, model, mode, history, user_id, session_id):
+    """Answer over many or large documents: per-chunk extraction calls, then one combining call.
+
+    Latency follows the slowest chunk rather than the total document size, and
+    no single prompt has to hold every document.
+    """
+    client = OpenAIClient()
+    chunks = [chunk for filename, content in sorted(documents) for chunk in _chunks(filename, content)]
+    with span("chat.map_reduce", documents=len(documents), chunks=len(chunks)):
+        flagged, categories = _moderate_chunks(client, question, chunks)
+        if flagged:
+            log_flagged(question, categories)
+            return "I apologize, but I cannot respond to that type of content!"
+
+        results = _map_chunks(client, question, chunks, model)
+        if all(error is not None for _, _, error in results):
+            raise results[0][2]
+
+        notes = []
+        for label, text, error in results:
+            if error is not None:
+                notes.append(f"[{label}]\n(This part could not be read; say so if it matters to the answer.)")
+            elif text and text.strip() != NO_RELEVANT_CONTENT:
+                notes.append(f"[{label}]\n{text}")
+        if not notes:
+            notes.append("(None of the documents contain information relevant to the question.)")
+
+        reduce_prompt = (
+            f"{DOCUMENT_CONTEXT_HEADER} notes extracted from each document for this question.\n\n"
+            + "\n\n".join(notes)
+            + f"\n\nUser question: {question}"
+        )
+        response = client.chat_completion(reduce_prompt, model, mode, route="chat_reduce", history=history)
+    return _finish(question, question, response, categories, user_id, session_id)
 
 
-def _handle_foundry_chat(prompt):
+def _handle_foundry_chat(prompt, history=None, user_id=None, session_id=None):
     """Route chat to the Foundry PersonalAssistant agent."""
     try:
         foundry = _get_foundry_client()
-        response = foundry.chat(prompt)
+        response = foundry.chat(prompt, conversation_history=history)
         keywords = extract_keywords(prompt)
         log_chat(prompt, response, keywords, [])
+        if session_id:
+            conversation_store.record_turn(user_id, session_id, _user_question(prompt), response)
         return response
+    except QueueTimeoutError:
+        raise
     except Exception as e:
         print(f"Foundry chat error: {e}")
         return f"Error connecting to PersonalAssistant agent: {str(e)}"
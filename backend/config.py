@@ -0,0 +1,27 @@
+# config.py
+import os
+import threading
+
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env():
+    """Load backend/.env into the process environment. Idempotent; call before reading settings."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if _env_loaded:
+            return
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            # Settings then come from the real environment only
+            if os.path.exists(ENV_PATH):
+                print(f"Warning: python-dotenv is not installed, so {ENV_PATH} was not loaded")
+        else:
+            load_dotenv(ENV_PATH)
+        _env_loaded = True
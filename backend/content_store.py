@@ -0,0 +1,143 @@
+# content_store.py
+import mmap
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from shared_state import SHARED_DB_PATH, connect
+from tracing import inc, register_gauge
+
+# Next to the shared database by default, since its index lives there
+CONTENT_STORE_DIR = os.getenv("CONTENT_STORE_DIR", os.path.join(os.path.dirname(SHARED_DB_PATH), "content"))
+# A new segment file is started once the current one reaches this size
+CONTENT_SEGMENT_MAX_BYTES = int(os.getenv("CONTENT_SEGMENT_MAX_BYTES", str(256 * 1024 * 1024)))
+# Decoded text kept in memory for recently read documents, per process
+CONTENT_CACHE_MAX_CHARS = int(os.getenv("CONTENT_CACHE_MAX_CHARS", str(8 * 1024 * 1024)))
+COMPRESSION_LEVEL = 6
+
+_SEGMENT_NAME = re.compile(r"^segment-(\d+)\.z$")
+
+
+class ContentStore:
+    """Extracted document text, zlib-compressed in append-only segment files.
+
+    Each document is one compressed record; the shared `document_content`
+    table maps its id to (segment, offset, length). Segments are memory-mapped
+    and records decompressed straight from the mapping, so the process only
+    holds the text of documents it is reading plus a small LRU of recently
+    decoded ones. Appends are serialized across workers by the shared
+    database's write lock. Replaced and deleted records are left in place as
+    dead bytes (see stats()).
+    """
+
+    def __init__(self, directory=CONTENT_STORE_DIR, cache_max_chars=CONTENT_CACHE_MAX_CHARS,
+                 segment_max_bytes=CONTENT_SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.cache_max_chars = cache_max_chars
+        self.segment_max_bytes = segment_max_bytes
+        self.cache_chars = 0
+        self._cache = OrderedDict()
+        self._maps = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        register_gauge("content_cache_chars", lambda: self.cache_chars)
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:05d}.z")
+
+    def _segments(self):
+        return sorted(int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(self.directory)) if m)
+
+    def put(self, document_id, text):
+        """Append text for document_id, replacing any earlier version."""
+        data = zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+        conn = connect()
+        # Held while appending, so no two workers pick the same offset
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            segments = self._segments()
+            segment = segments[-1] if segments else 0
+            if segments and os.path.getsize(self._path(segment)) + len(data) > self.segment_max_bytes:
+                segment += 1
+            with open(self._path(segment), "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            conn.execute(
+                "INSERT OR REPLACE INTO document_content (document_id, segment, offset, length, chars) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (document_id, segment, offset, len(data), len(text)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _view(self, segment, offset, length):
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < offset + length:
+                # Segments only grow; remap to see records appended since the last mapping.
+                # The old mapping is released once no reader still holds a view of it.
+                with open(self._path(segment), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+        return memoryview(mapped)[offset:offset + length]
+
+    def get(self, document_id, cache=True):
+        """Text for document_id, or None if it isn't stored here.
+
+        cache=False decodes without adding the document to the LRU, for scans
+        that would otherwise push out the hot documents.
+        """
+        row = connect().execute(
+            "SELECT segment, offset, length FROM document_content WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        # Keyed by location, so a document replaced by another worker is never served stale
+        key = (row["segment"], row["offset"])
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+        if text is not None:
+            inc("content_cache_hits_total")
+            return text
+        inc("content_cache_misses_total")
+        text = zlib.decompress(self._view(row["segment"], row["offset"], row["length"])).decode("utf-8")
+        if cache and len(text) <= self.cache_max_chars:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = text
+                    self.cache_chars += len(text)
+                    while self.cache_chars > self.cache_max_chars:
+                        _, evicted = self._cache.popitem(last=False)
+                        self.cache_chars -= len(evicted)
+        return text
+
+    def delete(self, document_id, conn=None):
+        """Drop document_id from the index; pass conn to join the caller's transaction."""
+        (conn or connect()).execute("DELETE FROM document_content WHERE document_id = ?", (document_id,))
+
+    def __contains__(self, document_id):
+        return connect().execute(
+            "SELECT 1 FROM document_content WHERE document_id = ?", (document_id,)
+        ).fetchone() is not None
+
+    def stats(self):
+        """Documents, characters and live vs. on-disk compressed bytes."""
+        row = connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(length), 0) FROM document_content"
+        ).fetchone()
+        segments = self._segments()
+        return {
+            "documents": row[0],
+            "chars": row[1],
+            "live_bytes": row[2],
+            "file_bytes": sum(os.path.getsize(self._path(s)) for s in segments),
+            "segments": len(segments),
+            "cached_documents": len(self._cache),
+            "cached_chars": self.cache_chars,
+        }
@@ -0,0 +1,125 @@
+# conversation_store.py
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db_manager import add_conversation_turns, fold_conversation_turns, get_conversation, get_conversation_version
+from prompt_budget import count_tokens, fit_text
+
+# Recent turns are kept verbatim up to this many tokens; older turns are folded into the summary
+RECENT_TURNS_TOKEN_BUDGET = int(os.getenv("CHAT_RECENT_TURNS_TOKENS", "2000"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKENS", "400"))
+SUMMARY_MODEL = "gpt-4o-mini"
+
+
+def summarize_turns(summary, turns):
+    """Fold a batch of (role, content) turns into the running summary with a cheap model."""
+    from openai_client import OpenAIClient
+    transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+    instruction = (
+        "Update the running summary of a conversation with the new exchanges below. "
+        "Keep facts, decisions, names and open questions; drop pleasantries. "
+        f"Reply with the updated summary only, in under {SUMMARY_TOKEN_BUDGET * 3 // 4} words.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\n"
+        f"New exchanges:\n{transcript}"
+    )
+    return OpenAIClient().chat_completion(instruction, SUMMARY_MODEL, route="summary")
+
+
+class ConversationStore:
+    """Server-side chat memory keyed by (user_id, session_id), bounded by a token budget.
+
+    Turns are stored as they happen; summarizing the oldest ones runs in the
+    background, so the reply doesn't wait on it, and each fold is saved only
+    if the conversation's version hasn't moved since it was read, so two folds
+    of the same turns (from two threads or workers) can't both apply.
+    """
+
+    def __init__(self, recent_budget=RECENT_TURNS_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET,
+                 summarizer=summarize_turns, model="gpt-4o"):
+        self.recent_budget = recent_budget
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer
+        self.model = model
+        self._folding = set()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def _executor(self):
+        # Thread pools don't survive fork; each worker process starts its own
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="conversation-fold")
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def history(self, user_id, session_id):
+        """Chat messages to prepend to the next request: summary first, then recent turns."""
+        summary, turns = get_conversation(user_id, session_id)
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        messages.extend({"role": role, "content": content} for _, role, content, _ in turns)
+        return messages
+
+    def record_turn(self, user_id, session_id, user_message, assistant_message):
+        """Store a user/assistant exchange. Once over budget, the oldest turns are folded in the
+        background; returns that fold's Future, or None if none was started."""
+        add_conversation_turns(user_id, session_id, [
+            ("user", user_message, count_tokens(user_message, self.model)),
+            ("assistant", assistant_message, count_tokens(assistant_message, self.model)),
+        ])
+        _, turns = get_conversation(user_id, session_id)
+        if sum(tokens for _, _, _, tokens in turns) <= self.recent_budget:
+            return None
+
+        key = (user_id, session_id)
+        with self._lock:
+            # One fold per conversation at a time in this process; it re-checks the budget when done
+            if key in self._folding:
+                return None
+            self._folding.add(key)
+        # A copy of this context, so the summary call is traced and queued as this request's
+        return self._executor().submit(contextvars.copy_context().run, self._fold_until_under_budget, key)
+
+    def _fold_until_under_budget(self, key):
+        try:
+            while self.fold(*key):
+                pass
+        except Exception as e:
+            print(f"Conversation fold failed: {e}")
+        finally:
+            with self._lock:
+                self._folding.discard(key)
+
+    def fold(self, user_id, session_id):
+        """Fold the oldest turns into the summary if over budget.
+
+        Returns True if a fold was saved, False if there was nothing to fold or
+        another fold of this conversation was saved first.
+        """
+        summary, turns, version = get_conversation_version(user_id, session_id)
+        total = sum(tokens for _, _, _, tokens in turns)
+        if total <= self.recent_budget:
+            return False
+
+        # Fold down to half the budget so we summarize every few turns, not on every turn
+        folded = []
+        while turns and total > self.recent_budget // 2:
+            turn = turns.pop(0)
+            folded.append(turn)
+            total -= turn[3]
+        # Never split an exchange: the verbatim window should start on a user turn
+        while turns and turns[0][1] != "user":
+            folded.append(turns.pop(0))
+
+        folded_turns = [(role, content) for _, role, content, _ in folded]
+        try:
+            new_summary = self.summarizer(summary, folded_turns)
+        except Exception as e:
+            print(f"Conversation summary failed, keeping trimmed transcript: {e}")
+            new_summary = "\n".join([summary] + [f"{role}: {content}" for role, content in folded_turns])
+        new_summary = fit_text(new_summary.strip(), self.summary_budget, self.model)
+
+        return fold_conversation_turns(user_id, session_id, new_summary, [turn[0] for turn in folded], version)
@@ -0,0 +1,345 @@
+# cosmos_sync.py
+import json
+import os
+import socket
+import threading
+import time
+
+from content_store import ContentStore
+from resume_features import compute_features, is_fresh
+from shared_state import connect
+from tracing import inc, observe, register_gauge, span
+
+COSMOS_CONNECTION_STRING = os.getenv("COSMOS_CONNECTION_STRING", "")
+COSMOS_DATABASE = os.getenv("COSMOS_DATABASE", "")
+COSMOS_CONTAINER = os.getenv("COSMOS_CONTAINER", "")
+
+COSMOS_SYNC_ENABLED = os.getenv("COSMOS_SYNC_ENABLED", "1" if COSMOS_CONNECTION_STRING else "0") == "1"
+COSMOS_SYNC_INTERVAL_SECONDS = float(os.getenv("COSMOS_SYNC_INTERVAL_SECONDS", "5"))
+COSMOS_SYNC_PAGE_SIZE = int(os.getenv("COSMOS_SYNC_PAGE_SIZE", "100"))
+# Local reads stand in for the VM API only while the last caught-up poll is at most this old
+COSMOS_SYNC_MAX_LAG_SECONDS = float(os.getenv("COSMOS_SYNC_MAX_LAG_SECONDS", "60"))
+# The change feed doesn't report hard deletes; ids are reconciled against the container this often
+COSMOS_SYNC_RECONCILE_SECONDS = float(os.getenv("COSMOS_SYNC_RECONCILE_SECONDS", "3600"))
+# Items with this field set are treated as (soft-)deleted
+COSMOS_SYNC_DELETED_FIELD = os.getenv("COSMOS_SYNC_DELETED_FIELD", "deleted")
+COSMOS_SYNC_EMBEDDINGS = os.getenv("COSMOS_SYNC_EMBEDDINGS", "0") == "1"
+# Only one worker process consumes the feed; it holds a lease renewed on every page
+LEASE_SECONDS = 30
+
+# Where resume text lives on a Cosmos item, in order of preference
+TEXT_FIELDS = ("fullText", "extractedText")
+SYSTEM_FIELDS = ("_rid", "_self", "_etag", "_attachments", "_ts", "_lsn")
+
+
+def _content_key(document_id):
+    return f"cosmos:{document_id}"
+
+
+class CosmosChangeFeed:
+    """Change feed of the resume container, read a page at a time (azure-cosmos, loaded on first use)."""
+
+    def __init__(self, connection_string=COSMOS_CONNECTION_STRING, database=COSMOS_DATABASE,
+                 container=COSMOS_CONTAINER):
+        self.connection_string = connection_string
+        self.database = database
+        self.container_name = container
+        self._container = None
+
+    @property
+    def container(self):
+        if self._container is None:
+            from azure.cosmos import CosmosClient
+            client = CosmosClient.from_connection_string(self.connection_string)
+            self._container = client.get_database_client(self.database).get_container_client(self.container_name)
+        return self._container
+
+    def read(self, continuation, max_items):
+        """(items, continuation) for changes after continuation; None reads from the beginning."""
+        kwargs = {"max_item_count": max_items}
+        if continuation:
+            kwargs["continuation"] = continuation
+        else:
+            kwargs["is_start_from_beginning"] = True
+        pages = self.container.query_items_change_feed(**kwargs).by_page()
+        items = list(next(pages, []))
+        # The change feed's continuation is the ETag of the last response
+        token = self.container.client_connection.last_response_headers.get("etag")
+        return items, token or continuation
+
+    def ids(self):
+        """Every item id currently in the container."""
+        return {item["id"] for item in self.container.query_items(
+            "SELECT c.id FROM c", enable_cross_partition_query=True
+        )}
+
+
+class SyncedDocuments:
+    """Local copy of the Cosmos resume store: metadata, text and matching features per document.
+
+    Text goes to the ContentStore; features are recomputed only when the text
+    changes, so metadata-only edits are cheap to apply.
+    """
+
+    def __init__(self, content=None, with_embedding=COSMOS_SYNC_EMBEDDINGS):
+        self.content = content or ContentStore()
+        self.with_embedding = with_embedding
+
+    def apply(self, items):
+        """Apply changed items; returns counts and the users whose documents changed."""
+        result = {"applied": 0, "skipped": 0, "deleted": 0, "users": set()}
+        conn = connect()
+        for item in items:
+            document_id = item["id"]
+            user_id = item.get("userId", "")
+            if item.get(COSMOS_SYNC_DELETED_FIELD):
+                if self.delete(document_id):
+                    result["deleted"] += 1
+                    result["users"].add(user_id)
+                continue
+            row = conn.execute(
+                "SELECT ts, etag, features FROM synced_documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            ts, etag = item.get("_ts", 0), item.get("_etag")
+            if row is not None and (row["ts"] > ts or (etag and row["etag"] == etag)):
+                # Replayed after a restart, or older than what we hold
+                result["skipped"] += 1
+                continue
+
+            text_field = next((f for f in TEXT_FIELDS if item.get(f)), None)
+            text = item.get(text_field, "") if text_field else ""
+            features = json.loads(row["features"]) if row is not None and row["features"] else None
+            if not is_fresh(features, text):
+                self.content.put(_content_key(document_id), text)
+                features = compute_features(text, with_embedding=self.with_embedding)
+            metadata = {k: v for k, v in item.items() if k not in SYSTEM_FIELDS and k not in TEXT_FIELDS}
+            conn.execute(
+                "INSERT OR REPLACE INTO synced_documents (id, user_id, ts, etag, text_field, metadata, features, "
+                "synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_id, user_id, ts, etag, text_field, json.dumps(metadata), json.dumps(features), time.time()),
+            )
+            result["applied"] += 1
+            result["users"].add(user_id)
+        return result
+
+    def delete(self, document_id):
+        """Drop a document; returns whether it was present."""
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = conn.execute("DELETE FROM synced_documents WHERE id = ?", (document_id,)).rowcount
+            self.content.delete(_content_key(document_id), conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted > 0
+
+    def remove_missing(self, present_ids):
+        """Delete local documents whose ids are no longer in the container."""
+        local = [row[0] for row in connect().execute("SELECT id FROM synced_documents")]
+        missing = [document_id for document_id in local if document_id not in present_ids]
+        for document_id in missing:
+            self.delete(document_id)
+        return len(missing)
+
+    def list(self, user_id):
+        """A user's documents without their text, oldest first (like the VM's document list)."""
+        rows = connect().execute(
+            "SELECT metadata FROM synced_documents WHERE user_id = ? ORDER BY ts, id", (user_id,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, document_id, user_id):
+        """One of the user's documents with its text, or None."""
+        row = connect().execute(
+            "SELECT metadata, text_field FROM synced_documents WHERE id = ? AND user_id = ?", (document_id, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        document = json.loads(row["metadata"])
+        if row["text_field"]:
+            document[row["text_field"]] = self.content.get(_content_key(document_id)) or ""
+        return document
+
+    def get_text(self, document_id, user_id):
+        document = self.get(document_id, user_id)
+        if document is None:
+            return None
+        return next((document[f] for f in TEXT_FIELDS if document.get(f)), None)
+
+    def search(self, query, user_id, snippet_chars=200):
+        """The user's documents whose text contains query (case-insensitive), with a leading snippet."""
+        query = query.lower()
+        results = []
+        for row in connect().execute(
+            "SELECT id, metadata FROM synced_documents WHERE user_id = ? ORDER BY ts, id", (user_id,)
+        ).fetchall():
+            text = self.content.get(_content_key(row["id"]), cache=False) or ""
+            if query in text.lower():
+                snippet = text[:snippet_chars]
+                results.append({
+                    "id": row["id"],
+                    "filename": json.loads(row["metadata"]).get("filename"),
+                    "content": snippet + "..." if len(text) > snippet_chars else snippet,
+                })
+        return results
+
+    def get_features(self, document_id, user_id):
+        row = connect().execute(
+            "SELECT features FROM synced_documents WHERE id = ? AND user_id = ?", (document_id, user_id)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] else None
+
+    def __len__(self):
+        return connect().execute("SELECT COUNT(*) FROM synced_documents").fetchone()[0]
+
+
+class CosmosSync:
+    """Background worker applying the Cosmos change feed to a SyncedDocuments index.
+
+    The continuation token is stored in the shared database after each page
+    is applied, so a restart resumes where the last run stopped; a page
+    replayed after a crash is skipped item by item by version. One worker
+    process at a time holds the feed lease; the others only read the index.
+    on_change(user_ids) is called after a poll that changed documents.
+    """
+
+    def __init__(self, source, index, name="resumes", interval=COSMOS_SYNC_INTERVAL_SECONDS,
+                 page_size=COSMOS_SYNC_PAGE_SIZE, max_lag=COSMOS_SYNC_MAX_LAG_SECONDS,
+                 reconcile_interval=COSMOS_SYNC_RECONCILE_SECONDS, on_change=None):
+        self.source = source
+        self.index = index
+        self.name = name
+        self.interval = interval
+        self.page_size = page_size
+        self.max_lag = max_lag
+        self.reconcile_interval = reconcile_interval
+        self.on_change = on_change
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread_pid = None
+        register_gauge("cosmos_sync_lag_seconds", lambda: self.lag_seconds() or 0.0)
+
+    def _state(self):
+        row = connect().execute("SELECT * FROM sync_state WHERE name = ?", (self.name,)).fetchone()
+        return dict(row) if row is not None else {}
+
+    def _update_state(self, **fields):
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        connect().execute(
+            f"UPDATE sync_state SET {assignments}, updated_at = ? WHERE name = ?",
+            (*fields.values(), time.time(), self.name),
+        )
+
+    def _acquire_lease(self):
+        """Take or renew the feed lease; False while another live process holds it."""
+        now = time.time()
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, lease_expires FROM sync_state WHERE name = ?", (self.name,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO sync_state (name, owner, lease_expires, updated_at) VALUES (?, ?, ?, ?)",
+                    (self.name, self.owner, now + LEASE_SECONDS, now),
+                )
+            elif row["owner"] == self.owner or row["lease_expires"] < now:
+                conn.execute(
+                    "UPDATE sync_state SET owner = ?, lease_expires = ? WHERE name = ?",
+                    (self.owner, now + LEASE_SECONDS, self.name),
+                )
+            else:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def sync_once(self):
+        """Apply every change since the stored continuation. None if another process holds the lease."""
+        if not self._acquire_lease():
+            return None
+        totals = {"pages": 0, "applied": 0, "skipped": 0, "deleted": 0, "removed": 0}
+        users = set()
+        continuation = self._state().get("continuation")
+        with span("cosmos_sync.poll"):
+            while True:
+                start = time.perf_counter()
+                items, next_continuation = self.source.read(continuation, self.page_size)
+                if items:
+                    result = self.index.apply(items)
+                    users |= result.pop("users")
+                    for key, value in result.items():
+                        totals[key] += value
+                    totals["pages"] += 1
+                    observe("cosmos_sync_page_seconds", time.perf_counter() - start)
+                if next_continuation != continuation:
+                    self._update_state(continuation=next_continuation)
+                    continuation = next_continuation
+                if not items:
+                    break
+                self._acquire_lease()
+            now = time.time()
+            self._update_state(caught_up_at=now)
+            if now - (self._state().get("reconciled_at") or 0) >= self.reconcile_interval:
+                totals["removed"] = self.index.remove_missing(self.source.ids())
+                self._update_state(reconciled_at=now)
+        inc("cosmos_sync_applied_total", totals["applied"])
+        inc("cosmos_sync_skipped_total", totals["skipped"])
+        inc("cosmos_sync_deleted_total", totals["deleted"] + totals["removed"])
+        if users and self.on_change:
+            self.on_change(users)
+        return totals
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                inc("cosmos_sync_errors_total")
+                print(f"Cosmos sync failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Run the sync loop in a daemon thread of this process. Idempotent."""
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        threading.Thread(target=self._loop, name="cosmos-sync", daemon=True).start()
+
+    def poke(self):
+        """Poll now instead of at the next interval (e.g. right after an upload)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def lag_seconds(self):
+        """Seconds since the feed was last read to the end, or None if it never was."""
+        caught_up_at = self._state().get("caught_up_at")
+        return time.time() - caught_up_at if caught_up_at else None
+
+    def serving(self):
+        """Whether the local index is fresh enough to answer reads instead of the VM API."""
+        lag = self.lag_seconds()
+        return lag is not None and lag <= self.max_lag
+
+    def status(self):
+        state = self._state()
+        lag = self.lag_seconds()
+        return {
+            "enabled": True,
+            "serving": self.serving(),
+            "lag_seconds": round(lag, 3) if lag is not None else None,
+            "documents": len(self.index),
+            "lease_owner": state.get("owner"),
+            "has_continuation": bool(state.get("continuation")),
+            "reconciled_at": state.get("reconciled_at"),
+        }
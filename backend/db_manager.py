@@ -1,39 +1,107 @@
 # db_manager.py
 import sqlite3
 import os
+import threading
 from datetime import datetime
+from tracing import traced
 
 DB_PATH = "db/chatbot.db"
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-# Initialize the database and create tables if they don't exist
+_db_initialized = False
+_init_lock = threading.Lock()
+
+# Initialize the database and create tables if they don't exist (safe to call repeatedly)
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS chatlog (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                user_input TEXT,
-                bot_response TEXT,
-                keywords TEXT,
-                moderation_flags TEXT
-            )
-        ''')
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS flagged (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                user_input TEXT,
-                categories TEXT
-            )
-        ''')
-        conn.commit()
+    global _db_initialized
+    if _db_initialized:
+        return
+    with _init_lock:
+        if _db_initialized:
+            return
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        with sqlite3.connect(DB_PATH) as conn:
+            _create_tables(conn)
+        _db_initialized = True
+
+
+def _create_tables(conn):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS chatlog (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            user_input TEXT,
+            bot_response TEXT,
+            keywords TEXT,
+            moderation_flags TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS flagged (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            user_input TEXT,
+            categories TEXT
+        )
+    ''')
+    # Archival (chat_archive.py) and analytics select these by day
+    c.execute("CREATE INDEX IF NOT EXISTS idx_chatlog_timestamp ON chatlog (timestamp)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_flagged_timestamp ON flagged (timestamp)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS token_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            route TEXT,
+            model TEXT,
+            estimated_prompt_tokens INTEGER,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            cached_tokens INTEGER
+        )
+    ''')
+    # Databases created before cached_tokens was tracked
+    columns = {row[1] for row in c.execute("PRAGMA table_info(token_usage)")}
+    if "cached_tokens" not in columns:
+        c.execute("ALTER TABLE token_usage ADD COLUMN cached_tokens INTEGER")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS conversations (
+            user_id TEXT,
+            session_id TEXT,
+            summary TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (user_id, session_id)
+        )
+    ''')
+    # Bumped by every fold, so concurrent folds of the same turns can't both apply
+    columns = {row[1] for row in c.execute("PRAGMA table_info(conversations)")}
+    if "version" not in columns:
+        c.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS conversation_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            session_id TEXT,
+            timestamp TEXT,
+            role TEXT,
+            content TEXT,
+            tokens INTEGER
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_conversation_turns_session
+        ON conversation_turns (user_id, session_id, id)
+    ''')
+    conn.commit()
+
 
-init_db()
+def _connect():
+    """Connection to the chat database, creating the schema on first use."""
+    init_db()
+    return sqlite3.connect(DB_PATH)
 
+@traced("db.log_chat")
 def log_chat(user_input, bot_response, keywords, moderation_flags):
-    with sqlite3.connect(DB_PATH) as conn:
+    with _connect() as conn:
         c = conn.cursor()
         c.execute('''
             INSERT INTO chatlog (timestamp, user_input, bot_response, keywords, moderation_flags)
@@ -47,8 +115,9 @@ def log_chat(user_input, bot_response, keywords, moderation_flags):
         ))
         conn.commit()
 
+@traced("db.log_flagged")
 def log_flagged(user_input, categories):
-    with sqlite3.connect(DB_PATH) as conn:
+    with _connect() as conn:
         c = conn.cursor()
         c.execute('''
             INSERT INTO flagged (timestamp, user_input, categories)
@@ -59,3 +128,102 @@ def log_flagged(user_input, categories):
             ", ".join(categories)
         ))
         conn.commit()
+
+@traced("db.log_token_usage")
+def log_token_usage(route, model, estimated_prompt_tokens, prompt_tokens, completion_tokens, cached_tokens=None):
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO token_usage (timestamp, route, model, estimated_prompt_tokens, prompt_tokens, completion_tokens,
+                                     cached_tokens)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.utcnow().isoformat(),
+            route,
+            model,
+            estimated_prompt_tokens,
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens
+        ))
+        conn.commit()
+
+def get_token_usage_summary(since=None):
+    """Per (route, model) call and token totals with the prompt cache hit rate, optionally since an ISO timestamp."""
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute('''
+            SELECT route, model, COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(cached_tokens), 0),
+                   COALESCE(SUM(completion_tokens), 0)
+            FROM token_usage
+            WHERE timestamp >= ?
+            GROUP BY route, model
+            ORDER BY route, model
+        ''', (since or "",))
+        return [{
+            "route": route,
+            "model": model,
+            "calls": calls,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+            "cache_hit_rate": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else None,
+        } for route, model, calls, prompt_tokens, cached_tokens, completion_tokens in c.fetchall()]
+
+def get_conversation(user_id, session_id):
+    """Return (summary, turns) for a conversation; turns are (id, role, content, tokens) oldest first."""
+    summary, turns, _ = get_conversation_version(user_id, session_id)
+    return summary, turns
+
+def get_conversation_version(user_id, session_id):
+    """Return (summary, turns, version), read together; pass version to fold_conversation_turns."""
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute("BEGIN")
+        c.execute(
+            "SELECT summary, version FROM conversations WHERE user_id = ? AND session_id = ?",
+            (user_id, session_id),
+        )
+        row = c.fetchone()
+        c.execute('''
+            SELECT id, role, content, tokens FROM conversation_turns
+            WHERE user_id = ? AND session_id = ? ORDER BY id
+        ''', (user_id, session_id))
+        turns = c.fetchall()
+        conn.commit()
+        return (row[0] if row else ""), turns, (row[1] if row else 0)
+
+def add_conversation_turns(user_id, session_id, turns):
+    """Append (role, content, tokens) turns to a conversation."""
+    now = datetime.utcnow().isoformat()
+    with _connect() as conn:
+        c = conn.cursor()
+        c.executemany('''
+            INSERT INTO conversation_turns (user_id, session_id, timestamp, role, content, tokens)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user_id, session_id, now, role, content, tokens) for role, content, tokens in turns])
+        conn.commit()
+
+def fold_conversation_turns(user_id, session_id, summary, turn_ids, version):
+    """Replace the conversation summary and drop the turns that were folded into it.
+
+    Only applies if the conversation is still at version (as read by
+    get_conversation_version); returns False, changing nothing, if another
+    fold got there first.
+    """
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute(
+            "INSERT OR IGNORE INTO conversations (user_id, session_id, summary, updated_at, version) VALUES (?, ?, '', ?, 0)",
+            (user_id, session_id, datetime.utcnow().isoformat()),
+        )
+        c.execute('''
+            UPDATE conversations SET summary = ?, updated_at = ?, version = version + 1
+            WHERE user_id = ? AND session_id = ? AND version = ?
+        ''', (summary, datetime.utcnow().isoformat(), user_id, session_id, version))
+        if c.rowcount != 1:
+            conn.rollback()
+            return False
+        c.executemany("DELETE FROM conversation_turns WHERE id = ?", [(i,) for i in turn_ids])
+        conn.commit()
+        return True
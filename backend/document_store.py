@@ -0,0 +1,173 @@
+# document_store.py
+import json
+import os
+
+from content_store import ContentStore
+from shared_state import connect
+
+_COLUMNS = ("id", "filename", "file_path", "file_type", "upload_date", "content", "content_length")
+# Stored as JSON text
+_JSON_COLUMNS = ("features", "sections", "stats")
+
+
+def _row_to_info(row, with_features=False):
+    keys = row.keys()
+    info = {key: row[key] for key in _COLUMNS if key in keys}
+    for key in ("sections", "stats"):
+        if key in keys and row[key]:
+            info[key] = json.loads(row[key])
+    if with_features:
+        info["features"] = json.loads(row["features"]) if row["features"] else None
+    return info
+
+
+class DocumentStore:
+    """Uploaded document metadata and text, shared by every worker process.
+
+    Metadata lives in the documents table; extracted text is kept compressed
+    in a ContentStore and decoded on demand. Documents stored before the
+    content store existed keep their text in the content column until
+    migrate_inline_content() moves it.
+    """
+
+    def __init__(self, legacy_json_path=None, content=None):
+        self.content = content or ContentStore()
+        if legacy_json_path:
+            self.import_legacy_json(legacy_json_path)
+        self.migrate_inline_content()
+
+    def import_legacy_json(self, path):
+        """One-time import of the old documents.json into an empty store."""
+        if not os.path.exists(path):
+            return 0
+        conn = connect()
+        if conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone():
+            return 0
+        with open(path, "r") as f:
+            documents = json.load(f)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for info in documents.values():
+                self._insert(conn, info, "INSERT OR IGNORE")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(documents)
+
+    def migrate_inline_content(self, batch_size=100):
+        """Move text still held in the documents table into the content store."""
+        conn = connect()
+        moved = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, content FROM documents WHERE content IS NOT NULL LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                return moved
+            for row in rows:
+                self.content.put(row["id"], row["content"])
+                conn.execute("UPDATE documents SET content = NULL WHERE id = ?", (row["id"],))
+            moved += len(rows)
+
+    def _with_content(self, info, cache=True):
+        if info.get("content") is None:
+            info["content"] = self.content.get(info["id"], cache)
+        return info
+
+    def _insert(self, conn, info, verb="INSERT OR REPLACE"):
+        conn.execute(
+            f"{verb} INTO documents ({', '.join(_COLUMNS + _JSON_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(_COLUMNS) + len(_JSON_COLUMNS)))})",
+            (
+                *(info.get(key) for key in _COLUMNS),
+                *(json.dumps(info[key]) if info.get(key) is not None else None for key in _JSON_COLUMNS),
+            ),
+        )
+
+    def put(self, info):
+        self.content.put(info["id"], info.get("content") or "")
+        self._insert(connect(), {**info, "content": None})
+
+    def get(self, document_id, with_features=False):
+        row = connect().execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        return self._with_content(_row_to_info(row, with_features)) if row else None
+
+    def get_content(self, document_id):
+        content = self.content.get(document_id)
+        if content is not None:
+            return content
+        row = connect().execute("SELECT content FROM documents WHERE id = ?", (document_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_features(self, document_id, features):
+        connect().execute("UPDATE documents SET features = ? WHERE id = ?", (json.dumps(features), document_id))
+
+    def all(self):
+        """Every document, in upload order, without cached features."""
+        rows = connect().execute(f"SELECT {', '.join(_COLUMNS)}, sections, stats FROM documents ORDER BY rowid").fetchall()
+        return [self._with_content(_row_to_info(row), cache=False) for row in rows]
+
+    def search(self, query, snippet_chars=200):
+        """Documents whose content contains query (case-insensitive), with a leading snippet."""
+        query = query.lower()
+        results = []
+        for row in connect().execute("SELECT id, filename, content FROM documents ORDER BY rowid").fetchall():
+            content = row["content"]
+            if content is None:
+                content = self.content.get(row["id"], cache=False) or ""
+            if query in content.lower():
+                snippet = content[:snippet_chars]
+                results.append({
+                    "id": row["id"],
+                    "filename": row["filename"],
+                    "content": snippet + "..." if len(content) > snippet_chars else snippet,
+                })
+        return results
+
+    def add_rows(self, document_id, start_seq, rows):
+        """Append a batch of JSON-serializable rows (CSV records or text pages) in one transaction."""
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO document_rows (document_id, seq, data) VALUES (?, ?, ?)",
+                ((document_id, start_seq + i, json.dumps(row, ensure_ascii=False)) for i, row in enumerate(rows)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_rows(self, document_id, offset=0, limit=100):
+        """One page of a document's stored rows, in file order."""
+        rows = connect().execute(
+            "SELECT data FROM document_rows WHERE document_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (document_id, offset, limit),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_rows(self, document_id):
+        connect().execute("DELETE FROM document_rows WHERE document_id = ?", (document_id,))
+
+    def delete(self, document_id):
+        """Remove a document and its rows. Returns its metadata, or None if it didn't exist."""
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+                conn.execute("DELETE FROM document_rows WHERE document_id = ?", (document_id,))
+                self.content.delete(document_id, conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return _row_to_info(row) if row else None
+
+    def __contains__(self, document_id):
+        return connect().execute("SELECT 1 FROM documents WHERE id = ?", (document_id,)).fetchone() is not None
+
+    def __len__(self):
+        return connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
@@ -0,0 +1,182 @@
+# docx_extractor.py
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+# Paragraph styles that start a new section
+_HEADING_STYLE = re.compile(r"^(heading\s?\d|title|subtitle)$", re.IGNORECASE)
+_HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+_FOOTER_PART = re.compile(r"^word/footer\d*\.xml$")
+
+CELL_SEPARATOR = " | "
+
+
+def _parse_part(stream, emit):
+    """Stream one WordprocessingML part, calling emit(kind, text) per block.
+
+    kind is "heading", "paragraph", "list_item", "table" or "textbox". Text boxes
+    appear twice in most files (DrawingML plus a VML fallback); only the first
+    copy is read. Finished top-level blocks are dropped from the tree as we go,
+    so memory stays proportional to the largest single block.
+    """
+    body = None
+    fallback_depth = 0
+    textbox_depth = 0
+    tab_stops_depth = 0
+    paragraphs = []  # stack: a text box paragraph nests inside its anchor paragraph
+    tables = []  # stack of {"rows": [...], "row": [cells] or None, "nested": [rows of tables inside this row]}
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == MC + "Fallback":
+                fallback_depth += 1
+            elif fallback_depth:
+                continue
+            elif tag == W + "p":
+                paragraphs.append({"parts": [], "style": None, "list": False})
+            elif tag == W + "tbl":
+                tables.append({"rows": [], "row": None, "nested": []})
+            elif tag == W + "tr":
+                tables[-1]["row"] = []
+                tables[-1]["nested"] = []
+            elif tag == W + "tc":
+                tables[-1]["row"].append([])
+            elif tag == W + "txbxContent":
+                textbox_depth += 1
+            elif tag == W + "tabs":
+                tab_stops_depth += 1
+            elif tag in (W + "body", W + "hdr", W + "ftr"):
+                body = elem
+            continue
+
+        if tag == MC + "Fallback":
+            fallback_depth -= 1
+            elem.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        paragraph = paragraphs[-1] if paragraphs else None
+        if tag == W + "t":
+            if paragraph is not None:
+                paragraph["parts"].append(elem.text or "")
+        elif tag == W + "tab":
+            if paragraph is not None and not tab_stops_depth:
+                paragraph["parts"].append("\t")
+        elif tag in (W + "br", W + "cr"):
+            if paragraph is not None:
+                paragraph["parts"].append("\n")
+        elif tag == W + "tabs":
+            tab_stops_depth -= 1
+        elif tag == W + "pStyle":
+            if paragraph is not None:
+                paragraph["style"] = elem.get(W + "val")
+        elif tag == W + "numPr":
+            if paragraph is not None:
+                paragraph["list"] = True
+        elif tag == W + "txbxContent":
+            textbox_depth -= 1
+        elif tag == W + "p":
+            paragraphs.pop()
+            text = "".join(paragraph["parts"]).strip()
+            if text:
+                if textbox_depth:
+                    emit("textbox", text)
+                elif tables and tables[-1]["row"]:
+                    tables[-1]["row"][-1].append(text)
+                elif paragraph["style"] and _HEADING_STYLE.match(paragraph["style"]):
+                    emit("heading", text)
+                elif paragraph["list"]:
+                    emit("list_item", f"- {text}")
+                else:
+                    emit("paragraph", text)
+        elif tag == W + "tr":
+            table = tables[-1]
+            cells = [" ".join(cell) for cell in table["row"]]
+            if any(cells):
+                table["rows"].append(CELL_SEPARATOR.join(cells))
+            # Rows of tables nested in this row follow it, one line each
+            table["rows"].extend(table["nested"])
+            table["row"] = None
+            table["nested"] = []
+        elif tag == W + "tbl":
+            table = tables.pop()
+            if tables and tables[-1]["row"] is not None:
+                tables[-1]["nested"].extend(table["rows"])
+                continue
+            text = "\n".join(table["rows"])
+            if text:
+                if textbox_depth:
+                    emit("textbox", text)
+                else:
+                    emit("table", text)
+        else:
+            continue
+
+        if body is not None and not paragraphs and not tables and tag in (W + "p", W + "tbl"):
+            body.clear()
+
+
+def extract_docx(path):
+    """Extract text and section boundaries from a .docx file without loading its object model.
+
+    Returns (text, sections). Page header and footer text come first (each
+    distinct header/footer once), then the body in document order, including
+    tables (one line per row, cells separated by " | ", rows of a nested table
+    on their own lines after the row holding it), list items and text boxes.
+    Keeping page furniture ahead of the body puts it in the leading part that
+    resume_features.segment_sections names "header", never in a resume's last
+    section. sections is a list of {"title", "start", "end"} character ranges
+    into text: "header" and "footer" for the page furniture, "body" for body
+    text before the first heading, then one per heading. Lines are stripped,
+    so the ranges still hold after text.strip().
+    """
+    lines = []
+    sections = []
+    offset = 0
+    current = None
+
+    def open_section(title):
+        nonlocal current
+        if current is not None:
+            current["end"] = offset
+            if current["end"] > current["start"]:
+                sections.append(current)
+        current = {"title": title, "start": offset, "end": offset}
+
+    def emit(kind, text):
+        nonlocal offset
+        text = text.strip()
+        if kind == "heading":
+            open_section(text)
+        lines.append(text)
+        offset += len(text) + 1
+
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        for pattern, title in ((_HEADER_PART, "header"), (_FOOTER_PART, "footer"), (None, "body")):
+            open_section(title)
+            if pattern is None:
+                with archive.open("word/document.xml") as stream:
+                    _parse_part(stream, emit)
+                continue
+            seen = set()
+            for name in sorted(n for n in names if pattern.match(n)):
+                part = []
+                with archive.open(name) as stream:
+                    _parse_part(stream, lambda kind, text: part.append(text))
+                text = "\n".join(part)
+                # First-page, even-page and default headers usually repeat the same text
+                if text and text not in seen:
+                    seen.add(text)
+                    emit("paragraph", text)
+        open_section(None)
+
+    text = "\n".join(lines)
+    for section in sections:
+        section["end"] = min(section["end"], len(text))
+    return text, sections
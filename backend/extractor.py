@@ -1,11 +1,13 @@
 # extractor.py
 from openai_client import OpenAIClient
+from tracing import traced
 
 
 
 
+@traced("keywords.extract")
 def extract_keywords(prompt):
     client = OpenAIClient()
     instruction = f"Extract 3 to 5 important keywords or topics from the following message:\n\n\"{prompt}\"\n\nList them separated by commas."
-    response = client.chat_completion(instruction)
+    response = client.chat_completion(instruction, route="keywords")
     return [kw.strip() for kw in response.split(',') if kw.strip()]
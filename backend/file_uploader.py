@@ -1,38 +1,35 @@
 import os
-import fitz  # PyMuPDF
-from docx import Document
-import json
 from datetime import datetime
 import hashlib
+import threading
+from docx_extractor import extract_docx
+from document_store import DocumentStore
+from resume_features import RESUME_EMBEDDINGS, compute_features, is_fresh
+from text_ingest import ingest_csv, ingest_text, text_pages
 
 class FileUploader:
     def __init__(self, upload_folder="uploads"):
         self.upload_folder = upload_folder
-        self.documents_db = "documents.json"
+        # Pre-SQLite metadata file, imported into the shared store on first start
+        self.legacy_documents_db = "documents.json"
+        self._store = None
         self.ensure_upload_folder()
-        self.load_documents_db()
     
     def ensure_upload_folder(self):
         """Create upload folder if it doesn't exist"""
-        if not os.path.exists(self.upload_folder):
-            os.makedirs(self.upload_folder)
+        os.makedirs(self.upload_folder, exist_ok=True)
     
-    def load_documents_db(self):
-        """Load or create documents database"""
-        if os.path.exists(self.documents_db):
-            with open(self.documents_db, 'r') as f:
-                self.documents = json.load(f)
-        else:
-            self.documents = {}
-    
-    def save_documents_db(self):
-        """Save documents database"""
-        with open(self.documents_db, 'w') as f:
-            json.dump(self.documents, f, indent=2)
+    @property
+    def documents(self):
+        """Document metadata store, shared across worker processes (opened on first use)"""
+        if self._store is None:
+            self._store = DocumentStore(self.legacy_documents_db)
+        return self._store
     
     def extract_text_from_pdf(self, file_path):
         """Extract text from PDF file"""
         try:
+            import fitz  # PyMuPDF, imported on first use to keep startup fast
             doc = fitz.open(file_path)
             text = ""
             for page in doc:
@@ -43,46 +40,59 @@ class FileUploader:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
     def extract_text_from_docx(self, file_path):
-        """Extract text from DOCX file"""
-        try:
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error extracting text from DOCX: {str(e)}")
+        """Extract text from DOCX file (headers, tables and text boxes included)"""
+        return self.extract_docx_with_sections(file_path)[0]
     
-    def extract_text_from_txt(self, file_path):
-        """Extract text from TXT file"""
+    def extract_docx_with_sections(self, file_path):
+        """Extract (text, sections) from DOCX file; sections are "header"/"footer" page text, then "body" and heading-delimited character ranges"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+            text, sections = extract_docx(file_path)
+            return text.strip(), sections
         except Exception as e:
-            raise Exception(f"Error reading text file: {str(e)}")
+            raise Exception(f"Error extracting text from DOCX: {str(e)}")
     
-    def process_file(self, file_data, filename):
-        """Process uploaded file and extract text content"""
+    def store_upload(self, file_data, filename):
+        """Persist uploaded bytes and return (document_id, file_path)"""
         # Generate unique ID for the document
-        file_hash = hashlib.md5(f"{filename}{datetime.now().isoformat()}".encode()).hexdigest()
+        file_hash = hashlib.md5(f"{filename}{datetime.now().isoformat()}{os.getpid()}-{threading.get_ident()}".encode()).hexdigest()
         
-        # Save file to upload folder
-        file_path = os.path.join(self.upload_folder, filename)
+        # Prefix with the ID so concurrent uploads of the same filename don't clobber each other
+        file_path = os.path.join(self.upload_folder, f"{file_hash}_{os.path.basename(filename)}")
         with open(file_path, 'wb') as f:
             f.write(file_data)
+        return file_hash, file_path
+    
+    def process_file(self, file_data, filename):
+        """Process uploaded file and extract text content"""
+        file_hash, file_path = self.store_upload(file_data, filename)
+        return self.process_stored_file(file_hash, filename, file_path)
+    
+    def process_stored_file(self, file_hash, filename, file_path, progress=None):
+        """Extract text from an already-stored upload and add it to the documents database"""
+        if progress:
+            progress("extracting", 10)
         
         # Extract text based on file type
         file_extension = filename.lower().split('.')[-1]
+        sections = None
+        stats = None
         
         if file_extension == 'pdf':
             text_content = self.extract_text_from_pdf(file_path)
         elif file_extension == 'docx':
-            text_content = self.extract_text_from_docx(file_path)
-        elif file_extension in ['txt', 'csv']:
-            text_content = self.extract_text_from_txt(file_path)
+            text_content, sections = self.extract_docx_with_sections(file_path)
+        elif file_extension == 'txt':
+            # Streamed in chunks; text past the inline content is stored as pageable rows
+            text_content, stats = ingest_text(file_path, file_hash, self.documents, progress)
+        elif file_extension == 'csv':
+            # Rows become structured records; the content is a bounded summary
+            text_content, stats = ingest_csv(file_path, file_hash, filename, self.documents, progress)
         else:
             raise Exception(f"Unsupported file type: {file_extension}")
         
+        if progress:
+            progress("computing features", 60)
+        
         # Store document information
         document_info = {
             "id": file_hash,
@@ -91,48 +101,69 @@ class FileUploader:
             "file_type": file_extension,
             "upload_date": datetime.now().isoformat(),
             "content": text_content,
-            "content_length": len(text_content)
+            "content_length": len(text_content),
+            "features": compute_features(text_content, with_embedding=RESUME_EMBEDDINGS)
         }
+        if sections is not None:
+            document_info["sections"] = sections
+        if stats is not None:
+            document_info["stats"] = stats
         
-        self.documents[file_hash] = document_info
-        self.save_documents_db()
+        if progress:
+            progress("saving", 90)
+        self.documents.put(document_info)
         
         return document_info
     
+    def get_document(self, document_id):
+        """Get document metadata and content by ID"""
+        return self.documents.get(document_id)
+
     def get_document_content(self, document_id):
         """Get document content by ID"""
-        if document_id in self.documents:
-            return self.documents[document_id]["content"]
-        return None
+        return self.documents.get_content(document_id)
+    
+    def get_document_features(self, document_id):
+        """Get cached features for a document, recomputing them if the content changed"""
+        doc_info = self.documents.get(document_id, with_features=True)
+        if doc_info is None:
+            return None
+        features = doc_info.get("features")
+        if not is_fresh(features, doc_info["content"]):
+            features = compute_features(doc_info["content"])
+            self.documents.set_features(document_id, features)
+        return features
+    
+    def get_document_rows(self, document_id, offset=0, limit=100):
+        """Page through a TXT/CSV document's stored rows (CSV records or text pages)"""
+        doc_info = self.documents.get(document_id)
+        if doc_info is None:
+            return None
+        stats = doc_info.get("stats") or {}
+        if stats.get("kind") == "text":
+            rows = text_pages(document_id, doc_info["content"], stats, self.documents, offset, limit)
+        else:
+            rows = self.documents.get_rows(document_id, offset, limit)
+        return {
+            "rows": rows,
+            "offset": offset,
+            "stats": doc_info.get("stats"),
+        }
     
     def get_all_documents(self):
-        """Get all uploaded documents"""
-        return list(self.documents.values())
+        """Get all uploaded documents (without the cached feature payloads)"""
+        return self.documents.all()
     
     def search_documents(self, query):
         """Search documents for specific content"""
-        results = []
-        query_lower = query.lower()
-        
-        for doc_id, doc_info in self.documents.items():
-            if query_lower in doc_info["content"].lower():
-                results.append({
-                    "id": doc_id,
-                    "filename": doc_info["filename"],
-                    "content": doc_info["content"][:200] + "..." if len(doc_info["content"]) > 200 else doc_info["content"]
-                })
-        
-        return results
+        return self.documents.search(query)
     
     def delete_document(self, document_id):
         """Delete a document"""
-        if document_id in self.documents:
-            doc_info = self.documents[document_id]
-            # Remove file
-            if os.path.exists(doc_info["file_path"]):
-                os.remove(doc_info["file_path"])
-            # Remove from database
-            del self.documents[document_id]
-            self.save_documents_db()
-            return True
-        return False
+        doc_info = self.documents.delete(document_id)
+        if doc_info is None:
+            return False
+        # Remove file
+        if os.path.exists(doc_info["file_path"]):
+            os.remove(doc_info["file_path"])
+        return True
@@ -1,10 +1,55 @@
 # foundry_client.py
+import json
 import os
 import requests
-from azure.identity import ClientSecretCredential
-from dotenv import load_dotenv
-
-load_dotenv()
+from admission import current_caller, llm_queue
+from config import load_env
+from db_manager import log_token_usage
+from prompt_budget import count_tokens, fit_text
+from resilience import get_upstream
+from shared_state import SharedTokenCache
+from singleflight import SingleFlight, request_key
+from tracing import span
+
+load_env()
+
+# Input budget for ResumeAgent prompts; long resumes/job posts are trimmed to fit
+RESUME_AGENT_MAX_INPUT_TOKENS = int(os.getenv("RESUME_AGENT_MAX_INPUT_TOKENS", "100000"))
+RESUME_AGENT_MODEL = os.getenv("RESUME_AGENT_MODEL", "gpt-4.1-mini")
+# Upper bound on agent calls; the effective timeout adapts to observed latency below this
+FOUNDRY_TIMEOUT_SECONDS = float(os.getenv("FOUNDRY_TIMEOUT_SECONDS", "120"))
+
+# Returned when the agent's reply has no text; never cached
+NO_SUGGESTIONS_MESSAGE = "ResumeAgent did not return a response. Please try again."
+
+# Identical concurrent agent requests share one upstream call
+_foundry_flight = SingleFlight("foundry")
+_token_cache = SharedTokenCache()
+# Shared so agent calls reuse pooled TLS connections
+_http = requests.Session()
+
+
+def _make_credential(tenant_id, client_id, client_secret):
+    """Azure AD credential used to get agent tokens (swapped out by the benchmark harness)."""
+    from azure.identity import ClientSecretCredential
+
+    return ClientSecretCredential(
+        tenant_id=tenant_id,
+        client_id=client_id,
+        client_secret=client_secret,
+    )
+
+
+def _cached_token(credential, tenant_id, client_id, scope="https://ai.azure.com/.default"):
+    """Agent access token, shared across worker processes until shortly before it expires."""
+    key = f"{tenant_id}:{client_id}:{scope}"
+    token = _token_cache.get(key)
+    if token is None:
+        with span("azure.token"):
+            access = credential.get_token(scope)
+        _token_cache.put(key, access.token, access.expires_on)
+        token = access.token
+    return token
 
 
 class FoundryClient:
@@ -20,16 +65,15 @@ class FoundryClient:
                 "AZURE_TENANT_ID, and FOUNDRY_AGENT_ENDPOINT in .env"
             )
 
-        self.credential = ClientSecretCredential(
-            tenant_id=self.tenant_id,
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-        )
+        self.credential = _make_credential(self.tenant_id, self.client_id, self.client_secret)
 
     def _get_token(self):
-        scope = "https://ai.azure.com/.default"
-        token = self.credential.get_token(scope)
-        return token.token
+        return _cached_token(self.credential, self.tenant_id, self.client_id)
+
+    def warm_up(self):
+        """Fetch the agent token and open a pooled connection to the endpoint."""
+        self._get_token()
+        _http.head(self.agent_endpoint, timeout=10)
 
     def chat(self, message, conversation_history=None):
         """Send a message to the Foundry agent and return the response."""
@@ -42,14 +86,26 @@ class FoundryClient:
 
         payload = {"input": input_messages}
 
-        response = requests.post(
-            self.agent_endpoint,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            json=payload,
-        )
+        def send():
+            cost = sum(len(str(m.get("content") or "")) for m in input_messages) // 4
+            with llm_queue.slot(current_caller(), cost, "foundry_chat"):
+                return get_upstream("foundry").call(
+                    "chat",
+                    lambda timeout: _http.post(
+                        self.agent_endpoint,
+                        headers={
+                            "Content-Type": "application/json",
+                            "Authorization": f"Bearer {access_token}",
+                        },
+                        json=payload,
+                        timeout=timeout,
+                    ),
+                    max_timeout=FOUNDRY_TIMEOUT_SECONDS,
+                    min_timeout=15,
+                )
+
+        with span("foundry.chat"):
+            response = _foundry_flight.do(request_key(self.agent_endpoint, payload), send)
 
         if not response.ok:
             print(f"Foundry API error: {response.status_code} {response.text}")
@@ -57,26 +113,7 @@ class FoundryClient:
 
         data = response.json()
 
-        # Extract the assistant response
-        assistant_message = ""
-
-        if data.get("output_text"):
-            assistant_message = data["output_text"]
-        elif data.get("output") and isinstance(data["output"], list):
-            for item in data["output"]:
-                if item.get("type") == "message" and item.get("role") == "assistant":
-                    content = item.get("content", [])
-                    if isinstance(content, list):
-                        for c in content:
-                            if c.get("type") == "output_text" and c.get("text"):
-                                assistant_message = c["text"]
-                                break
-                    else:
-                        assistant_message = str(content)
-                    break
-        elif data.get("choices") and data["choices"][0].get("message", {}).get("content"):
-            assistant_message = data["choices"][0]["message"]["content"]
-
+        assistant_message = _extract_message(data)
         if not assistant_message:
             print(f"Could not extract response from Foundry: {data}")
             assistant_message = "I apologize, but I couldn't generate a response. Please try again."
@@ -100,22 +137,23 @@ class ResumeAgentClient:
                 "RESUME_AGENT_ENDPOINT in .env"
             )
 
-        self.credential = ClientSecretCredential(
-            tenant_id=self.tenant_id,
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-        )
+        self.credential = _make_credential(self.tenant_id, self.client_id, self.client_secret)
 
     def _get_token(self):
-        scope = "https://ai.azure.com/.default"
-        token = self.credential.get_token(scope)
-        return token.token
+        return _cached_token(self.credential, self.tenant_id, self.client_id)
 
-    def tailor_resume(self, resume_text, job_description, matched_skills, missing_skills):
-        """Send resume + job gaps to ResumeAgent for tailoring suggestions."""
-        access_token = self._get_token()
+    def warm_up(self):
+        """Fetch the agent token and open a pooled connection to the endpoint."""
+        self._get_token()
+        _http.head(self.endpoint, timeout=10)
 
-        prompt = (
+    def _tailor_prompt(self, resume_text, job_description, matched_skills, missing_skills):
+        # Give the job description up to a third of the budget and the resume the rest
+        job_description = fit_text(job_description, RESUME_AGENT_MAX_INPUT_TOKENS // 3, RESUME_AGENT_MODEL)
+        resume_budget = RESUME_AGENT_MAX_INPUT_TOKENS - count_tokens(job_description, RESUME_AGENT_MODEL) - 200
+        resume_text = fit_text(resume_text, resume_budget, RESUME_AGENT_MODEL)
+
+        return (
             f"TAILOR MODE\n\n"
             f"Job Description:\n{job_description}\n\n"
             f"My Resume:\n{resume_text}\n\n"
@@ -124,44 +162,137 @@ class ResumeAgentClient:
             f"Give me your top 3-5 highest-impact changes to tailor this resume for this job."
         )
 
+    def _post(self, op, payload, stream=False):
+        access_token = self._get_token()
+        return get_upstream("resume_agent").call(
+            op,
+            lambda timeout: _http.post(
+                self.endpoint,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                },
+                json=payload,
+                timeout=timeout,
+                stream=stream,
+            ),
+            max_timeout=FOUNDRY_TIMEOUT_SECONDS,
+            min_timeout=15,
+        )
+
+    def _log_usage(self, prompt, usage):
+        usage = usage or {}
+        try:
+            log_token_usage(
+                "tailor_resume",
+                RESUME_AGENT_MODEL,
+                count_tokens(prompt, RESUME_AGENT_MODEL),
+                usage.get("input_tokens"),
+                usage.get("output_tokens"),
+                (usage.get("input_tokens_details") or {}).get("cached_tokens"),
+            )
+        except Exception as e:
+            print(f"Token usage logging failed: {e}")
+
+    def tailor_resume(self, resume_text, job_description, matched_skills, missing_skills):
+        """Send resume + job gaps to ResumeAgent for tailoring suggestions."""
+        prompt = self._tailor_prompt(resume_text, job_description, matched_skills, missing_skills)
         payload = {"input": [{"role": "user", "content": prompt}]}
 
-        response = requests.post(
-            self.endpoint,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            json=payload,
-        )
+        with span("foundry.tailor_resume"):
+            response = _foundry_flight.do(
+                request_key(self.endpoint, payload),
+                lambda: self._post("tailor_resume", payload),
+            )
 
         if not response.ok:
             print(f"ResumeAgent API error: {response.status_code} {response.text}")
             raise Exception(f"ResumeAgent returned {response.status_code}: {response.text}")
 
         data = response.json()
+        self._log_usage(prompt, data.get("usage"))
 
-        # Extract response (same structure as PersonalAssistant)
-        assistant_message = ""
-        if data.get("output_text"):
-            assistant_message = data["output_text"]
-        elif data.get("output") and isinstance(data["output"], list):
-            for item in data["output"]:
-                if item.get("type") == "message" and item.get("role") == "assistant":
-                    content = item.get("content", [])
-                    if isinstance(content, list):
-                        for c in content:
-                            if c.get("type") == "output_text" and c.get("text"):
-                                assistant_message = c["text"]
-                                break
-                    else:
-                        assistant_message = str(content)
-                    break
-        elif data.get("choices") and data["choices"][0].get("message", {}).get("content"):
-            assistant_message = data["choices"][0]["message"]["content"]
-
+        assistant_message = _extract_message(data)
         if not assistant_message:
             print(f"Could not extract response from ResumeAgent: {data}")
-            assistant_message = "ResumeAgent did not return a response. Please try again."
+            assistant_message = NO_SUGGESTIONS_MESSAGE
 
         return assistant_message
+
+    def tailor_resume_stream(self, resume_text, job_description, matched_skills, missing_skills):
+        """Like tailor_resume, but yields the suggestions as text pieces while the agent writes them."""
+        prompt = self._tailor_prompt(resume_text, job_description, matched_skills, missing_skills)
+        payload = {"input": [{"role": "user", "content": prompt}], "stream": True}
+
+        with span("foundry.tailor_resume_stream"):
+            response = self._post("tailor_resume_stream", payload, stream=True)
+            if not response.ok:
+                print(f"ResumeAgent API error: {response.status_code} {response.text}")
+                raise Exception(f"ResumeAgent returned {response.status_code}: {response.text}")
+
+            with response:
+                if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                    # Endpoint answered without streaming; hand back the whole message
+                    data = response.json()
+                    self._log_usage(prompt, data.get("usage"))
+                    yield _extract_message(data) or NO_SUGGESTIONS_MESSAGE
+                    return
+
+                usage = None
+                produced = False
+                try:
+                    for event in _sse_events(response):
+                        kind = event.get("type")
+                        if kind == "response.output_text.delta" and event.get("delta"):
+                            produced = True
+                            yield event["delta"]
+                        elif kind == "response.completed":
+                            usage = (event.get("response") or {}).get("usage")
+                        elif kind in ("response.failed", "error"):
+                            raise Exception(f"ResumeAgent stream failed: {event}")
+                        elif event.get("choices"):
+                            # Chat-completions style chunk
+                            delta = (event["choices"][0].get("delta") or {}).get("content")
+                            if delta:
+                                produced = True
+                                yield delta
+                except Exception as e:
+                    # The breaker saw a healthy response when the headers arrived
+                    get_upstream("resume_agent").record_error("tailor_resume_stream", e)
+                    raise
+                self._log_usage(prompt, usage)
+                if not produced:
+                    yield NO_SUGGESTIONS_MESSAGE
+
+
+def _sse_events(response):
+    """JSON payloads of a server-sent event stream, one per `data:` line."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def _extract_message(data):
+    """Assistant text from an agent response (Responses API or chat-completions shape)."""
+    if data.get("output_text"):
+        return data["output_text"]
+    if data.get("output") and isinstance(data["output"], list):
+        for item in data["output"]:
+            if item.get("type") == "message" and item.get("role") == "assistant":
+                content = item.get("content", [])
+                if isinstance(content, list):
+                    for c in content:
+                        if c.get("type") == "output_text" and c.get("text"):
+                            return c["text"]
+                    return ""
+                return str(content)
+    if data.get("choices") and data["choices"][0].get("message", {}).get("content"):
+        return data["choices"][0]["message"]["content"]
+    return ""
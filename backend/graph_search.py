@@ -0,0 +1,292 @@
+# graph_search.py
+import array
+import asyncio
+import base64
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from shared_state import SharedCounters, connect
+from tracing import inc, observe
+
+GRAPH_CACHE_TTL_SECONDS = float(os.getenv("GRAPH_CACHE_TTL_SECONDS", str(24 * 3600)))
+GRAPH_SNAPSHOT_PATH = os.getenv("GRAPH_SNAPSHOT_PATH", "db/graph_snapshot.json.gz")
+# AuraDB connection for remote searches (needs graphiti-core); without a password only the snapshot is searched
+NEO4J_URI = os.getenv("NEO4J_URI", "neo4j+s://8ab5755a.databases.neo4j.io")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
+GRAPH_SEARCH_TIMEOUT_SECONDS = float(os.getenv("GRAPH_SEARCH_TIMEOUT_SECONDS", "30"))
+
+# Fields kept from Graphiti's EntityEdge results (embeddings are dropped)
+EDGE_FIELDS = ("uuid", "name", "fact", "source_node_uuid", "target_node_uuid", "valid_at", "invalid_at",
+               "expired_at", "created_at", "group_id")
+# Reciprocal-rank fusion constant for combining vector and keyword rankings
+RRF_K = 60
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = frozenset("a an and are for has have in is of on or the to what which who with does do".split())
+
+# Ingestion scripts bump this; cached results from an older generation are never served
+_generations = SharedCounters("graph")
+
+
+def normalize_query(query):
+    """Cache form of a query: case, Unicode form, spacing and trailing punctuation don't matter."""
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    return " ".join(query.split()).rstrip("?!. ")
+
+
+def _terms(text):
+    return {t for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS}
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    for method in ("iso_format", "isoformat"):  # neo4j.time.DateTime, datetime
+        if hasattr(value, method):
+            return getattr(value, method)()
+    return str(value)
+
+
+def edge_to_dict(edge):
+    """Plain-dict form of a Graphiti edge (pydantic model or mapping)."""
+    if hasattr(edge, "model_dump"):
+        edge = edge.model_dump()
+    elif not isinstance(edge, dict):
+        edge = {field: getattr(edge, field, None) for field in EDGE_FIELDS}
+    return {field: _jsonable(edge.get(field)) for field in EDGE_FIELDS if field in edge}
+
+
+def invalidate_graph_cache():
+    """Retire every cached search result; run after adding episodes to the graph."""
+    _generations.incr("generation")
+    connect().execute("DELETE FROM graph_search_cache WHERE generation < ?", (_generations.get("generation"),))
+
+
+class GraphSearch:
+    """Knowledge-graph search with a shared result cache and an optional in-process snapshot.
+
+    `graphiti` is anything with Graphiti's async search(query=, num_results=)
+    (and embedder.create() for snapshot queries), so a local stub can stand
+    in for AuraDB. Cached results are plain edge dicts.
+    """
+
+    def __init__(self, graphiti, cache_ttl=GRAPH_CACHE_TTL_SECONDS, snapshot=None):
+        self.graphiti = graphiti
+        self.cache_ttl = cache_ttl
+        self.snapshot = snapshot
+
+    async def search(self, query, num_results=10, local=False):
+        """Top edges for query. local=True answers from the snapshot without a remote round trip."""
+        start = time.perf_counter()
+        if local:
+            if self.snapshot is None:
+                raise ValueError("No graph snapshot loaded; export one with export_snapshot()")
+            embedder = getattr(self.graphiti, "embedder", None) if self.graphiti is not None else None
+            vector = await embedder.create(input_data=query) if embedder is not None else None
+            results = self.snapshot.search(query, num_results, vector)
+            observe("graph_search_seconds", time.perf_counter() - start, (("source", "snapshot"),))
+            return results
+
+        generation = _generations.get("generation")
+        key = f"{num_results}:{normalize_query(query)}"
+        conn = connect()
+        row = conn.execute(
+            "SELECT results FROM graph_search_cache WHERE key = ? AND generation = ? AND created_at > ?",
+            (key, generation, time.time() - self.cache_ttl),
+        ).fetchone()
+        if row is not None:
+            inc("graph_cache_hits_total")
+            observe("graph_search_seconds", time.perf_counter() - start, (("source", "cache"),))
+            return json.loads(row["results"])
+
+        inc("graph_cache_misses_total")
+        edges = await self.graphiti.search(query=query, num_results=num_results)
+        results = [edge_to_dict(edge) for edge in edges]
+        conn.execute(
+            "INSERT OR REPLACE INTO graph_search_cache (key, generation, results, created_at) VALUES (?, ?, ?, ?)",
+            (key, generation, json.dumps(results), time.time()),
+        )
+        observe("graph_search_seconds", time.perf_counter() - start, (("source", "remote"),))
+        return results
+
+
+def graph_search_from_env():
+    """GraphSearch over AuraDB (if NEO4J_PASSWORD is set) and the exported snapshot (if present), or None."""
+    graphiti = None
+    if NEO4J_PASSWORD:
+        from graphiti_core import Graphiti
+        graphiti = Graphiti(uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD)
+    snapshot = GraphSnapshot.load() if os.path.exists(GRAPH_SNAPSHOT_PATH) else None
+    if graphiti is None and snapshot is None:
+        return None
+    return GraphSearch(graphiti, snapshot=snapshot)
+
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def run_sync(coro, timeout=GRAPH_SEARCH_TIMEOUT_SECONDS):
+    """Run a coroutine from synchronous code (a Flask request) on this process's graph event loop.
+
+    Graphiti's Neo4j driver is bound to the loop it first ran on, so every
+    call shares one long-lived loop in a daemon thread.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        # The loop's thread doesn't survive fork; each worker process starts its own
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="graph-search", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result(timeout)
+
+
+# ── Local snapshot ───────────────────────────────────────────────────
+
+def _pack(vector):
+    return base64.b64encode(array.array("f", vector).tobytes()).decode("ascii") if vector else None
+
+
+def _unpack(data):
+    values = array.array("f")
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else list(vector)
+
+
+async def export_snapshot(graphiti, path=GRAPH_SNAPSHOT_PATH, group_ids=None):
+    """Write the graph's entity nodes and fact edges, with embeddings, to a gzipped JSON file."""
+    where = "WHERE n.group_id IN $group_ids" if group_ids else ""
+    node_records, _, _ = await graphiti.driver.execute_query(
+        f"MATCH (n:Entity) {where} RETURN n.uuid AS uuid, n.name AS name, n.summary AS summary, "
+        "n.group_id AS group_id, n.name_embedding AS name_embedding",
+        group_ids=group_ids,
+    )
+    where = "WHERE e.group_id IN $group_ids" if group_ids else ""
+    edge_records, _, _ = await graphiti.driver.execute_query(
+        f"MATCH (s:Entity)-[e:RELATES_TO]->(t:Entity) {where} RETURN e.uuid AS uuid, e.name AS name, "
+        "e.fact AS fact, e.fact_embedding AS fact_embedding, s.uuid AS source_node_uuid, "
+        "t.uuid AS target_node_uuid, e.valid_at AS valid_at, e.invalid_at AS invalid_at, "
+        "e.expired_at AS expired_at, e.created_at AS created_at, e.group_id AS group_id",
+        group_ids=group_ids,
+    )
+
+    snapshot = {
+        "exported_at": time.time(),
+        "nodes": [{
+            "uuid": r["uuid"], "name": r["name"], "summary": r["summary"], "group_id": r["group_id"],
+            "embedding": _pack(r["name_embedding"]),
+        } for r in node_records],
+        "edges": [{
+            **{field: _jsonable(r[field]) for field in EDGE_FIELDS},
+            "embedding": _pack(r["fact_embedding"]),
+        } for r in edge_records],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+    return len(snapshot["nodes"]), len(snapshot["edges"])
+
+
+class GraphSnapshot:
+    """In-memory copy of the graph searched like Graphiti's hybrid search.
+
+    Edges are ranked by cosine similarity of their fact embeddings to the
+    query embedding and by keyword overlap, and the two rankings are merged
+    with reciprocal-rank fusion. The vector ranking is one numpy matrix-vector
+    product; without numpy it falls back to a pure-Python loop.
+    """
+
+    def __init__(self, nodes, edges):
+        self.nodes = {node["uuid"]: node for node in nodes}
+        self.edges = [{k: v for k, v in edge.items() if k != "embedding"} for edge in edges]
+        self._terms = [_terms(f"{e.get('fact')} {e.get('name')}") for e in edges]
+        vectors = [_unpack(e["embedding"]) if e.get("embedding") else None for e in edges]
+        self.dim = max((len(v) for v in vectors if v is not None), default=0)
+        self._has_vector = [v is not None and len(v) == self.dim for v in vectors]
+        try:
+            import numpy as np
+        except ImportError:
+            self._np = None
+            self._matrix = [_unit(v) if ok else [0.0] * self.dim for v, ok in zip(vectors, self._has_vector)]
+        else:
+            self._np = np
+            matrix = np.zeros((len(edges), self.dim), dtype=np.float32)
+            for i, (v, ok) in enumerate(zip(vectors, self._has_vector)):
+                if ok:
+                    matrix[i] = np.frombuffer(v.tobytes(), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def load(cls, path=GRAPH_SNAPSHOT_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        return cls(snapshot["nodes"], snapshot["edges"])
+
+    def _vector_ranking(self, vector, limit):
+        if not self.dim or vector is None or len(vector) < self.dim:
+            return []
+        # Embedders may return longer vectors than the stored dimension (e.g. truncated text-embedding-3)
+        vector = list(vector[:self.dim])
+        if self._np is not None:
+            np = self._np
+            q = np.asarray(vector, dtype=np.float32)
+            q /= np.linalg.norm(q) or 1.0
+            scores = self._matrix @ q
+            scores[~np.asarray(self._has_vector)] = -np.inf
+            limit = min(limit, int(np.count_nonzero(self._has_vector)))
+            if not limit:
+                return []
+            # Stable, so equal scores keep index order like the pure-Python path and _keyword_ranking
+            return np.argsort(-scores, kind="stable")[:limit].tolist()
+        q = _unit(vector)
+        scores = [
+            (sum(a * b for a, b in zip(row, q)), i)
+            for i, (row, ok) in enumerate(zip(self._matrix, self._has_vector)) if ok
+        ]
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [i for _, i in scores[:limit]]
+
+    def _keyword_ranking(self, query, limit):
+        terms = _terms(query)
+        if not terms:
+            return []
+        scored = [(len(terms & edge_terms), i) for i, edge_terms in enumerate(self._terms)]
+        scored = [(score, i) for score, i in scored if score]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [i for _, i in scored[:limit]]
+
+    def search(self, query, num_results=10, query_vector=None):
+        """Top num_results edges for query, as dicts with source/target node names added."""
+        depth = max(num_results * 4, 20)
+        fused = {}
+        for ranking in (self._vector_ranking(query_vector, depth), self._keyword_ranking(query, depth)):
+            for rank, i in enumerate(ranking):
+                fused[i] = fused.get(i, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused, key=lambda i: (-fused[i], i))[:num_results]
+        results = []
+        for i in best:
+            edge = dict(self.edges[i])
+            edge["source_name"] = (self.nodes.get(edge.get("source_node_uuid")) or {}).get("name")
+            edge["target_name"] = (self.nodes.get(edge.get("target_node_uuid")) or {}).get("name")
+            edge["score"] = round(fused[i], 6)
+            results.append(edge)
+        return results
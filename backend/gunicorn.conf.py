@@ -0,0 +1,27 @@
+# gunicorn.conf.py
+# Production entry point (from backend/):  gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Threads cover requests waiting on OpenAI/Foundry/VM; processes cover CPU-bound extraction
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Agent and analysis calls may legitimately take up to two minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = 30
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Each worker imports the app itself, so thread pools, SQLite connections,
+# SDK clients and Firebase are all created after fork. Shared state (documents,
+# ingest jobs, cache invalidations, agent tokens) lives in db/shared_state.db.
+preload_app = False
+accesslog = "-" if os.getenv("GUNICORN_ACCESS_LOG") == "1" else None
+
+
+def post_worker_init(worker):
+    from app import init_worker
+
+    init_worker()
@@ -0,0 +1,206 @@
+# ingest_queue.py
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import profiler
+from shared_state import connect
+from tracing import inc
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+# A processing job whose worker hasn't reported progress for this long, or a job
+# still queued after this long, is presumed lost with its worker and taken over
+INGEST_LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", "300"))
+# How often each worker process looks for lost jobs
+INGEST_RECOVER_INTERVAL_SECONDS = float(os.getenv("INGEST_RECOVER_INTERVAL_SECONDS", "60"))
+# Runs per job before it is marked failed instead of retried
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "2"))
+# Finished jobs are kept around for status polling, up to this many
+MAX_FINISHED_JOBS = 1000
+# Trim finished jobs on every Nth submit rather than each one
+PRUNE_EVERY = 100
+
+_JOB_FIELDS = ("job_id", "document_id", "filename", "status", "stage", "progress", "error",
+               "content_length", "created_at", "updated_at")
+
+
+class IngestQueue:
+    """Background upload processing: callers get a job ID immediately and poll for status.
+
+    Jobs run on the worker process that accepted them; their status lives in the
+    shared store so a poll can land on any worker. A worker claims a job (with
+    a lease it renews on every progress update) before running it, so a job
+    whose worker restarted is found by another worker's recovery pass and
+    either run again or, after INGEST_MAX_ATTEMPTS, marked failed.
+    """
+
+    def __init__(self, file_uploader, workers=INGEST_WORKERS, lease_seconds=INGEST_LEASE_SECONDS,
+                 max_attempts=INGEST_MAX_ATTEMPTS):
+        self.file_uploader = file_uploader
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._pool = None
+        self._pool_pid = None
+        self._recover_pid = None
+        self._submitted = 0
+
+    @property
+    def owner(self):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _executor(self):
+        # Thread pools don't survive fork; each worker process starts its own
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def submit(self, file_data, filename, profile=None):
+        """Persist the upload and queue it for extraction. Returns the job status dict.
+
+        With profile (the uploading request's profiler.Profile), extraction is
+        profiled the same way and saved as its child.
+        """
+        document_id, file_path = self.file_uploader.store_upload(file_data, filename)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "document_id": document_id,
+            "filename": filename,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        conn = connect()
+        conn.execute(
+            "INSERT INTO ingest_jobs (job_id, document_id, filename, status, stage, progress, error, "
+            "created_at, updated_at, file_path) VALUES (:job_id, :document_id, :filename, :status, :stage, "
+            ":progress, :error, :created_at, :updated_at, :file_path)",
+            {**job, "file_path": file_path},
+        )
+        self._submitted += 1
+        if self._submitted % PRUNE_EVERY == 0:
+            self._prune(conn)
+        self._executor().submit(self._run, job_id, document_id, filename, file_path, profile)
+        return job
+
+    def status(self, job_id):
+        row = connect().execute(
+            f"SELECT {', '.join(_JOB_FIELDS)} FROM ingest_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["content_length"] is None:
+            del job["content_length"]
+        return job
+
+    def pending(self):
+        """Number of jobs queued or in progress (across all workers)."""
+        return connect().execute(
+            "SELECT COUNT(*) FROM ingest_jobs WHERE status IN ('queued', 'processing')"
+        ).fetchone()[0]
+
+    def start(self):
+        """Recover lost jobs now and every INGEST_RECOVER_INTERVAL_SECONDS in this process. Idempotent."""
+        if self._recover_pid == os.getpid():
+            return
+        self._recover_pid = os.getpid()
+        threading.Thread(target=self._recover_loop, name="ingest-recover", daemon=True).start()
+
+    def _recover_loop(self):
+        while True:
+            try:
+                self.recover()
+            except Exception as e:
+                print(f"Ingest job recovery failed: {e}")
+            time.sleep(INGEST_RECOVER_INTERVAL_SECONDS)
+
+    def recover(self):
+        """Requeue here, or fail, jobs whose worker is gone. Returns (requeued, failed) job IDs."""
+        now = time.time()
+        conn = connect()
+        stale = conn.execute(
+            "SELECT job_id, document_id, filename, file_path, attempts FROM ingest_jobs "
+            "WHERE (status = 'queued' AND updated_at < ?) OR (status = 'processing' AND lease_expires < ?)",
+            (now - self.lease_seconds, now),
+        ).fetchall()
+        requeued, failed = [], []
+        for job in stale:
+            if job["attempts"] >= self.max_attempts or not job["file_path"]:
+                changed = conn.execute(
+                    "UPDATE ingest_jobs SET status = 'failed', stage = 'failed', error = ?, updated_at = ? "
+                    "WHERE job_id = ? AND status IN ('queued', 'processing') AND attempts = ?",
+                    ("Worker stopped while processing the upload", now, job["job_id"], job["attempts"]),
+                ).rowcount
+                if changed:
+                    failed.append(job["job_id"])
+                    inc("ingest_jobs_recovered_total", outcome="failed")
+                continue
+            # Touching updated_at keeps other workers' recovery passes off it while it waits here
+            changed = conn.execute(
+                "UPDATE ingest_jobs SET status = 'queued', stage = 'queued', progress = 0, owner = NULL, "
+                "updated_at = ? WHERE job_id = ? AND attempts = ? AND "
+                "((status = 'queued' AND updated_at < ?) OR (status = 'processing' AND lease_expires < ?))",
+                (now, job["job_id"], job["attempts"], now - self.lease_seconds, now),
+            ).rowcount
+            if changed:
+                requeued.append(job["job_id"])
+                inc("ingest_jobs_recovered_total", outcome="requeued")
+                self._executor().submit(self._run, job["job_id"], job["document_id"], job["filename"],
+                                        job["file_path"])
+        return requeued, failed
+
+    def _claim(self, job_id):
+        """Take a queued job for this worker; False if another worker already has it."""
+        now = time.time()
+        return connect().execute(
+            "UPDATE ingest_jobs SET status = 'processing', stage = 'starting', progress = 5, owner = ?, "
+            "lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND status = 'queued'",
+            (self.owner, now + self.lease_seconds, now, job_id),
+        ).rowcount == 1
+
+    def _update(self, job_id, **fields):
+        """Update a job this worker holds, renewing its lease."""
+        now = time.time()
+        fields["updated_at"] = now
+        fields["lease_expires"] = now + self.lease_seconds
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        connect().execute(
+            f"UPDATE ingest_jobs SET {assignments} WHERE job_id = ? AND owner = ?",
+            (*fields.values(), job_id, self.owner),
+        )
+
+    def _run(self, job_id, document_id, filename, file_path, profile=None):
+        def progress(stage, percent):
+            self._update(job_id, stage=stage, progress=percent)
+
+        if not self._claim(job_id):
+            return
+        try:
+            if profile is not None:
+                with profiler.profile(f"ingest {filename}", profile.modes, profile.id, job_id=job_id):
+                    info = self.file_uploader.process_stored_file(document_id, filename, file_path, progress)
+            else:
+                info = self.file_uploader.process_stored_file(document_id, filename, file_path, progress)
+            self._update(job_id, status="done", stage="done", progress=100,
+                         content_length=info["content_length"])
+        except Exception as e:
+            print(f"Ingest job {job_id} failed: {e}")
+            self._update(job_id, status="failed", stage="failed", error=str(e))
+
+    def _prune(self, conn):
+        conn.execute(
+            "DELETE FROM ingest_jobs WHERE job_id IN ("
+            "  SELECT job_id FROM ingest_jobs WHERE status IN ('done', 'failed')"
+            "  ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (MAX_FINISHED_JOBS,),
+        )
@@ -0,0 +1,204 @@
+# job_matcher.py
+import math
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Canonical skill name -> regex that recognizes it (and common synonyms) in free text
+SKILL_PATTERNS = {
+    "python": r"\bpython\b",
+    "java": r"\bjava\b(?!\s*script)",
+    "javascript": r"\bjavascript\b|\bjs\b",
+    "typescript": r"\btypescript\b|\bts\b",
+    "c#": r"\bc#|\bcsharp\b",
+    "c++": r"\bc\+\+",
+    # Capitalized "Go" only, so the verb doesn't count
+    "go": r"\bgolang\b|(?-i:\bGo\b)(?!(?:\s+|-)(?:to|back|beyond|above|ahead|live)\b)",
+    "scala": r"\bscala\b",
+    "sql": r"\bsql\b|\bt-sql\b|\bpl/sql\b",
+    "react": r"\breact(?:\.js|js)?\b",
+    "next.js": r"\bnext\.?js\b",
+    "angular": r"\bangular\b",
+    "node.js": r"\bnode(?:\.js|js)?\b",
+    ".net": r"\.net\b|\bdotnet\b|\basp\.net\b",
+    "flask": r"\bflask\b",
+    "fastapi": r"\bfastapi\b",
+    "django": r"\bdjango\b",
+    "aws": r"\baws\b|\bamazon web services\b|\bamazon s3\b|\bs3 buckets?\b|\becs\b|\bfargate\b",
+    "azure": r"\bazure\b",
+    "gcp": r"\bgcp\b|\bgoogle cloud\b",
+    "docker": r"\bdocker(?:file|files|ized)?\b",
+    "kubernetes": r"\bkubernetes\b|\bk8s\b|\baks\b|\beks\b",
+    "terraform": r"\bterraform\b",
+    "ci/cd": r"\bci/cd\b|\bcontinuous (?:integration|delivery|deployment)\b|\b(?:ci|cd|build|release|deployment) pipelines?\b"
+             r"|\bgithub actions\b|\bazure devops\b|\bjenkins\b",
+    "snowflake": r"\bsnowflake\b",
+    "airflow": r"\bairflow\b",
+    "spark": r"\bspark\b|\bpyspark\b|\bdatabricks\b",
+    "postgresql": r"\bpostgres(?:ql)?\b",
+    "mongodb": r"\bmongo(?:db)?\b",
+    "cosmos db": r"\bcosmos(?: db)?\b",
+    "machine learning": r"\bmachine learning\b|\bml\b",
+    "llm": r"\bllms?\b|\blarge language models?\b|\bgenai\b|\bgenerative ai\b",
+    "prompt engineering": r"\bprompt engineering\b",
+    "rag": r"\brag\b|\bretrieval[- ]augmented\b",
+    "openai": r"\bopenai\b|\bgpt-?\d",
+    "rest api": r"\brestful\b|\brest(?:ful)?\s*(?:apis?|services?|endpoints?)\b",
+    "graphql": r"\bgraphql\b",
+    "git": r"\bgit\b|\bgithub\b|\bgitlab\b",
+}
+
+_COMPILED_SKILLS = {name: re.compile(p, re.IGNORECASE) for name, p in SKILL_PATTERNS.items()}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or our that the their this to
+we will with you your they them who what which while within across into over about per can must
+should would experience work working team teams role strong ability including using use years
+""".split())
+
+# Weight of the skill-overlap score vs. the text-similarity score in the final ranking
+SKILL_WEIGHT = 0.6
+
+# Batches with at least this many jobs are scored in worker processes; smaller ones on the request thread
+MATCH_PARALLEL_MIN_JOBS = int(os.getenv("MATCH_PARALLEL_MIN_JOBS", "200"))
+# Scoring processes per server worker; 1 keeps all scoring on the request thread
+MATCH_PROCESSES = int(os.getenv("MATCH_PROCESSES", str(min(os.cpu_count() or 1, 4))))
+# Chunks per scoring process, so one slow chunk doesn't leave the others idle
+_CHUNKS_PER_PROCESS = 4
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# In a scoring process: (batch id, profiles) of the batch it last unpickled
+_batch_profiles = (None, None)
+
+
+def extract_skills(text):
+    """Return the set of canonical skills mentioned in text."""
+    return {name for name, pattern in _COMPILED_SKILLS.items() if pattern.search(text or "")}
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def vectorize(tokens):
+    """Build an L2-normalized term-frequency vector from a token list."""
+    counts = Counter(tokens)
+    norm = math.sqrt(sum(c * c for c in counts.values())) or 1.0
+    return {term: c / norm for term, c in counts.items()}
+
+
+def cosine(vec_a, vec_b):
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(vec_a) > len(vec_b):
+        vec_a, vec_b = vec_b, vec_a
+    return sum(w * vec_b.get(term, 0.0) for term, w in vec_a.items())
+
+
+def build_resume_profile(resume_id, text):
+    """Parse and vectorize a resume once so it can be scored against many jobs."""
+    timings = {}
+    start = time.perf_counter()
+    tokens = tokenize(text)
+    skills = extract_skills(text)
+    timings["parse_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    vector = vectorize(tokens)
+    timings["vectorize_ms"] = (time.perf_counter() - start) * 1000
+
+    return {"id": resume_id, "skills": skills, "vector": vector}, timings
+
+
+def profile_from_features(resume_id, features):
+    """Build a resume profile from features precomputed at upload time."""
+    return {"id": resume_id, "skills": set(features["skills"]), "vector": features["vector"]}
+
+
+def build_job_profile(job):
+    """Extract a job description's skills and vector once, to score against any number of resumes."""
+    description = job.get("description", "")
+    return {"job": job, "skills": extract_skills(description), "vector": vectorize(tokenize(description))}
+
+
+def score_job(profile, job_profile):
+    """Score one job (from build_job_profile) against a precomputed resume profile."""
+    job, job_skills = job_profile["job"], job_profile["skills"]
+
+    matched = sorted(job_skills & profile["skills"])
+    missing = sorted(job_skills - profile["skills"])
+    skill_match = len(matched) / len(job_skills) if job_skills else 0.0
+    similarity = cosine(profile["vector"], job_profile["vector"])
+    score = SKILL_WEIGHT * skill_match + (1 - SKILL_WEIGHT) * similarity
+
+    return {
+        "documentId": profile["id"],
+        "jobIndex": job.get("index"),
+        "title": job.get("title", ""),
+        "company": job.get("company", ""),
+        "score": round(score * 100, 2),
+        "skillMatch": round(skill_match * 100, 2),
+        "similarity": round(similarity * 100, 2),
+        "matchedSkills": matched,
+        "missingSkills": missing,
+    }
+
+
+def _score_serial(profiles, jobs):
+    for job in jobs:
+        start = time.perf_counter()
+        job_profile = build_job_profile(job)
+        for profile in profiles:
+            result = score_job(profile, job_profile)
+            yield result, (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+
+
+def _score_chunk(batch_id, profiles_blob, jobs):
+    """Score a chunk of jobs in a scoring process; a batch's profiles are unpickled once per process."""
+    global _batch_profiles
+    if _batch_profiles[0] != batch_id:
+        _batch_profiles = (batch_id, pickle.loads(profiles_blob))
+    return list(_score_serial(_batch_profiles[1], jobs))
+
+
+def _executor():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Process pools don't survive fork; each server worker starts its own
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn rather than fork: forking a threaded server copies locks other threads may hold
+            _pool = ProcessPoolExecutor(MATCH_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def match_jobs(profiles, jobs):
+    """Score every (resume, job) pair, yielding (result, score_ms) in job order.
+
+    Each job is parsed once and then scored against every resume; its parse
+    time is counted in its first result's score_ms. Scoring is CPU-bound, so
+    batches of MATCH_PARALLEL_MIN_JOBS or more are split into chunks scored
+    by MATCH_PROCESSES worker processes (threads would only contend for the
+    GIL), with the profiles pickled once per batch. Smaller batches, and
+    hosts with one core, score on the request's own thread.
+    """
+    if MATCH_PROCESSES <= 1 or len(jobs) < MATCH_PARALLEL_MIN_JOBS:
+        yield from _score_serial(profiles, jobs)
+        return
+    blob = pickle.dumps(profiles, protocol=pickle.HIGHEST_PROTOCOL)
+    size = math.ceil(len(jobs) / (MATCH_PROCESSES * _CHUNKS_PER_PROCESS))
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    for results in _executor().map(_score_chunk, repeat(uuid.uuid4().hex), repeat(blob), chunks):
+        yield from results
@@ -0,0 +1,204 @@
+# model_router.py
+import os
+import threading
+import time
+from collections import deque
+
+from prompt_budget import context_window
+from tracing import inc, register_gauge
+
+DEFAULT_MODEL = "gpt-5"
+
+# quality: rough 1-5 answer-quality tier; price: USD per 1M (input, output) tokens;
+# latency: prior seconds per call, replaced by observations as calls complete
+MODEL_PROFILES = {
+    "gpt-5": {"quality": 5, "price": (1.25, 10.0), "latency": 12.0},
+    "gpt-4.1": {"quality": 4, "price": (2.0, 8.0), "latency": 5.0},
+    "gpt-4o": {"quality": 4, "price": (2.5, 10.0), "latency": 4.0},
+    "gpt-4.1-mini": {"quality": 3, "price": (0.4, 1.6), "latency": 2.5},
+    "gpt-4o-mini": {"quality": 3, "price": (0.15, 0.6), "latency": 2.0},
+    "gpt-3.5-turbo": {"quality": 2, "price": (0.5, 1.5), "latency": 1.5},
+}
+MODEL_ALIASES = {
+    "gpt5": "gpt-5",
+    "gpt-5-mini": "gpt-4o-mini",
+    "gpt-4.1-turbo": "gpt-4.1",
+}
+
+# Calls the user never sees the output of directly
+INTERNAL_ROUTES = {"keywords", "summary"}
+# General-mode prompts without documents under this many tokens count as trivial
+TRIVIAL_PROMPT_TOKENS = int(os.getenv("MODEL_ROUTER_TRIVIAL_TOKENS", "200"))
+# Models failing more often than this are skipped while an alternative exists
+MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.5"))
+MODEL_ROUTER_ENABLED = os.getenv("MODEL_ROUTER_ENABLED", "1") != "0"
+# Per task class: "policy" or "policy:min_quality". Policies are "requested"
+# (the caller's model unless it can't serve the request), "fastest" and "cheapest"
+MODEL_ROUTER_POLICIES = os.getenv("MODEL_ROUTER_POLICIES", "internal=fastest:2,trivial=fastest:3,default=requested")
+
+_EWMA_ALPHA = 0.2
+# A skipped model gets no new samples, so its error rate decays with time to let it back in
+ERROR_HALF_LIFE_SECONDS = 60.0
+
+
+def normalize_model(model):
+    """Map aliases and unknown names to a supported model. Returns (model, known)."""
+    if not model:
+        return DEFAULT_MODEL, True
+    name = model.strip()
+    if name in MODEL_PROFILES:
+        return name, True
+    alias = MODEL_ALIASES.get(name.lower())
+    if alias:
+        return alias, True
+    return DEFAULT_MODEL, False
+
+
+def _parse_policies(spec):
+    policies = {}
+    for item in spec.split(","):
+        task, _, rule = item.partition("=")
+        policy, _, floor = rule.partition(":")
+        if task.strip() and policy.strip():
+            policies[task.strip()] = (policy.strip(), int(floor) if floor.strip() else None)
+    return policies
+
+
+class _ModelStats:
+    __slots__ = ("latency", "error_rate", "error_updated", "calls")
+
+    def __init__(self, prior_latency):
+        self.latency = prior_latency
+        self.error_rate = 0.0
+        self.error_updated = time.monotonic()
+        self.calls = 0
+
+    def current_error_rate(self, now):
+        return self.error_rate * 0.5 ** ((now - self.error_updated) / ERROR_HALF_LIFE_SECONDS)
+
+
+class ModelRouter:
+    """Picks the model for each completion from the task, prompt size and observed model health.
+
+    Requests are classified as "internal" (keyword extraction, summaries),
+    "trivial" (short general prompts without documents) or "default", and each
+    class has a policy with an optional quality floor. Latency and error rates
+    are exponentially weighted per model, per process.
+    """
+
+    def __init__(self, policies=None, profiles=MODEL_PROFILES, enabled=MODEL_ROUTER_ENABLED, history=200):
+        self.policies = policies if policies is not None else _parse_policies(MODEL_ROUTER_POLICIES)
+        self.profiles = profiles
+        self.enabled = enabled
+        self._stats = {name: _ModelStats(p["latency"]) for name, p in profiles.items()}
+        self._decisions = deque(maxlen=history)
+        self._lock = threading.Lock()
+        for name in profiles:
+            register_gauge("model_latency_seconds", lambda n=name: self._stats[n].latency, model=name)
+            register_gauge("model_error_rate", lambda n=name: self._stats[n].current_error_rate(time.monotonic()),
+                           model=name)
+
+    def classify(self, route, mode, prompt_tokens, has_documents):
+        if route in INTERNAL_ROUTES:
+            return "internal"
+        if mode != "code" and not has_documents and prompt_tokens <= TRIVIAL_PROMPT_TOKENS:
+            return "trivial"
+        return "default"
+
+    def estimated_cost(self, model, prompt_tokens, completion_tokens):
+        price_in, price_out = self.profiles[model]["price"]
+        return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+    def choose(self, requested, prompt_tokens, completion_tokens, mode="general", route="chat",
+               has_documents=False):
+        """Return (model, decision) for one completion; decision is also kept for /model-routing."""
+        model, known = normalize_model(requested)
+        task = self.classify(route, mode, prompt_tokens, has_documents)
+        policy, floor = self.policies.get(task) or self.policies.get("default") or ("requested", None)
+        requested_quality = self.profiles[model]["quality"]
+        # A policy floor never exceeds the quality of the model the caller asked for
+        floor = requested_quality if floor is None else min(floor, requested_quality)
+
+        with self._lock:
+            now = time.monotonic()
+            stats = {name: (s.latency, s.current_error_rate(now)) for name, s in self._stats.items()}
+
+        needed = prompt_tokens + completion_tokens
+        candidates = [
+            name for name, profile in self.profiles.items()
+            if profile["quality"] >= floor and context_window(name) >= needed
+        ]
+        healthy = [name for name in candidates if stats[name][1] <= MAX_ERROR_RATE]
+        candidates = healthy or candidates
+
+        reason = policy
+        if not self.enabled:
+            choice, reason = model, "router disabled"
+        elif policy == "requested" and model in candidates:
+            choice = model
+        elif not candidates:
+            choice, reason = model, "no model fits; keeping requested"
+        else:
+            def rank(name):
+                cost = self.estimated_cost(name, prompt_tokens, completion_tokens)
+                return (cost, stats[name][0]) if policy == "cheapest" else (stats[name][0], cost)
+            choice = min(candidates, key=rank)
+            if policy == "requested":
+                reason = "requested model unhealthy or too small; fastest alternative"
+        if not known:
+            reason += f"; unknown model {requested!r}"
+
+        decision = {
+            "time": time.time(),
+            "route": route,
+            "task": task,
+            "policy": policy,
+            "requested": requested,
+            "model": choice,
+            "prompt_tokens": prompt_tokens,
+            "reason": reason,
+            "expected_latency": round(stats[choice][0], 3),
+            "estimated_cost": round(self.estimated_cost(choice, prompt_tokens, completion_tokens), 6),
+        }
+        with self._lock:
+            self._decisions.append(decision)
+        inc("model_route_total", route=route, task=task, model=choice)
+        return choice, decision
+
+    def record(self, model, seconds=None, ok=True):
+        """Feed back one completed call: its latency (successes only) and outcome.
+
+        Requests the API rejects as invalid (4xx other than 429) aren't the
+        model's failure, so callers leave them out.
+        """
+        stats = self._stats.get(model)
+        if stats is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            stats.calls += 1
+            error_rate = stats.current_error_rate(now)
+            stats.error_rate = error_rate + _EWMA_ALPHA * ((0.0 if ok else 1.0) - error_rate)
+            stats.error_updated = now
+            if ok and seconds is not None:
+                stats.latency += _EWMA_ALPHA * (seconds - stats.latency)
+
+    def snapshot(self, limit=50):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "policies": {task: {"policy": p, "min_quality": f} for task, (p, f) in self.policies.items()},
+                "models": {
+                    name: {
+                        "quality": self.profiles[name]["quality"],
+                        "latency_seconds": round(s.latency, 3),
+                        "error_rate": round(s.current_error_rate(time.monotonic()), 3),
+                        "calls": s.calls,
+                    }
+                    for name, s in self._stats.items()
+                },
+                "decisions": list(self._decisions)[-limit:][::-1],
+            }
+
+
+router = ModelRouter()
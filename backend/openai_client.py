@@ -1,46 +1,81 @@
 # openai_client.py
-import openai
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from admission import current_caller, llm_queue
+from config import load_env
+from db_manager import log_token_usage
+from model_router import normalize_model, router as model_router
+from prompt_budget import fit_context, fit_text, plan_completion
+from prompt_builder import DOCUMENT_CONTEXT_HEADER, build_messages
+from resilience import CircuitOpenError, get_upstream, is_client_error
+from singleflight import SingleFlight, request_key
+from tracing import inc, span
 
-dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
-load_dotenv()
+load_env()
+
+# Upper bound on completion calls (the SDK's own default); the effective timeout adapts to
+# observed latency per model and route below this
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "600"))
+# A completion's timeout never drops below the time to generate its max_tokens at this rate
+COMPLETION_MIN_TOKENS_PER_SECOND = float(os.getenv("COMPLETION_MIN_TOKENS_PER_SECOND", "20"))
+# Timeouts of completions allowed more tokens than this don't count against the circuit breaker
+LONG_COMPLETION_TOKENS = int(os.getenv("LONG_COMPLETION_TOKENS", "1000"))
+# Input limit of the text-embedding-3 models
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+
+_completion_flight = SingleFlight("openai.completion")
+_moderation_flight = SingleFlight("openai.moderation")
+
+_sdk_clients = {}
+_sdk_lock = threading.Lock()
+
+
+def completion_timeout_policy(model, route, max_tokens):
+    """(op, min_timeout, count_timeouts) for a completion through the "openai" upstream.
+
+    Keywords, summaries and long document answers take very different times,
+    so each model and route learns its own timeout, floored by the time the
+    requested length takes to generate.
+    """
+    min_timeout = max(30.0, max_tokens / COMPLETION_MIN_TOKENS_PER_SECOND)
+    return f"completion.{model}.{route}", min_timeout, max_tokens <= LONG_COMPLETION_TOKENS
+
+
+def _sdk_client(api_key):
+    """One SDK client per API key and process, so requests reuse its pooled connections."""
+    with _sdk_lock:
+        client = _sdk_clients.get(api_key)
+        if client is None:
+            import openai
+            client = _sdk_clients[api_key] = openai.Client(api_key=api_key)
+    return client
 
 
 class OpenAIClient:
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.client = openai.Client(api_key=self.api_key)
+        self._client = None
+
+    @property
+    def client(self):
+        # The SDK is slow to import, so load it on the first request rather than at startup
+        if self._client is None:
+            self._client = _sdk_client(self.api_key)
+        return self._client
+
+    def warm_up(self):
+        """Import the SDK and open a pooled connection to the API ahead of the first request."""
+        self.client.models.list(timeout=10)
 
     def _normalize_model(self, model: str) -> str:
         """Map aliases/unknown models to supported defaults."""
-        default_model = "gpt-5"
-        if not model:
-            return default_model
-        m = model.strip()
-        # Known supported chat-completions models
-        supported = {
-            "gpt-4o",
-            "gpt-4o-mini",
-            "gpt-5",
-            "gpt-4.1-mini",
-            "gpt-3.5-turbo",
-            "gpt-4.1",
-        }
-        if m in supported:
-            return m
-        # Common aliases or placeholders
-        aliases = {
-            "gpt5": "gpt-5",
-            "gpt-5": "gpt-5",
-            "gpt-5-mini": "gpt-4o-mini",
-            "gpt-4.1-turbo": "gpt-4.1",
-        }
-        return aliases.get(m.lower(), default_model)
+        return normalize_model(model)[0]
 
-    def chat_completion(self, prompt, model="gpt-4o", mode="general"):
+    def _mode_defaults(self, prompt, mode, has_context=False):
+        """(system_message, max_tokens, temperature) for a prompt in the given mode."""
         # Check if this is a document-based query
-        is_document_query = "Context from uploaded documents:" in prompt
+        is_document_query = has_context or DOCUMENT_CONTEXT_HEADER in prompt
         
         if is_document_query:
             if mode == "code":
@@ -92,9 +127,26 @@ Guidelines:
 - Format outputs for readability (markdown ok)"""
                 max_tokens = 700
                 temperature = 0.3
-        
-        # Normalize/alias unknown model names (e.g., "gpt-5")
-        model = self._normalize_model(model)
+        return system_message, max_tokens, temperature
+
+    def chat_completion(self, prompt, model="gpt-4o", mode="general", route="chat", history=None,
+                        system_message=None, max_tokens=None, temperature=None, context=None):
+        """Complete prompt; system_message, max_tokens and temperature override the mode's defaults.
+
+        context is stable reference text (documents) sent ahead of the history
+        and prompt, so repeated questions over it share a cacheable prefix.
+        """
+        has_documents = bool(context) or DOCUMENT_CONTEXT_HEADER in prompt
+        default_system, default_max_tokens, default_temperature = self._mode_defaults(prompt, mode, bool(context))
+        system_message = system_message or default_system
+        max_tokens = max_tokens or default_max_tokens
+        temperature = default_temperature if temperature is None else temperature
+
+        # Route to the model the policy picks for this task: the requested one, or a faster/cheaper one
+        rough_prompt_tokens = (
+            len(system_message) + len(prompt) + len(context or "") + sum(len(m["content"]) for m in history or [])
+        ) // 4
+        model, _ = model_router.choose(model, rough_prompt_tokens, max_tokens, mode, route, has_documents=has_documents)
 
         # Some newer models (e.g., gpt-4o family) require 'max_completion_tokens' instead of 'max_tokens'.
         def uses_max_completion_tokens(m: str) -> bool:
@@ -107,12 +159,17 @@ Guidelines:
             )
             return any(m.startswith(p) for p in prefixes)
 
+        # Trim oversized prompts locally; the mode's max_tokens shrinks if the prompt leaves less room
+        if context:
+            context = fit_context(context, system_message, prompt, model, history)
+        context_messages = [{"role": "user", "content": context}] if context else []
+        prompt, estimated_prompt_tokens, max_tokens = plan_completion(
+            system_message, prompt, model, max_tokens, context_messages + list(history or [])
+        )
+
         create_kwargs = {
             "model": model,
-            "messages": [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt},
-            ],
+            "messages": build_messages(system_message, prompt, history, context),
             "temperature": temperature,
         }
 
@@ -121,13 +178,70 @@ Guidelines:
         else:
             create_kwargs["max_tokens"] = max_tokens
 
-        response = self.client.chat.completions.create(**create_kwargs)
+        op, min_timeout, count_timeouts = completion_timeout_policy(model, route, max_tokens)
+
+        def complete():
+            # Each upstream call waits its turn, so a map-reduce question takes a slot per chunk
+            with llm_queue.slot(current_caller(), estimated_prompt_tokens, route):
+                start = time.perf_counter()
+                try:
+                    response = get_upstream("openai").call(
+                        op,
+                        lambda timeout: self.client.chat.completions.create(**create_kwargs, timeout=timeout),
+                        max_timeout=OPENAI_TIMEOUT_SECONDS,
+                        min_timeout=min_timeout,
+                        count_timeouts=count_timeouts,
+                    )
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    # A rejected request (bad parameters, too long) is the caller's fault, not the model's
+                    if not is_client_error(e):
+                        model_router.record(model, ok=False)
+                    raise
+            model_router.record(model, time.perf_counter() - start)
+            return response
+
+        with span("openai.completion", model=model, route=route):
+            response = _completion_flight.do(request_key(create_kwargs), complete)
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        if prompt_tokens:
+            inc("llm_prompt_tokens_total", prompt_tokens, model=model, route=route)
+            inc("llm_cached_prompt_tokens_total", cached_tokens or 0, model=model, route=route)
+        try:
+            log_token_usage(
+                route,
+                model,
+                estimated_prompt_tokens,
+                prompt_tokens,
+                getattr(usage, "completion_tokens", None),
+                cached_tokens,
+            )
+        except Exception as e:
+            print(f"Token usage logging failed: {e}")
         return response.choices[0].message.content.strip()
 
     def moderate_content(self, prompt):
-        moderation = self.client.moderations.create(input=prompt)
+        def moderate():
+            with llm_queue.slot(current_caller(), len(prompt) // 4, "moderation"):
+                return get_upstream("openai").call(
+                    "moderation",
+                    lambda timeout: self.client.moderations.create(input=prompt, timeout=timeout),
+                    max_timeout=30,
+                    min_timeout=5,
+                )
+
+        with span("openai.moderation"):
+            moderation = _moderation_flight.do(request_key(prompt), moderate)
         result = moderation.results[0]
         # Convert categories to dict
         categories = result.categories.model_dump()
         flagged_categories = [cat for cat, flagged in categories.items() if flagged]
         return result.flagged, flagged_categories
+
+    def embed(self, text, model="text-embedding-3-small"):
+        with span("openai.embedding", model=model):
+            response = self.client.embeddings.create(model=model, input=fit_text(text, EMBEDDING_MAX_INPUT_TOKENS, model))
+        return response.data[0].embedding
@@ -0,0 +1,129 @@
+# prompt_budget.py
+from functools import lru_cache
+
+# Total context window (prompt + completion) per model, in tokens
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4.1-mini": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 128000
+
+# Per-message framing overhead the chat format adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+# Headroom for counting differences between our tokenizer and the server's
+SAFETY_MARGIN_TOKENS = 256
+# Never plan a completion smaller than this; trim the prompt instead
+MIN_COMPLETION_TOKENS = 256
+
+# Room kept for history and the question when trimming a shared context block; a fixed
+# reserve keeps the trimmed context identical across questions, so it stays cacheable
+CONTEXT_RESERVE_TOKENS = 4000
+
+TRUNCATION_MARKER = "\n\n[... content trimmed to fit the model context window ...]\n\n"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """Tokenizer for a model, loaded once per model.
+
+    None if tiktoken is unavailable or can't load the vocabulary (it downloads
+    BPE files on first use, which fails offline); counts then fall back to an
+    estimate. A failed load is cached too, so it isn't retried per call.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Newer models tiktoken doesn't know about yet use the o200k vocabulary
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Tokenizer for {model} unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Count tokens in text for the given model."""
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Rough fallback: ~4 characters per token for English text
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model="gpt-4o"):
+    """Count tokens for a list of chat messages, including framing overhead."""
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def context_window(model):
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def fit_text(text, max_tokens, model="gpt-4o"):
+    """Trim text to at most max_tokens, keeping its head and tail (where questions usually sit)."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        max_chars = max(max_tokens * 4 - len(TRUNCATION_MARKER), 0)
+        head = max_chars * 3 // 4
+        tail = max_chars - head
+        return text[:head] + TRUNCATION_MARKER + (text[-tail:] if tail else "")
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    marker_tokens = len(encoding.encode(TRUNCATION_MARKER))
+    keep = max(max_tokens - marker_tokens, 0)
+    head = keep * 3 // 4
+    tail = keep - head
+    return (
+        encoding.decode(tokens[:head])
+        + TRUNCATION_MARKER
+        + (encoding.decode(tokens[-tail:]) if tail else "")
+    )
+
+
+def fit_context(context, system_message, prompt, model, history=None):
+    """Trim a context block placed ahead of history and prompt so the request fits the window."""
+    window = context_window(model) - SAFETY_MARGIN_TOKENS
+    system_tokens = count_tokens(system_message, model) + MESSAGE_OVERHEAD_TOKENS
+    variable_tokens = count_tokens(prompt, model) + count_message_tokens(history or [], model) + MESSAGE_OVERHEAD_TOKENS
+    budget = window - system_tokens - MIN_COMPLETION_TOKENS - max(variable_tokens, CONTEXT_RESERVE_TOKENS)
+    return fit_text(context, budget - MESSAGE_OVERHEAD_TOKENS, model)
+
+
+def plan_completion(system_message, prompt, model, desired_completion_tokens, history=None):
+    """Fit the prompt into the model window and cap the completion to what is left.
+
+    Returns (prompt, prompt_tokens, completion_tokens). The completion budget
+    is the caller's desired_completion_tokens, lowered only when the prompt
+    leaves less room than that; prompt is trimmed when it would leave less
+    than MIN_COMPLETION_TOKENS.
+    """
+    window = context_window(model) - SAFETY_MARGIN_TOKENS
+    system_tokens = count_tokens(system_message, model) + MESSAGE_OVERHEAD_TOKENS
+    system_tokens += count_message_tokens(history or [], model)
+    prompt_tokens = count_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS
+
+    available = window - system_tokens - prompt_tokens
+    if available < MIN_COMPLETION_TOKENS:
+        prompt_budget = window - system_tokens - MIN_COMPLETION_TOKENS - MESSAGE_OVERHEAD_TOKENS
+        prompt = fit_text(prompt, prompt_budget, model)
+        prompt_tokens = count_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS
+        available = window - system_tokens - prompt_tokens
+
+    completion_tokens = max(min(desired_completion_tokens, available), 1)
+    return prompt, system_tokens + prompt_tokens, completion_tokens
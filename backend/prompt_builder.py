@@ -0,0 +1,40 @@
+# prompt_builder.py
+#
+# Upstream prompt caching reuses work for the longest prefix two requests share,
+# so prompts are laid out from most to least stable: system message, document
+# context, conversation history, and only then the new question.
+
+DOCUMENT_CONTEXT_HEADER = "Context from uploaded documents:"
+
+DOCUMENT_ANSWER_INSTRUCTIONS = """Answer the user's question based on the uploaded documents above. Please provide a comprehensive answer that:
+- Directly addresses the user's question using information from the documents
+- Cites specific parts of the documents when relevant
+- Acknowledges if the documents don't contain information needed to answer the question
+- Provides helpful insights and analysis based on the document content"""
+
+
+def document_context(documents):
+    """One context block for (filename, content) pairs, in a canonical order.
+
+    Documents are sorted, so the same selection renders byte-for-byte the same
+    whatever order the client listed them in.
+    """
+    parts = [DOCUMENT_CONTEXT_HEADER]
+    for filename, content in sorted(documents):
+        parts.append(f"\n\n[Document: {filename}]\n{content}")
+    return "".join(parts)
+
+
+def document_question(question):
+    """The per-request part of a document question: fixed instructions, then the question last."""
+    return f"{DOCUMENT_ANSWER_INSTRUCTIONS}\n\nUser question: {question}"
+
+
+def build_messages(system_message, prompt, history=None, context=None):
+    """Chat messages in cache-friendly order: system, context, history, then the new prompt."""
+    messages = [{"role": "system", "content": system_message}]
+    if context:
+        messages.append({"role": "user", "content": context})
+    messages.extend(history or [])
+    messages.append({"role": "user", "content": prompt})
+    return messages
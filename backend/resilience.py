@@ -0,0 +1,246 @@
+# resilience.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tracing import inc, register_gauge
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+RESET_TIMEOUT_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "1") == "1"
+
+# Shared pool for hedged attempts, so a slow upstream can't spawn unbounded threads
+_hedge_pool = ThreadPoolExecutor(max_workers=int(os.getenv("HEDGE_POOL_SIZE", "16")), thread_name_prefix="hedge")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, upstream, retry_in):
+        super().__init__(f"{upstream} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through once reset_timeout passes."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go through right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == self.OPEN and elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        inc("circuit_rejected_total", upstream=self.name)
+        raise CircuitOpenError(self.name, max(self.reset_timeout - elapsed, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """End a half-open probe without a verdict (e.g. a timeout that isn't counted)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    inc("circuit_opened_total", upstream=self.name)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class AdaptiveTimeout:
+    """Timeout derived from a high percentile of recently observed latencies."""
+
+    def __init__(self, initial, min_timeout=1.0, max_timeout=120.0, percentile=99, multiplier=2.0,
+                 window=200, min_samples=20):
+        self.initial = initial
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self._samples.append(seconds)
+
+    def latency_percentile(self, pct):
+        samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(len(samples) * pct / 100), len(samples) - 1)]
+
+    def current(self):
+        observed = self.latency_percentile(self.percentile)
+        if observed is None:
+            return min(self.initial, self.max_timeout)
+        return min(max(observed * self.multiplier, self.min_timeout), self.max_timeout)
+
+
+def is_timeout(error):
+    """Whether error is a client-side timeout (SDK, requests or concurrent.futures)."""
+    return isinstance(error, TimeoutError) or any("Timeout" in cls.__name__ for cls in type(error).__mro__)
+
+
+def is_client_error(error):
+    """Whether error is an SDK error for a bad request (4xx other than 429), which says nothing about upstream health."""
+    status = getattr(error, "status_code", None)
+    return status is not None and status < 500 and status != 429
+
+
+def _default_is_failure(result):
+    """Treat 5xx and 429 HTTP responses as upstream failures; anything else as healthy."""
+    status = getattr(result, "status_code", 200)
+    return status >= 500 or status == 429
+
+
+class Upstream:
+    """Circuit breaker plus per-operation adaptive timeouts (and optional hedging) for one upstream."""
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS,
+                 is_failure=_default_is_failure):
+        self.name = name
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.is_failure = is_failure
+        self._timeouts = {}
+        self._lock = threading.Lock()
+        register_gauge("circuit_open", lambda: int(self.breaker.state != CircuitBreaker.CLOSED), upstream=name)
+
+    def timeout_for(self, op, max_timeout, min_timeout=1.0):
+        with self._lock:
+            timeout = self._timeouts.get(op)
+            if timeout is None:
+                timeout = self._timeouts[op] = AdaptiveTimeout(
+                    initial=max_timeout, min_timeout=min_timeout, max_timeout=max_timeout
+                )
+            return timeout
+
+    def call(self, op, fn, max_timeout=30.0, min_timeout=1.0, hedge=False, count_timeouts=True):
+        """Run fn(timeout) through the breaker. With hedge=True a duplicate attempt is started
+        when the first is slower than the observed p95; the first successful result wins.
+        Only hedge idempotent calls.
+
+        count_timeouts=False keeps client-side timeouts out of the breaker, for calls whose
+        duration depends on the request (long generations) rather than upstream health.
+        A timeout still counts as a latency sample, so the learned timeout grows past it.
+        """
+        self.breaker.allow()
+        adaptive = self.timeout_for(op, max_timeout, min_timeout)
+        # min_timeout may vary between calls of one op (e.g. with the requested completion length)
+        timeout = min(max(adaptive.current(), min_timeout), max_timeout)
+        hedge_after = adaptive.latency_percentile(95) if hedge and HEDGING_ENABLED else None
+
+        start = time.perf_counter()
+        try:
+            if hedge_after is not None:
+                result = self._hedged(fn, timeout, hedge_after, op, count_timeouts)
+            else:
+                result = fn(timeout)
+        except Exception as e:
+            if is_timeout(e):
+                adaptive.observe(time.perf_counter() - start)
+            self.record_error(op, e, count_timeouts)
+            raise
+
+        if self.is_failure(result):
+            self.record_failure(op)
+        else:
+            self.breaker.record_success()
+            adaptive.observe(time.perf_counter() - start)
+        return result
+
+    def record_failure(self, op):
+        """Count a failure seen outside call(), e.g. a stream that broke after its headers arrived."""
+        self.breaker.record_failure()
+        inc("upstream_failures_total", upstream=self.name, op=op)
+
+    def record_error(self, op, error, count_timeouts=True):
+        """Feed an exception from op into the breaker."""
+        if is_client_error(error):
+            self.breaker.record_success()
+        elif not count_timeouts and is_timeout(error):
+            self.breaker.release_probe()
+            inc("upstream_timeouts_total", upstream=self.name, op=op)
+        else:
+            self.record_failure(op)
+
+    def _hedged(self, fn, timeout, hedge_after, op, count_timeouts=True):
+        """Run fn with a hedge; failures of attempts that don't decide the outcome are recorded here,
+        the deciding one (returned or raised) by call()."""
+        first = _hedge_pool.submit(fn, timeout)
+        done, _ = wait([first], timeout=hedge_after)
+        if done:
+            return first.result()
+
+        inc("upstream_hedges_total", upstream=self.name, op=op)
+        second = _hedge_pool.submit(fn, timeout)
+        pending = {first, second}
+        error = None
+
+        def record_abandoned(future):
+            # The losing attempt finishes after call() returned
+            if future.exception() is not None:
+                self.record_error(op, future.exception(), count_timeouts)
+            elif self.is_failure(future.result()):
+                self.record_failure(op)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            done = list(done)
+            while done:
+                future = done.pop()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if error is not None:
+                        self.record_error(op, error, count_timeouts)
+                    error = e
+                    continue
+                if not self.is_failure(result) or not (pending or done):
+                    if error is not None:
+                        self.record_error(op, error, count_timeouts)
+                    for other in (*pending, *done):
+                        other.add_done_callback(record_abandoned)
+                    return result
+                self.record_failure(op)
+        raise error
+
+
+_upstreams = {}
+_registry_lock = threading.Lock()
+
+
+def get_upstream(name, **kwargs):
+    """Shared Upstream instance per name, so every caller sees the same breaker state."""
+    with _registry_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = _upstreams[name] = Upstream(name, **kwargs)
+        return upstream
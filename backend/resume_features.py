@@ -0,0 +1,83 @@
+# resume_features.py
+import hashlib
+import os
+import re
+
+from job_matcher import extract_skills, tokenize, vectorize
+from prompt_budget import count_tokens
+
+FEATURES_VERSION = 2
+# Also store an OpenAI embedding with each uploaded document's features. Matching doesn't
+# read it, so it is off by default; recomputing stale features on a read never embeds
+RESUME_EMBEDDINGS = os.getenv("RESUME_EMBEDDINGS", "0") == "1"
+
+# Headings that commonly start a resume section
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment history", "work history"),
+    "education": ("education", "academic background"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tech stack"),
+    "projects": ("projects", "personal projects", "key projects"),
+    "certifications": ("certifications", "certificates", "licenses"),
+}
+
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+
+def content_hash(text):
+    """Stable hash of document content, used to invalidate cached features."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def segment_sections(text):
+    """Split resume text into named sections using heading lines."""
+    sections = []
+    current = {"name": "header", "start": 0}
+    offset = 0
+    for line in (text or "").splitlines(keepends=True):
+        key = re.sub(r"[^a-z ]", "", line.strip().lower()).strip()
+        name = _HEADING_LOOKUP.get(key)
+        if name and len(line.strip()) <= 40:
+            current["end"] = offset
+            if current["end"] > current["start"]:
+                sections.append(current)
+            current = {"name": name, "start": offset}
+        offset += len(line)
+    current["end"] = offset
+    if current["end"] > current["start"]:
+        sections.append(current)
+    return sections
+
+
+def _embed(text):
+    """Embedding for the document, or None when OpenAI isn't configured or the call fails."""
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    try:
+        from openai_client import OpenAIClient
+        return OpenAIClient().embed(text)
+    except Exception as e:
+        print(f"Embedding skipped: {e}")
+        return None
+
+
+def compute_features(text, with_embedding=False):
+    """Compute the reusable matching/tailoring features for a document's text."""
+    return {
+        "version": FEATURES_VERSION,
+        "content_hash": content_hash(text),
+        "skills": sorted(extract_skills(text)),
+        "sections": segment_sections(text),
+        "token_count": count_tokens(text),
+        "vector": vectorize(tokenize(text)),
+        "embedding": _embed(text) if with_embedding else None,
+    }
+
+
+def is_fresh(features, text):
+    """True if cached features were computed from this exact content."""
+    return (
+        bool(features)
+        and features.get("version") == FEATURES_VERSION
+        and features.get("content_hash") == content_hash(text)
+    )
@@ -0,0 +1,206 @@
+# shared_state.py
+import os
+import sqlite3
+import threading
+import time
+
+# State that every worker process must agree on (documents, ingest jobs, cache
+# generations, rate limits, access tokens) lives in one SQLite database in WAL mode, so
+# readers never block the single writer and all workers see each other's writes.
+SHARED_DB_PATH = os.getenv("SHARED_STATE_DB", "db/shared_state.db")
+BUSY_TIMEOUT_MS = int(os.getenv("SHARED_STATE_BUSY_TIMEOUT_MS", "5000"))
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready_pid = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    filename TEXT,
+    file_path TEXT,
+    file_type TEXT,
+    upload_date TEXT,
+    content TEXT,
+    content_length INTEGER,
+    features TEXT,
+    sections TEXT,
+    stats TEXT
+);
+CREATE TABLE IF NOT EXISTS document_content (
+    document_id TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_rows (
+    document_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (document_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    job_id TEXT PRIMARY KEY,
+    document_id TEXT,
+    filename TEXT,
+    status TEXT,
+    stage TEXT,
+    progress INTEGER,
+    error TEXT,
+    content_length INTEGER,
+    created_at REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs (status, updated_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS access_tokens (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_on REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tailor_cache (
+    key TEXT PRIMARY KEY,
+    suggestions TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    latency REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tailor_cache_last_used ON tailor_cache (last_used);
+CREATE TABLE IF NOT EXISTS synced_documents (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    etag TEXT,
+    text_field TEXT,
+    metadata TEXT NOT NULL,
+    features TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_synced_documents_user ON synced_documents (user_id, ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    continuation TEXT,
+    owner TEXT,
+    lease_expires REAL,
+    caught_up_at REAL,
+    reconciled_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS graph_search_cache (
+    key TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    results TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Columns added after a table was first created: (table, column, type)
+_ADDED_COLUMNS = (
+    ("documents", "sections", "TEXT"),
+    ("documents", "stats", "TEXT"),
+    ("ingest_jobs", "file_path", "TEXT"),
+    ("ingest_jobs", "owner", "TEXT"),
+    ("ingest_jobs", "lease_expires", "REAL"),
+    ("ingest_jobs", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+
+def _add_missing_columns(conn):
+    for table, column, column_type in _ADDED_COLUMNS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def init_shared_state():
+    """Create the shared database and schema. Idempotent; runs once per process."""
+    global _schema_ready_pid
+    if _schema_ready_pid == os.getpid():
+        return
+    with _schema_lock:
+        if _schema_ready_pid == os.getpid():
+            return
+        directory = os.path.dirname(SHARED_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(SHARED_DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _add_missing_columns(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        # Holds bearer tokens; keep it readable by the service user only
+        os.chmod(SHARED_DB_PATH, 0o600)
+        _schema_ready_pid = os.getpid()
+
+
+def connect():
+    """Per-thread connection to the shared database.
+
+    Connections are opened lazily and never reused across a fork: a child
+    process opens its own the first time it touches the store.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+    init_shared_state()
+    conn = sqlite3.connect(SHARED_DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    _local.conn = conn
+    _local.pid = os.getpid()
+    return conn
+
+
+class SharedCounters:
+    """Named integer counters visible to every worker process."""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    def get(self, key):
+        row = connect().execute(
+            "SELECT value FROM counters WHERE name = ?", (f"{self.namespace}:{key}",)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key):
+        connect().execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (f"{self.namespace}:{key}",),
+        )
+
+
+class SharedTokenCache:
+    """Access tokens shared across workers, so each process doesn't fetch its own."""
+
+    def __init__(self, refresh_margin=300):
+        # Treat tokens this close to expiry as already expired
+        self.refresh_margin = refresh_margin
+
+    def get(self, key):
+        row = connect().execute(
+            "SELECT token, expires_on FROM access_tokens WHERE key = ?", (key,)
+        ).fetchone()
+        if row and row["expires_on"] - time.time() > self.refresh_margin:
+            return row["token"]
+        return None
+
+    def put(self, key, token, expires_on):
+        connect().execute(
+            "INSERT OR REPLACE INTO access_tokens (key, token, expires_on) VALUES (?, ?, ?)",
+            (key, token, expires_on),
+        )
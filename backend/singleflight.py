@@ -0,0 +1,58 @@
+# singleflight.py
+import hashlib
+import json
+import threading
+
+from tracing import inc, register_gauge
+
+
+def request_key(*parts):
+    """Stable hash of a request's identifying parts (JSON-serializable)."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls: the first caller for a key runs fn,
+    callers arriving while it is in flight wait and share its result (or exception)."""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        register_gauge("singleflight_in_flight", lambda: len(self._calls), group=name)
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            inc("singleflight_coalesced_total", group=self.name)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        inc("singleflight_calls_total", group=self.name)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
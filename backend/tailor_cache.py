@@ -0,0 +1,107 @@
+# tailor_cache.py
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+
+from shared_state import connect
+from tracing import inc, register_gauge
+
+TAILOR_CACHE_TTL_SECONDS = float(os.getenv("TAILOR_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TAILOR_CACHE_MAX_ENTRIES = int(os.getenv("TAILOR_CACHE_MAX_ENTRIES", "5000"))
+# Bump when the tailoring prompt changes, so old suggestions aren't served for the new prompt
+TAILOR_PROMPT_VERSION = "1"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_text(text):
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def _normalize_skills(skills):
+    return sorted({_normalize_text(s).lower() for s in skills or [] if _normalize_text(s)})
+
+
+def tailor_key(resume_text, job_description, matched_skills, missing_skills, model=""):
+    """Cache key for one tailoring request: hashes of the normalized inputs.
+
+    Whitespace and Unicode form don't change the key, and skill lists are
+    compared as case-insensitive sets.
+    """
+    def digest(value):
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+    parts = [
+        TAILOR_PROMPT_VERSION,
+        model,
+        digest(_normalize_text(resume_text)),
+        digest(_normalize_text(job_description)),
+        digest(json.dumps(_normalize_skills(matched_skills))),
+        digest(json.dumps(_normalize_skills(missing_skills))),
+    ]
+    return digest("|".join(parts))
+
+
+class TailorCache:
+    """ResumeAgent suggestions cached in the shared database, with a TTL and LRU eviction.
+
+    Entries survive restarts and are shared by every worker. Each entry keeps
+    the latency of the agent call that produced it, so hits can report how
+    much waiting they saved.
+    """
+
+    def __init__(self, ttl=TAILOR_CACHE_TTL_SECONDS, max_entries=TAILOR_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        register_gauge("tailor_cache_hit_ratio", self.hit_ratio)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
+
+    def get(self, key):
+        """Cached suggestions for key, or None. A hit refreshes the entry's LRU position."""
+        now = time.time()
+        conn = connect()
+        row = conn.execute(
+            "SELECT suggestions, latency FROM tailor_cache WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            inc("tailor_cache_misses_total")
+            return None
+        conn.execute("UPDATE tailor_cache SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        inc("tailor_cache_hits_total")
+        inc("tailor_cache_saved_seconds_total", row["latency"])
+        return row["suggestions"]
+
+    def put(self, key, suggestions, latency):
+        """Store suggestions that took `latency` seconds to produce, evicting expired and least recently used entries."""
+        now = time.time()
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO tailor_cache (key, suggestions, created_at, last_used, latency) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, suggestions, now, now, latency),
+            )
+            conn.execute("DELETE FROM tailor_cache WHERE created_at <= ?", (now - self.ttl,))
+            evicted = conn.execute(
+                "DELETE FROM tailor_cache WHERE key IN "
+                "(SELECT key FROM tailor_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted > 0:
+            inc("tailor_cache_evictions_total", evicted)
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Modules read their settings at import time, so point state at a scratch directory first
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["SHARED_STATE_DB"] = os.path.join(_scratch, "shared_state.db")
+os.environ["TRACE_FILE"] = ""
+os.environ.pop("CONTENT_STORE_DIR", None)
+os.chdir(_scratch)  # db_manager's chatbot.db path is relative
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import chat_service
+import openai_client
+from admission import FairQueue, QueueTimeoutError, RateLimitedError, RateLimiter, acting_for, current_caller
+
+
+class _FakeSDK:
+    """Stands in for the OpenAI SDK client, recording concurrency and callers per call."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.callers = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+        self.moderations = SimpleNamespace(create=self._moderate)
+
+    def _call(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.callers.append(current_caller())
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+
+    def _complete(self, **kwargs):
+        self._call()
+        message = SimpleNamespace(content=f"notes {kwargs['messages'][-1]['content'][:20]}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    def _moderate(self, **kwargs):
+        self._call()
+        result = SimpleNamespace(flagged=False, categories=SimpleNamespace(model_dump=lambda: {}))
+        return SimpleNamespace(results=[result])
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    fake = _FakeSDK()
+    queue = FairQueue("test", concurrency=2, timeout=5, weights={})
+    monkeypatch.setattr(openai_client, "llm_queue", queue)
+    monkeypatch.setattr(openai_client, "_sdk_client", lambda api_key: fake)
+    fake.queue = queue
+    return fake
+
+
+def test_map_reduce_takes_a_slot_per_upstream_call(sdk, monkeypatch):
+    monkeypatch.setattr(chat_service, "MAP_REDUCE_CONCURRENCY", 8)
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    chunks = [(f"doc {i}", f"document text {i}") for i in range(6)]
+    with acting_for("uid-a"):
+        results = chat_service._map_chunks(client, "What is here?", chunks, "gpt-4o-mini")
+    assert all(error is None for _, _, error in results)
+    assert len(sdk.callers) == 6
+    assert sdk.peak <= sdk.queue.concurrency
+    # The request's caller follows its calls onto the map threads
+    assert set(sdk.callers) == {"uid-a"}
+
+
+def test_moderation_takes_a_slot(sdk):
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    with sdk.queue.slot("other", 1), sdk.queue.slot("other", 1):
+        done = threading.Event()
+        threading.Thread(target=lambda: (client.moderate_content("hello"), done.set()), daemon=True).start()
+        assert not done.wait(0.1)
+        assert sdk.queue.waiting == 1
+    assert done.wait(2)
+
+
+def test_queue_times_out_when_saturated():
+    queue = FairQueue("test-timeout", concurrency=1, timeout=0.05, weights={})
+    with queue.slot("a", 1):
+        with pytest.raises(QueueTimeoutError):
+            with queue.slot("b", 1):
+                pass
+    assert queue.waiting == 0 and queue.active == 0
+
+
+def test_flooding_caller_only_delays_itself():
+    queue = FairQueue("test-fair", concurrency=1, timeout=5, weights={})
+    order = []
+    ready = threading.Barrier(7)
+
+    def request(caller):
+        ready.wait()
+        with queue.slot(caller, 10):
+            order.append(caller)
+
+    with queue.slot("holder", 1):
+        threads = [threading.Thread(target=request, args=("flood",)) for _ in range(5)]
+        threads.append(threading.Thread(target=request, args=("quiet",)))
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        while queue.waiting < 6:
+            time.sleep(0.005)
+    for thread in threads:
+        thread.join(2)
+    assert order.index("quiet") <= 1
+
+
+def test_callers_default_to_system_outside_requests():
+    assert current_caller() == "system"
+    with acting_for("anon:10.0.0.1"):
+        assert current_caller() == "anon:10.0.0.1"
+    assert current_caller() == "system"
+
+
+def test_rate_limit_buckets_are_per_caller():
+    limiter = RateLimiter(per_minute=1, burst=2)
+    for _ in range(2):
+        limiter.acquire("anon:10.0.0.1")
+    with pytest.raises(RateLimitedError):
+        limiter.acquire("anon:10.0.0.1")
+    # Another anonymous client isn't held back by the first
+    limiter.acquire("anon:10.0.0.2")
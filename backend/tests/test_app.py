@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from tracing import counter_value
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("requests")
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    import app
+
+    return app
+
+
+def test_first_request_initializes_the_worker(app_module):
+    app_module._worker_pid = None
+    client = app_module.app.test_client()
+    assert client.get("/health").status_code == 200
+    assert app_module._worker_pid == os.getpid()
+    assert app_module.warmup.status()["started"]
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/traces", "/token-usage", "/analytics/volume", "/model-routing",
+                                  "/cosmos-sync", "/admin/profiles"])
+def test_operational_routes_need_the_admin_token(app_module, monkeypatch, path):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    client = app_module.app.test_client()
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "secret"}).status_code != 403
+    assert client.get(path, headers={"Authorization": "Bearer secret"}).status_code != 403
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/traces"])
+def test_operational_routes_are_closed_without_a_token(app_module, monkeypatch, path):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "")
+    client = app_module.app.test_client()
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer "}).status_code == 403
+
+
+def test_request_span_carries_the_callers_trace_id(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    client = app_module.app.test_client()
+    assert client.get("/health", headers={"X-Trace-Id": "trace-health"}).headers["X-Trace-Id"] == "trace-health"
+    spans = client.get("/traces?trace_id=trace-health", headers={"X-Admin-Token": "secret"}).get_json()["spans"]
+    assert [(s["name"], s["parent_id"]) for s in spans] == [("route /health", None)]
+
+
+def test_concurrent_vm_cache_misses_share_one_upstream_call(app_module, monkeypatch):
+    from vm_cache import VMResponseCache
+
+    release = threading.Event()
+    calls = []
+
+    def vm_request(op, method, path, **kwargs):
+        calls.append(path)
+        release.wait(5)
+        return SimpleNamespace(status_code=200, content=b'{"documents": []}', headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(app_module, "vm_cache", VMResponseCache(ttl=60))
+    monkeypatch.setattr(app_module, "_vm_request", vm_request)
+    coalesced = counter_value("singleflight_coalesced_total", group="vm")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            app_module._cached_vm_get("documents", "/documents?userId=flight", "flight")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while counter_value("singleflight_coalesced_total", group="vm") - coalesced < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["/documents?userId=flight"]
+    assert results == [(b'{"documents": []}', 200, "application/json")] * 4
+
+
+class _Agent:
+    """ResumeAgent stand-in: tailor_resume returns reply; the stream yields it in pieces, or fails after one."""
+
+    def __init__(self, reply, fail_stream=False):
+        self.reply = reply
+        self.fail_stream = fail_stream
+        self.calls = 0
+
+    def tailor_resume(self, *inputs):
+        self.calls += 1
+        return self.reply
+
+    def tailor_resume_stream(self, *inputs):
+        self.calls += 1
+        yield self.reply[:10]
+        if self.fail_stream:
+            raise RuntimeError("agent stream broke")
+        yield self.reply[10:]
+
+
+@pytest.fixture
+def tailoring(app_module, monkeypatch):
+    """post(agent, resume, stream) against /tailor-resume, with a fresh tailor cache and no rate limit."""
+    from admission import RateLimiter
+    from tailor_cache import TailorCache
+
+    monkeypatch.setattr(app_module, "rate_limiter", RateLimiter(burst=1000))
+    monkeypatch.setattr(app_module, "tailor_cache", TailorCache())
+    client = app_module.app.test_client()
+
+    def post(agent, resume, stream=False, buffered=True):
+        monkeypatch.setattr(app_module, "_get_resume_agent", lambda: agent)
+        body = {"resumeText": resume, "jobDescription": "Python and Kubernetes", "stream": stream}
+        return client.post("/tailor-resume", json=body, buffered=buffered)
+
+    return post
+
+
+def _events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_tailoring_is_cached(tailoring):
+    post = tailoring
+    agent = _Agent("Add Kubernetes to your skills section.")
+    assert post(agent, "resume cached").get_json() == {"suggestions": agent.reply, "cached": False}
+    assert post(agent, "  resume   cached ").get_json() == {"suggestions": agent.reply, "cached": True}
+    assert agent.calls == 1
+
+
+def test_complete_stream_is_cached(tailoring):
+    post = tailoring
+    agent = _Agent("Add Kubernetes to your skills section.")
+    events = _events(post(agent, "resume streamed", stream=True))
+    assert "".join(e["text"] for e in events if e["type"] == "delta") == agent.reply
+    assert events[-1] == {"type": "done", "cached": False, "suggestions": agent.reply}
+    assert post(agent, "resume streamed").get_json()["cached"] is True
+    assert agent.calls == 1
+
+
+def test_broken_stream_is_not_cached(tailoring):
+    post = tailoring
+    agent = _Agent("Add Kubernetes to your skills section.", fail_stream=True)
+    assert _events(post(agent, "resume broken", stream=True))[-1]["type"] == "error"
+    assert _events(post(agent, "resume broken", stream=True))[-1]["type"] == "error"
+    assert agent.calls == 2
+
+
+def test_abandoned_stream_is_not_cached(tailoring):
+    post = tailoring
+    agent = _Agent("Add Kubernetes to your skills section.")
+    response = post(agent, "resume left early", stream=True, buffered=False)
+    next(response.response)  # the client reads one piece, then disconnects
+    response.close()
+    assert post(agent, "resume left early").get_json()["cached"] is False
+    assert agent.calls == 2
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_no_suggestions_reply_is_never_cached(tailoring, stream):
+    from foundry_client import NO_SUGGESTIONS_MESSAGE
+
+    post = tailoring
+    agent = _Agent(NO_SUGGESTIONS_MESSAGE)
+    post(agent, f"resume empty {stream}", stream=stream)
+    post(agent, f"resume empty {stream}", stream=stream)
+    assert agent.calls == 2
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from chat_archive import ChatAnalytics, _split, archive
+from db_manager import DB_PATH, init_db
+
+# Far from the rows other tests log today, so since/until select only these
+CHATS = [
+    ("2019-12-30T09:00:00", "Python, Azure"),
+    ("2019-12-30T17:30:00", "python"),
+    ("2019-12-31T08:15:00", "Azure, resume"),
+    ("2020-01-20T12:00:00", "Python, salary"),
+]
+BLOCKED = [
+    ("2019-12-31T10:00:00", "violence"),
+    ("2020-01-20T13:00:00", "hate, violence"),
+]
+NOW = datetime(2020, 2, 1)  # 30-day cutoff: 2020-01-02
+SINCE, UNTIL = "2019-12-01", "2020-01-31"
+
+
+def test_split_drops_blanks_and_whitespace():
+    assert _split("python, azure ,, ") == ["python", "azure"]
+    assert _split("") == []
+    assert _split(None) == []
+
+
+@pytest.fixture(scope="module")
+def archived(tmp_path_factory):
+    pytest.importorskip("pyarrow")
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany("INSERT INTO chatlog (timestamp, user_input, bot_response, keywords, moderation_flags) "
+                     "VALUES (?, 'question', 'answer', ?, '')", CHATS)
+    conn.executemany("INSERT INTO flagged (timestamp, user_input, categories) VALUES (?, '...', ?)", BLOCKED)
+    conn.commit()
+    conn.close()
+    archive_dir = str(tmp_path_factory.mktemp("archive"))
+    return archive_dir, archive(30, archive_dir=archive_dir, now=NOW)
+
+
+def test_old_days_move_to_day_partitions(archived):
+    archive_dir, moved = archived
+    assert moved == {"chatlog": 3, "flagged": 1}
+    assert sorted(os.listdir(os.path.join(archive_dir, "chatlog"))) == ["date=2019-12-30", "date=2019-12-31"]
+    assert os.listdir(os.path.join(archive_dir, "flagged")) == ["date=2019-12-31"]
+    partition = os.listdir(os.path.join(archive_dir, "chatlog", "date=2019-12-30"))
+    assert len(partition) == 1 and partition[0].startswith("part-") and partition[0].endswith(".parquet")
+
+    conn = sqlite3.connect(DB_PATH)
+    live = conn.execute("SELECT timestamp FROM chatlog WHERE timestamp < '2020-01-02'").fetchall()
+    kept = conn.execute("SELECT COUNT(*) FROM chatlog WHERE timestamp LIKE '2020-01-20%'").fetchone()[0]
+    conn.close()
+    assert live == [] and kept == 1
+
+
+def test_second_run_moves_nothing(archived):
+    archive_dir, _ = archived
+    assert archive(30, archive_dir=archive_dir, now=NOW) == {"chatlog": 0, "flagged": 0}
+
+
+def test_analytics_combine_archive_and_live_rows(archived):
+    analytics = ChatAnalytics(archived[0])
+
+    top = analytics.top_keywords(SINCE, UNTIL)
+    assert {item["keyword"]: item["count"] for item in top} == {"python": 3, "azure": 2, "resume": 1, "salary": 1}
+    assert top[0] == {"keyword": "python", "count": 3}
+
+    flags = analytics.flag_rates(SINCE, UNTIL)
+    assert (flags["requests"], flags["blocked"], flags["flag_rate"]) == (6, 2, round(2 / 6, 6))
+    assert {name: c["count"] for name, c in flags["categories"].items()} == {"violence": 2, "hate": 1}
+
+    assert analytics.volume_by_day(SINCE, UNTIL) == [
+        {"date": "2019-12-30", "chats": 2, "blocked": 0},
+        {"date": "2019-12-31", "chats": 1, "blocked": 1},
+        {"date": "2020-01-20", "chats": 1, "blocked": 1},
+    ]
+
+
+def test_day_bounds_prune_partitions(archived):
+    analytics = ChatAnalytics(archived[0])
+    assert analytics.volume_by_day("2019-12-31", "2019-12-31") == [{"date": "2019-12-31", "chats": 1, "blocked": 1}]
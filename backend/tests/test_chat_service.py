@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+import chat_service
+
+REFUSAL = "I apologize, but I cannot respond to that type of content!"
+
+
+class _FakeClient:
+    """Flags any moderation input containing "FORBIDDEN"; records every call."""
+
+    def __init__(self):
+        self.moderated = []
+        self.completions = []
+        self._lock = threading.Lock()
+
+    def moderate_content(self, prompt):
+        with self._lock:
+            self.moderated.append(prompt)
+        return ("FORBIDDEN" in prompt, ["violence"] if "FORBIDDEN" in prompt else [])
+
+    def chat_completion(self, prompt, model="gpt-4o", mode="general", route="chat", **kwargs):
+        with self._lock:
+            self.completions.append(route)
+        return "notes" if route == "chat_map" else "answer"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(chat_service, "OpenAIClient", lambda: fake)
+    monkeypatch.setattr(chat_service, "extract_keywords", lambda text: [])
+    return fake
+
+
+def _documents(count, flagged_index=None):
+    return [
+        (f"doc{i}.txt", ("FORBIDDEN text" if i == flagged_index else f"plain text {i}") * 10)
+        for i in range(count)
+    ]
+
+
+def test_map_reduce_moderates_documents_with_the_question(client):
+    response = chat_service.handle_chat("Summarize these", documents=_documents(4, flagged_index=2))
+    assert response == REFUSAL
+    assert len(client.moderated) == 4
+    assert all("User question: Summarize these" in prompt for prompt in client.moderated)
+    assert client.completions == []
+
+
+def test_single_document_path_moderates_context_too(client):
+    response = chat_service.handle_chat("Summarize this", documents=_documents(1, flagged_index=0))
+    assert response == REFUSAL
+
+
+def test_map_reduce_answers_clean_documents(client):
+    response = chat_service.handle_chat("Summarize these", documents=_documents(4))
+    assert response == "answer"
+    assert client.completions.count("chat_map") == 4
+    assert client.completions[-1] == "chat_reduce"
+
+
+def test_moderation_failure_is_not_ignored(client, monkeypatch):
+    def broken(prompt):
+        raise RuntimeError("moderation unavailable")
+
+    monkeypatch.setattr(client, "moderate_content", broken)
+    with pytest.raises(RuntimeError):
+        chat_service.handle_chat("Summarize these", documents=_documents(4))
+
+
+def test_foundry_document_prompt_fits_the_agent_budget(monkeypatch):
+    monkeypatch.setattr(chat_service, "FOUNDRY_AGENT_MAX_INPUT_TOKENS", 2000)
+    history = [{"role": "user", "content": "earlier question " * 50}]
+    prompt = chat_service.document_prompt("What changed?", _documents(3) * 200, history)
+    assert prompt.endswith("User question: What changed?")
+    total = chat_service.count_tokens(prompt) + chat_service.count_message_tokens(history)
+    assert total <= 2000
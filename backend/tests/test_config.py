@@ -0,0 +1,25 @@
+import sys
+
+import config
+
+
+def test_missing_dotenv_is_reported(tmp_path, monkeypatch, capsys):
+    env = tmp_path / ".env"
+    env.write_text("EXAMPLE_SETTING=1\n")
+    monkeypatch.setattr(config, "ENV_PATH", str(env))
+    monkeypatch.setattr(config, "_env_loaded", False)
+    monkeypatch.setitem(sys.modules, "dotenv", None)  # import fails as if not installed
+
+    config.load_env()
+
+    assert "python-dotenv is not installed" in capsys.readouterr().out
+
+
+def test_missing_dotenv_without_env_file_is_quiet(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "ENV_PATH", str(tmp_path / ".env"))
+    monkeypatch.setattr(config, "_env_loaded", False)
+    monkeypatch.setitem(sys.modules, "dotenv", None)
+
+    config.load_env()
+
+    assert capsys.readouterr().out == ""
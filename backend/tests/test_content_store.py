@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+
+from content_store import ContentStore
+from document_store import DocumentStore
+from shared_state import connect
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path), cache_max_chars=100)
+
+
+def _id():
+    return f"doc-{uuid.uuid4().hex}"
+
+
+def test_text_round_trips(store):
+    document_id = _id()
+    store.put(document_id, "Résumé — Python, Azure ✓")
+    assert store.get(document_id) == "Résumé — Python, Azure ✓"
+    assert document_id in store
+    assert store.get(_id()) is None
+
+
+def test_replaced_text_is_not_served_stale_by_another_worker(tmp_path):
+    reader, writer = ContentStore(str(tmp_path)), ContentStore(str(tmp_path))
+    document_id = _id()
+    writer.put(document_id, "first version")
+    assert reader.get(document_id) == "first version"
+    writer.put(document_id, "second version")
+    assert reader.get(document_id) == "second version"
+
+
+def test_segments_roll_over(tmp_path):
+    store = ContentStore(str(tmp_path), segment_max_bytes=64)
+    ids = [_id() for _ in range(5)]
+    for i, document_id in enumerate(ids):
+        store.put(document_id, f"document {i} " + uuid.uuid4().hex * 2)
+    assert store.stats()["segments"] > 1
+    assert [store.get(document_id)[:10] for document_id in ids] == [f"document {i}" for i in range(5)]
+
+
+def test_cache_stays_within_its_budget(store):
+    ids = [_id() for _ in range(5)]
+    for document_id in ids:
+        store.put(document_id, "x" * 40)
+        store.get(document_id)
+    assert store.cache_chars <= 100
+    store.get(ids[0], cache=False)
+    assert store.cache_chars <= 100
+
+
+def test_delete_drops_the_document(store):
+    document_id = _id()
+    store.put(document_id, "to be removed")
+    store.delete(document_id)
+    assert store.get(document_id) is None and document_id not in store
+
+
+def test_inline_content_is_moved_to_the_store(tmp_path):
+    document_id = _id()
+    connect().execute("INSERT INTO documents (id, filename, content) VALUES (?, ?, ?)",
+                      (document_id, "old.txt", "text stored inline by an older version"))
+    documents = DocumentStore(content=ContentStore(str(tmp_path)))
+    assert connect().execute("SELECT content FROM documents WHERE id = ?", (document_id,)).fetchone()[0] is None
+    assert documents.get_content(document_id) == "text stored inline by an older version"
+    documents.delete(document_id)
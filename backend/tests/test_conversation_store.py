@@ -0,0 +1,84 @@
+import threading
+import uuid
+
+from conversation_store import ConversationStore
+from db_manager import get_conversation
+
+
+def _session():
+    return uuid.uuid4().hex
+
+
+def _summarizer(summary, turns):
+    return f"{summary} +{len(turns)}".strip()
+
+
+def test_under_budget_nothing_is_folded():
+    store = ConversationStore(recent_budget=1000, summarizer=_summarizer)
+    session = _session()
+    assert store.record_turn("u", session, "hi", "hello") is None
+    assert [m["role"] for m in store.history("u", session)] == ["user", "assistant"]
+
+
+def test_fold_runs_in_the_background():
+    release = threading.Event()
+
+    def slow(summary, turns):
+        release.wait(5)
+        return "summary"
+
+    store = ConversationStore(recent_budget=60, summarizer=slow)
+    session = _session()
+    future = None
+    for i in range(4):
+        future = store.record_turn("u", session, f"question {i} " * 5, f"answer {i} " * 5) or future
+    # The reply path returned while the summary call is still blocked
+    assert future is not None and not future.done()
+    release.set()
+    future.result(5)
+    summary, turns = get_conversation("u", session)
+    assert summary == "summary"
+    assert 0 < sum(tokens for *_, tokens in turns) <= 60
+    assert turns[0][1] == "user"
+
+
+def test_concurrent_folds_of_the_same_turns_apply_once():
+    session = _session()
+    seed = ConversationStore(recent_budget=10_000)
+    for i in range(6):
+        seed.record_turn("u", session, f"question {i} " * 5, f"answer {i} " * 5)
+
+    both_read = threading.Barrier(2)
+
+    def summarizer(summary, turns):
+        both_read.wait(5)  # both folds have read the same version before either saves
+        return f"folded by {threading.current_thread().name}"
+
+    stores = [ConversationStore(recent_budget=40, summarizer=summarizer) for _ in range(2)]
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.update({i: stores[i].fold("u", session)}), name=f"fold-{i}")
+        for i in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert sorted(results.values()) == [False, True]
+    winner = next(i for i, saved in results.items() if saved)
+    summary, turns = get_conversation("u", session)
+    assert summary == f"folded by fold-{winner}"
+    assert len(turns) < 12
+
+
+def test_history_stays_bounded_over_a_long_conversation():
+    store = ConversationStore(recent_budget=60, summary_budget=30, summarizer=_summarizer)
+    session = _session()
+    for i in range(30):
+        future = store.record_turn("u", session, f"question {i} " * 4, f"answer {i} " * 4)
+        if future is not None:
+            future.result(5)
+    summary, turns = get_conversation("u", session)
+    assert summary
+    assert sum(tokens for *_, tokens in turns) <= 60 + 2 * 20
@@ -0,0 +1,99 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from cosmos_sync import CosmosSync, SyncedDocuments  # noqa: E402
+from fake_change_feed import FakeChangeFeed  # noqa: E402
+
+DOCUMENTS = 12
+
+
+def _item(feed, document_id):
+    return {k: v for k, v in feed._items[document_id].items() if not k.startswith("_")}
+
+
+@pytest.fixture
+def feed():
+    feed = FakeChangeFeed()
+    prefix = uuid.uuid4().hex[:8]
+    for i, document_id in enumerate(f"{prefix}-{i:02d}" for i in range(DOCUMENTS)):
+        feed.upsert({"id": document_id, "userId": f"user{i % 3}", "filename": f"resume_{i}.pdf",
+                     "fullText": f"Resume {i}: Python and Azure engineer"})
+    return feed
+
+
+def _sync(feed, index=None, **kwargs):
+    # A name of its own keeps this feed's continuation apart from other tests'
+    return CosmosSync(feed, index or SyncedDocuments(with_embedding=False), name=f"test-{id(feed)}", page_size=5,
+                      **kwargs)
+
+
+def test_initial_sync_applies_every_document(feed):
+    ids = sorted(feed.ids())
+    sync = _sync(feed)
+    totals = sync.sync_once()
+    assert totals["applied"] == DOCUMENTS and totals["pages"] == 3
+    assert sync.index.get_text(ids[4], "user1") == "Resume 4: Python and Azure engineer"
+    assert sync.serving()
+
+
+def test_incremental_sync_applies_only_edits(feed):
+    ids = sorted(feed.ids())
+    changed_users = set()
+    sync = _sync(feed, on_change=changed_users.update)
+    sync.sync_once()
+    changed_users.clear()
+    renamed, edited = ids[1], ids[5]
+    feed.upsert({**_item(feed, renamed), "filename": "renamed.pdf"})
+    feed.upsert({**_item(feed, edited), "fullText": "Certified Kubernetes Administrator"})
+
+    totals = sync.sync_once()
+
+    assert totals["applied"] == 2
+    assert changed_users == {"user1", "user2"}
+    assert sync.index.get(renamed, "user1")["filename"] == "renamed.pdf"
+    assert "kubernetes" in sync.index.get_features(edited, "user2")["skills"]
+
+
+def test_restart_resumes_from_the_stored_continuation(feed):
+    _sync(feed).sync_once()
+    reads = feed.reads
+    totals = _sync(feed).sync_once()
+    assert totals["applied"] == 0
+    assert feed.reads - reads == 1
+
+
+def test_replayed_page_is_skipped_by_version(feed):
+    sync = _sync(feed)
+    sync.sync_once()
+    continuation = sync._state()["continuation"]
+    sync._update_state(continuation=str(int(continuation) - 5))
+    totals = sync.sync_once()
+    assert totals["applied"] == 0 and totals["skipped"] == 5
+
+
+def test_soft_and_hard_deletes_are_removed(feed):
+    ids = sorted(feed.ids())
+    sync = _sync(feed)
+    sync.sync_once()
+    soft, hard = ids[1], ids[2]
+    feed.upsert({**_item(feed, soft), "deleted": True})
+    feed.delete(hard)
+    sync._update_state(reconciled_at=0)
+
+    totals = sync.sync_once()
+
+    assert totals["deleted"] == 1 and totals["removed"] == 1
+    assert sync.index.get(soft, "user1") is None and sync.index.get(hard, "user2") is None
+    assert sync.index.get(ids[3], "user0") is not None
+
+
+def test_only_the_lease_holder_syncs(feed):
+    first, second = _sync(feed), _sync(feed)
+    second.owner = "other-host:1"
+    assert first.sync_once() is not None
+    assert second.sync_once() is None
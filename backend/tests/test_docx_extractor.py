@@ -0,0 +1,46 @@
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from docx_extractor import extract_docx  # noqa: E402
+from resume_features import segment_sections  # noqa: E402
+
+
+@pytest.fixture
+def resume_path(tmp_path):
+    document = docx.Document()
+    section = document.sections[0]
+    section.header.paragraphs[0].text = "Jane Doe - jane@example.com"
+    section.footer.paragraphs[0].text = "Page 1 - Confidential"
+    document.add_heading("Experience", level=1)
+    document.add_paragraph("Platform engineer at Contoso")
+    document.add_heading("Skills", level=1)
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Cloud"
+    nested = table.cell(0, 1).add_table(rows=2, cols=1)
+    nested.cell(0, 0).text = "Azure AKS"
+    nested.cell(1, 0).text = "Functions"
+    path = tmp_path / "resume.docx"
+    document.save(path)
+    return str(path)
+
+
+def test_nested_table_rows_stay_separate(resume_path):
+    lines = extract_docx(resume_path)[0].splitlines()
+    assert lines[-3:] == ["Cloud | ", "Azure AKS", "Functions"]
+
+
+def test_page_header_and_footer_come_before_the_body(resume_path):
+    text, sections = extract_docx(resume_path)
+    assert [s["title"] for s in sections] == ["header", "footer", "Experience", "Skills"]
+    ranges = {s["title"]: text[s["start"]:s["end"]].strip() for s in sections}
+    assert ranges["header"] == "Jane Doe - jane@example.com"
+    assert ranges["footer"] == "Page 1 - Confidential"
+    assert ranges["Skills"].startswith("Skills")
+
+
+def test_resume_sections_keep_page_text_out_of_the_last_section(resume_path):
+    text = extract_docx(resume_path)[0]
+    resume_sections = {s["name"]: text[s["start"]:s["end"]] for s in segment_sections(text)}
+    assert "Confidential" in resume_sections["header"]
+    assert "Confidential" not in resume_sections["skills"]
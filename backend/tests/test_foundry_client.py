@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from foundry_client import _extract_message  # noqa: E402
+
+
+@pytest.mark.parametrize("data, text", [
+    ({"output_text": "direct"}, "direct"),
+    ({"output": [{"type": "reasoning"},
+                 {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": "listed"}]}]},
+     "listed"),
+    ({"output": [{"type": "message", "role": "assistant", "content": "plain"}]}, "plain"),
+    ({"choices": [{"message": {"content": "completion"}}]}, "completion"),
+    ({"output": []}, ""),
+])
+def test_extract_message_shapes(data, text):
+    assert _extract_message(data) == text
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from graph_search import (  # noqa: E402
+    RRF_K, GraphSearch, GraphSnapshot, _pack, export_snapshot, invalidate_graph_cache, normalize_query, run_sync,
+)
+from stub_graph import StubGraphiti, job_facts  # noqa: E402
+
+
+def _edge(i, fact, vector):
+    return {"uuid": f"e{i}", "name": "RELATES_TO", "fact": fact, "source_node_uuid": "n1",
+            "target_node_uuid": "n2", "embedding": _pack(vector)}
+
+
+def _snapshot():
+    nodes = [{"uuid": "n1", "name": "Troy"}, {"uuid": "n2", "name": "Azure"}]
+    edges = [
+        _edge(0, "Troy used Azure Functions", [1.0, 0.0, 0.0]),   # first by vector and by keywords
+        _edge(1, "Kubernetes on AKS", [0.9, 0.1, 0.0]),           # second by vector, no keyword match
+        _edge(2, "Azure Functions and Azure DevOps", [0.0, 0.0, 1.0]),  # second by keywords, ties e3 by vector
+        _edge(3, "Unrelated fact", [0.0, 0.0, 1.0]),
+    ]
+    return GraphSnapshot(nodes, edges)
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def snapshot(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    return _snapshot()
+
+
+def test_rrf_sums_reciprocal_ranks_across_rankings(snapshot):
+    results = snapshot.search("azure functions", num_results=4, query_vector=[1.0, 0.0, 0.0])
+    # e2 trails e1 on vectors but appears in both rankings, which outweighs one rank of difference
+    assert [r["uuid"] for r in results] == ["e0", "e2", "e1", "e3"]
+    assert results[0]["score"] == round(2 / (RRF_K + 1), 6)
+    assert results[1]["score"] == round(1 / (RRF_K + 2) + 1 / (RRF_K + 3), 6)
+    assert results[2]["score"] == round(1 / (RRF_K + 2), 6)
+    assert (results[0]["source_name"], results[0]["target_name"]) == ("Troy", "Azure")
+
+
+def test_tied_vector_scores_rank_by_index(snapshot):
+    assert snapshot._vector_ranking([0.0, 0.0, 1.0], 1) == [2]
+    assert snapshot._vector_ranking([0.0, 0.0, 1.0], 4) == [2, 3, 0, 1]
+
+
+def test_keyword_only_search_without_query_vector(snapshot):
+    results = snapshot.search("azure devops", num_results=2)
+    assert [r["uuid"] for r in results] == ["e2", "e0"]
+
+
+def test_longer_query_vectors_are_truncated_to_the_stored_dimension(snapshot):
+    results = snapshot.search("", num_results=1, query_vector=[0.0, 0.0, 1.0, 0.5])
+    assert results[0]["uuid"] == "e2"
+
+
+class _Graph:
+    def __init__(self):
+        self.searches = 0
+        self.facts = ["Troy has used Azure"]
+
+    async def search(self, query, num_results=10):
+        self.searches += 1
+        return [{"uuid": str(i), "fact": fact, "name": "HAS_SKILL"} for i, fact in enumerate(self.facts)]
+
+
+def test_results_are_cached_by_normalized_query():
+    graph = _Graph()
+    search = GraphSearch(graph)
+    first = asyncio.run(search.search("What does Troy know?  "))
+    second = asyncio.run(search.search("what does troy know"))
+    assert graph.searches == 1
+    assert first == second
+    assert normalize_query("What does Troy know?  ") == "what does troy know"
+
+
+def test_invalidation_retires_cached_results():
+    graph = _Graph()
+    search = GraphSearch(graph)
+    asyncio.run(search.search("skills of troy"))
+    graph.facts.append("Troy has used Kubernetes")
+    invalidate_graph_cache()
+    results = asyncio.run(search.search("skills of troy"))
+    assert graph.searches == 2
+    assert [r["fact"] for r in results] == graph.facts
+
+
+def test_expired_results_are_refetched():
+    graph = _Graph()
+    search = GraphSearch(graph, cache_ttl=0)
+    asyncio.run(search.search("ttl query"))
+    asyncio.run(search.search("ttl query"))
+    assert graph.searches == 2
+
+
+def test_run_sync_reuses_one_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_sync(current_loop()) is run_sync(current_loop())
+
+
+def test_exported_snapshot_answers_locally(tmp_path):
+    graph = StubGraphiti(job_facts(200), latency_ms=0)
+    path = str(tmp_path / "graph_snapshot.json.gz")
+    nodes, edges = asyncio.run(export_snapshot(graph, path))
+    assert nodes > 0 and edges == 200
+
+    search = GraphSearch(graph)
+    search.snapshot = GraphSnapshot.load(path)
+    results = asyncio.run(search.search("Which roles require Kubernetes?", num_results=5, local=True))
+
+    assert graph.searches == 0
+    assert len(results) == 5
+    assert any("Kubernetes" in r["fact"] for r in results)
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import pytest
+
+from ingest_queue import IngestQueue
+from shared_state import connect
+
+
+class _Uploader:
+    """Stores uploads in a temp directory; processing blocks until released."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.processed = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def store_upload(self, file_data, filename):
+        document_id = f"doc-{len(os.listdir(self.directory))}-{time.monotonic_ns()}"
+        path = os.path.join(self.directory, f"{document_id}_{filename}")
+        with open(path, "wb") as f:
+            f.write(file_data)
+        return document_id, path
+
+    def process_stored_file(self, document_id, filename, file_path, progress=None):
+        self.release.wait(5)
+        progress("extracting", 10)
+        self.processed.append(document_id)
+        return {"content_length": os.path.getsize(file_path)}
+
+
+@pytest.fixture
+def uploader(tmp_path):
+    return _Uploader(str(tmp_path))
+
+
+def _wait_for(queue, job_id, status, seconds=5):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        job = queue.status(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {queue.status(job_id)['status']}, expected {status}")
+
+
+def _abandon(job_id, status, attempts, age=1000):
+    """Make a job look like its worker died: not updated, and any lease long expired."""
+    past = time.time() - age
+    connect().execute(
+        "UPDATE ingest_jobs SET status = ?, owner = 'gone:1', lease_expires = ?, updated_at = ?, attempts = ? "
+        "WHERE job_id = ?",
+        (status, past, past, attempts, job_id),
+    )
+
+
+def test_job_runs_and_reports_done(uploader):
+    queue = IngestQueue(uploader, workers=1)
+    job = queue.submit(b"hello", "a.txt")
+    done = _wait_for(queue, job["job_id"], "done")
+    assert done["content_length"] == 5
+
+
+def test_processing_job_from_dead_worker_is_rerun(uploader):
+    queue = IngestQueue(uploader, workers=1, lease_seconds=60)
+    job = queue.submit(b"resume", "b.txt")
+    _wait_for(queue, job["job_id"], "done")
+    _abandon(job["job_id"], "processing", attempts=1)
+    before = queue.pending()
+
+    requeued, failed = queue.recover()
+
+    assert requeued == [job["job_id"]] and failed == []
+    _wait_for(queue, job["job_id"], "done")
+    assert uploader.processed.count(job["document_id"]) == 2
+    assert queue.pending() == before - 1
+
+
+def test_job_is_failed_after_max_attempts(uploader):
+    queue = IngestQueue(uploader, workers=1, max_attempts=2)
+    job = queue.submit(b"resume", "c.txt")
+    _wait_for(queue, job["job_id"], "done")
+    _abandon(job["job_id"], "processing", attempts=2)
+
+    requeued, failed = queue.recover()
+
+    assert requeued == [] and failed == [job["job_id"]]
+    assert queue.status(job["job_id"])["status"] == "failed"
+
+
+def test_stale_queued_job_is_picked_up(uploader):
+    queue = IngestQueue(uploader, workers=1, lease_seconds=60)
+    job = queue.submit(b"resume", "d.txt")
+    _wait_for(queue, job["job_id"], "done")
+    _abandon(job["job_id"], "queued", attempts=0)
+
+    assert queue.recover()[0] == [job["job_id"]]
+    _wait_for(queue, job["job_id"], "done")
+
+
+def test_live_jobs_are_left_alone(uploader):
+    uploader.release.clear()
+    queue = IngestQueue(uploader, workers=1, lease_seconds=60)
+    job = queue.submit(b"resume", "e.txt")
+    _wait_for(queue, job["job_id"], "processing")
+
+    assert queue.recover() == ([], [])
+    uploader.release.set()
+    _wait_for(queue, job["job_id"], "done")
+
+
+def test_a_claimed_job_runs_once(uploader):
+    uploader.release.clear()
+    queue = IngestQueue(uploader, workers=2)
+    job = queue.submit(b"resume", "f.txt")
+    _wait_for(queue, job["job_id"], "processing")
+    # A second delivery (e.g. a recovery pass that raced the claim) finds it taken
+    queue._executor().submit(queue._run, job["job_id"], job["document_id"], "f.txt", "unused")
+    uploader.release.set()
+    _wait_for(queue, job["job_id"], "done")
+    time.sleep(0.05)
+    assert uploader.processed.count(job["document_id"]) == 1
@@ -0,0 +1,92 @@
+import pytest
+
+import job_matcher
+from job_matcher import build_resume_profile, extract_skills, match_jobs
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Built Go microservices", "go"),
+    ("Golang, Python", "go"),
+    ("Owned the CI/CD pipelines", "ci/cd"),
+    ("Maintained build pipelines in Jenkins", "ci/cd"),
+    ("Wrote Dockerfiles for every service", "docker"),
+    ("Designed RESTful services", "rest api"),
+    ("Exposed REST APIs to partners", "rest api"),
+    ("Deployed AWS Lambda functions", "aws"),
+    ("Archived logs to Amazon S3", "aws"),
+])
+def test_skills_recognized(text, skill):
+    assert skill in extract_skills(text)
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Go to market with the sales team", "go"),
+    ("We are the go-to team for reporting", "go"),
+    ("Managed the sales pipelines", "ci/cd"),
+    ("Shipped shipping containers across the port", "docker"),
+    ("Integrated third-party APIs", "rest api"),
+    ("Worked with the rest of the team", "rest api"),
+    ("Taught lambda calculus", "aws"),
+    ("Drove an Audi S3", "aws"),
+])
+def test_skill_false_positives(text, skill):
+    assert skill not in extract_skills(text)
+
+
+def test_each_job_is_parsed_once(monkeypatch):
+    calls = []
+    original = job_matcher.extract_skills
+    monkeypatch.setattr(job_matcher, "extract_skills", lambda text: calls.append(text) or original(text))
+    profiles = [build_resume_profile(f"r{i}", "Python and Azure engineer")[0] for i in range(3)]
+    calls.clear()
+    jobs = [{"description": f"Python developer {i}", "index": i} for i in range(4)]
+
+    results = [result for result, _ in match_jobs(profiles, jobs)]
+
+    assert len(calls) == len(jobs)
+    assert {(r["documentId"], r["jobIndex"]) for r in results} == {(p["id"], j["index"]) for p in profiles for j in jobs}
+
+
+def test_scores_reward_skill_overlap():
+    profile, _ = build_resume_profile("r", "Python, Flask and PostgreSQL on Azure")
+    jobs = [
+        {"description": "Python Flask developer with PostgreSQL", "index": 0},
+        {"description": "Java Spring developer", "index": 1},
+    ]
+    scores = {result["jobIndex"]: result for result, _ in match_jobs([profile], jobs)}
+    assert scores[0]["score"] > scores[1]["score"]
+    assert scores[0]["matchedSkills"] == ["flask", "postgresql", "python"]
+    assert scores[1]["missingSkills"] == ["java"]
+
+
+def _batch(count):
+    profiles = [build_resume_profile(f"r{i}", text)[0] for i, text in enumerate(
+        ["Python, Flask and PostgreSQL on Azure", "Java and Kubernetes on AWS"])]
+    jobs = [{"description": f"{skill} developer, team {i}", "index": i, "title": f"Job {i}"}
+            for i, skill in enumerate(["Python Flask", "Java Spring", "Kubernetes and Terraform"] * (count // 3))]
+    return profiles, jobs
+
+
+def test_large_batches_are_scored_in_processes_with_the_same_results(monkeypatch):
+    profiles, jobs = _batch(30)
+    serial = [result for result, _ in match_jobs(profiles, jobs)]
+
+    monkeypatch.setattr(job_matcher, "MATCH_PROCESSES", 2)
+    monkeypatch.setattr(job_matcher, "MATCH_PARALLEL_MIN_JOBS", 10)
+    monkeypatch.setattr(job_matcher, "_pool", None)
+    try:
+        parallel = list(match_jobs(profiles, jobs))
+        assert job_matcher._pool is not None
+        assert [result for result, _ in parallel] == serial
+        assert all(score_ms >= 0 for _, score_ms in parallel)
+    finally:
+        job_matcher._pool.shutdown()
+
+
+def test_small_batches_stay_on_the_request_thread(monkeypatch):
+    profiles, jobs = _batch(9)
+    monkeypatch.setattr(job_matcher, "MATCH_PROCESSES", 2)
+    monkeypatch.setattr(job_matcher, "MATCH_PARALLEL_MIN_JOBS", 10)
+    monkeypatch.setattr(job_matcher, "_pool", None)
+    assert len(list(match_jobs(profiles, jobs))) == len(profiles) * len(jobs)
+    assert job_matcher._pool is None
@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+import pytest
+
+import openai_client
+from admission import FairQueue
+from model_router import _EWMA_ALPHA, ERROR_HALF_LIFE_SECONDS, MAX_ERROR_RATE, ModelRouter, _parse_policies
+
+
+def _router(spec="internal=fastest:2,trivial=fastest:3,default=requested"):
+    return ModelRouter(policies=_parse_policies(spec), enabled=True)
+
+
+def _fail(router, model, times=10):
+    for _ in range(times):
+        router.record(model, ok=False)
+
+
+def test_policies_parse_with_optional_quality_floor():
+    assert _parse_policies("internal=fastest:2, default=requested,bad") == {
+        "internal": ("fastest", 2), "default": ("requested", None),
+    }
+
+
+def test_classify():
+    router = _router()
+    assert router.classify("keywords", "general", 5000, True) == "internal"
+    assert router.classify("chat", "general", 50, False) == "trivial"
+    assert router.classify("chat", "code", 50, False) == "default"
+    assert router.classify("chat", "general", 50, True) == "default"
+    assert router.classify("chat", "general", 5000, False) == "default"
+
+
+def test_requested_policy_keeps_the_callers_model():
+    model, decision = _router().choose("gpt-4o", 5000, 700)
+    assert model == "gpt-4o"
+    assert (decision["task"], decision["policy"]) == ("default", "requested")
+
+
+def test_fastest_policy_respects_the_quality_floor():
+    router = _router()
+    assert router.choose("gpt-5", 50, 700, route="summary")[0] == "gpt-3.5-turbo"
+    assert router.choose("gpt-5", 50, 700)[0] == "gpt-4o-mini"
+
+
+def test_floor_never_exceeds_the_requested_quality():
+    assert _router("trivial=fastest:5").choose("gpt-3.5-turbo", 50, 700)[0] == "gpt-3.5-turbo"
+
+
+def test_cheapest_policy_ranks_by_cost_before_latency():
+    # gpt-5 is the slowest of the quality-4+ models but the cheapest for a long prompt
+    assert _router("default=cheapest:4").choose("gpt-4.1", 5000, 700)[0] == "gpt-5"
+    assert _router("default=fastest:4").choose("gpt-4.1", 5000, 700)[0] == "gpt-4o"
+
+
+def test_requested_model_too_small_moves_to_one_that_fits():
+    model, decision = _router().choose("gpt-3.5-turbo", 50_000, 700, mode="code")
+    assert model == "gpt-4o-mini"
+    assert decision["reason"].startswith("requested model unhealthy or too small")
+
+
+def test_no_model_fits_keeps_the_requested_one():
+    model, decision = _router().choose("gpt-4o", 5_000_000, 700)
+    assert model == "gpt-4o"
+    assert decision["reason"] == "no model fits; keeping requested"
+
+
+def test_unknown_model_falls_back_to_the_default_and_says_so():
+    model, decision = _router().choose("gpt-9", 5000, 700)
+    assert model == "gpt-5"
+    assert decision["reason"].endswith("unknown model 'gpt-9'")
+
+
+def test_latency_is_an_ewma_of_successes():
+    router = _router()
+    prior = router.snapshot()["models"]["gpt-4o"]["latency_seconds"]
+    router.record("gpt-4o", 14.0)
+    router.record("gpt-4o", 60.0, ok=False)  # failures carry no latency sample
+    router.record("unknown-model", 1.0)
+    models = router.snapshot()["models"]
+    assert models["gpt-4o"]["latency_seconds"] == round(prior + _EWMA_ALPHA * (14.0 - prior), 3)
+    assert models["gpt-4o"]["calls"] == 2
+
+
+def test_failing_model_is_skipped_until_its_error_rate_decays():
+    router = _router()
+    _fail(router, "gpt-4o-mini")
+    assert router.snapshot()["models"]["gpt-4o-mini"]["error_rate"] > MAX_ERROR_RATE
+    assert router.choose("gpt-5", 50, 700)[0] == "gpt-4.1-mini"
+
+    # No new samples arrive while it is skipped; time alone brings it back
+    router._stats["gpt-4o-mini"].error_updated -= 5 * ERROR_HALF_LIFE_SECONDS
+    assert router.choose("gpt-5", 50, 700)[0] == "gpt-4o-mini"
+
+
+def test_requested_model_failing_moves_to_the_fastest_healthy_one_of_its_quality():
+    router = _router()
+    _fail(router, "gpt-4o")
+    model, decision = router.choose("gpt-4o", 5000, 700)
+    assert model == "gpt-4.1"
+    assert decision["reason"].startswith("requested model unhealthy")
+
+
+def test_disabled_router_keeps_the_requested_model():
+    router = ModelRouter(policies=_parse_policies("trivial=fastest"), enabled=False)
+    assert router.choose("gpt-5", 50, 700) == ("gpt-5", router.snapshot()["decisions"][0])
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def failing_sdk(monkeypatch):
+    """OpenAI client whose completions fail with sdk.status; returns (sdk, router)."""
+    router = _router("default=requested")
+    sdk = SimpleNamespace(status=400)
+
+    def create(**kwargs):
+        raise _StatusError(sdk.status)
+
+    sdk.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+    monkeypatch.setattr(openai_client, "model_router", router)
+    monkeypatch.setattr(openai_client, "llm_queue", FairQueue("test", concurrency=2, timeout=5, weights={}))
+    monkeypatch.setattr(openai_client, "_sdk_client", lambda api_key: sdk)
+    monkeypatch.setattr(openai_client, "log_token_usage", lambda *args: None)
+    return sdk, router
+
+
+def test_rejected_requests_do_not_count_against_the_model(failing_sdk):
+    sdk, router = failing_sdk
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    with pytest.raises(_StatusError):
+        client.chat_completion("x" * 2000, model="gpt-4o", mode="code")
+    assert router.snapshot()["models"]["gpt-4o"]["error_rate"] == 0
+
+    sdk.status = 503
+    with pytest.raises(_StatusError):
+        client.chat_completion("y" * 2000, model="gpt-4o", mode="code")
+    assert router.snapshot()["models"]["gpt-4o"]["error_rate"] == _EWMA_ALPHA
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+
+import profiler
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _busy_work(seconds=0.2):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+def test_cpu_profile_names_the_work():
+    with profiler.profile("busy request") as p:
+        _busy_work()
+    meta = profiler.load(p.id)
+    assert meta["name"] == "busy request" and meta["samples"] > 0
+    with open(profiler.artifact_path(p.id, "cpu")) as f:
+        assert "_busy_work (test_profiler.py" in f.read()
+
+
+def test_memory_profile_reports_an_allocation_spike():
+    with profiler.profile("upload", ("memory",)) as p:
+        spike = [bytearray(1024) for _ in range(10 * 1024)]
+        del spike
+    meta = profiler.load(p.id)
+    assert meta["memory"]["peak_bytes"] >= 10 * 2**20
+    assert profiler.artifact_path(p.id, "memory") is not None
+    assert profiler.artifact_path(p.id, "cpu") is None
+
+
+def test_ring_stays_bounded(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_RING_SIZE", 3)
+    for i in range(5):
+        with profiler.profile(f"request {i}", ("cpu", "memory")):
+            pass
+    assert len(profiler.list_profiles()) == 3
+    assert len(os.listdir(profile_dir)) == 3 * (1 + len(profiler.ARTIFACTS))
+
+
+def test_sampler_stops_when_no_profile_is_active():
+    with profiler.profile("short"):
+        _busy_work(0.05)
+    time.sleep(profiler._sampler.interval * 5)
+    assert not profiler._sampler._running
+
+
+@pytest.mark.parametrize("profile_id", ["../../etc/passwd", "20260101T000000-zzzzzzzz", ""])
+def test_malformed_ids_are_rejected(profile_id):
+    assert profiler.load(profile_id) is None
+    assert profiler.artifact_path(profile_id, "cpu") is None
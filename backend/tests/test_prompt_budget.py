@@ -0,0 +1,59 @@
+import sys
+from types import SimpleNamespace
+
+from prompt_budget import (
+    MIN_COMPLETION_TOKENS, TRUNCATION_MARKER, context_window, count_tokens, get_encoding, plan_completion,
+)
+
+
+def test_completion_keeps_desired_budget_when_it_fits():
+    prompt, _, completion = plan_completion("Be brief.", "Hello", "gpt-4o", 700)
+    assert prompt == "Hello"
+    assert completion == 700
+
+
+def test_completion_shrinks_to_remaining_window():
+    window = context_window("gpt-3.5-turbo")
+    prompt = "word " * (window * 4 // 5)
+    _, prompt_tokens, completion = plan_completion("", prompt, "gpt-3.5-turbo", 8000)
+    assert MIN_COMPLETION_TOKENS <= completion < 8000
+    assert prompt_tokens + completion <= window
+
+
+def test_oversized_prompt_is_trimmed_keeping_the_tail():
+    prompt = "context " * 40000 + "QUESTION?"
+    trimmed, prompt_tokens, completion = plan_completion("", prompt, "gpt-3.5-turbo", 700)
+    assert TRUNCATION_MARKER in trimmed
+    assert trimmed.endswith("QUESTION?")
+    assert completion >= MIN_COMPLETION_TOKENS
+    assert prompt_tokens + completion <= context_window("gpt-3.5-turbo")
+    assert count_tokens(trimmed, "gpt-3.5-turbo") < count_tokens(prompt, "gpt-3.5-turbo")
+
+
+def test_tokenizer_that_fails_to_load_falls_back_to_an_estimate(monkeypatch):
+    def offline(name):
+        raise ConnectionError("BPE download blocked")
+
+    tiktoken = SimpleNamespace(encoding_for_model=offline, get_encoding=offline)
+    monkeypatch.setitem(sys.modules, "tiktoken", tiktoken)
+    get_encoding.cache_clear()
+    try:
+        assert get_encoding("gpt-4o") is None
+        assert count_tokens("x" * 400, "gpt-4o") == 100
+        prompt, _, completion = plan_completion("Be brief.", "Hello", "gpt-4o", 700)
+        assert (prompt, completion) == ("Hello", 700)
+    finally:
+        get_encoding.cache_clear()
+
+
+def test_unknown_model_uses_the_o200k_vocabulary(monkeypatch):
+    def encoding_for_model(model):
+        raise KeyError(model)
+
+    tiktoken = SimpleNamespace(encoding_for_model=encoding_for_model, get_encoding=lambda name: name)
+    monkeypatch.setitem(sys.modules, "tiktoken", tiktoken)
+    get_encoding.cache_clear()
+    try:
+        assert get_encoding("gpt-9") == "o200k_base"
+    finally:
+        get_encoding.cache_clear()
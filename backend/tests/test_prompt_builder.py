@@ -0,0 +1,92 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import openai_client
+from admission import FairQueue
+from db_manager import get_token_usage_summary
+from model_router import ModelRouter
+from prompt_builder import DOCUMENT_CONTEXT_HEADER, build_messages, document_context, document_question
+from tracing import counter_value
+
+SYSTEM = "You are a helpful assistant."
+DOCUMENTS = [("resume.txt", "Python, Azure, Kubernetes."), ("cover.txt", "Dear hiring manager,")]
+
+
+def _serialized(messages):
+    return json.dumps(messages, ensure_ascii=False).encode("utf-8")
+
+
+def test_static_prefix_is_byte_identical_across_turns():
+    context = document_context(DOCUMENTS)
+    first = build_messages(SYSTEM, document_question("What skills?"), [], context)
+    history = [{"role": "user", "content": "What skills?"}, {"role": "assistant", "content": "Python and Azure."}]
+    second = build_messages(SYSTEM, document_question("Any cloud experience?"), history, context)
+
+    assert first[:-1] == second[:2]
+    # Everything before the new question serializes to the same bytes
+    prefix = _serialized(first[:-1])[:-1]
+    assert _serialized(second).startswith(prefix)
+    assert [m["content"] for m in second[2:4]] == [m["content"] for m in history]
+    assert second[-1]["content"].endswith("User question: Any cloud experience?")
+
+
+def test_document_context_ignores_the_order_documents_were_listed_in():
+    assert document_context(DOCUMENTS) == document_context(DOCUMENTS[::-1])
+    assert document_context(DOCUMENTS).startswith(DOCUMENT_CONTEXT_HEADER)
+
+
+def test_question_comes_after_the_fixed_instructions():
+    assert document_question("Q1").split("User question:")[0] == document_question("Q2").split("User question:")[0]
+
+
+class _SDK:
+    """Records the messages of each completion; replies with usage reporting cached prompt tokens."""
+
+    def __init__(self, cached_tokens):
+        self.cached_tokens = cached_tokens
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs["messages"])
+        usage = SimpleNamespace(prompt_tokens=2048, completion_tokens=100,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=self.cached_tokens))
+        message = SimpleNamespace(content=f"answer {len(self.requests)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    fake = _SDK(cached_tokens=1536)
+    monkeypatch.setattr(openai_client, "_sdk_client", lambda api_key: fake)
+    monkeypatch.setattr(openai_client, "model_router", ModelRouter(policies={"default": ("requested", None)}))
+    monkeypatch.setattr(openai_client, "llm_queue", FairQueue("test", concurrency=2, timeout=5, weights={}))
+    return fake
+
+
+def test_completions_share_a_prefix_across_turns(sdk):
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    context = document_context(DOCUMENTS)
+    client.chat_completion(document_question("What skills?"), model="gpt-4o", route="chat_prefix_test",
+                           context=context)
+    history = [{"role": "user", "content": "What skills?"}, {"role": "assistant", "content": "answer 1"}]
+    client.chat_completion(document_question("Any cloud?"), model="gpt-4o", route="chat_prefix_test",
+                           history=history, context=context)
+
+    first, second = sdk.requests
+    assert first[:2] == second[:2] == [{"role": "system", "content": first[0]["content"]},
+                                       {"role": "user", "content": context}]
+    assert second[2:4] == history
+
+
+def test_cached_prompt_tokens_are_recorded(sdk):
+    before = counter_value("llm_cached_prompt_tokens_total", model="gpt-4o", route="chat_cache_test")
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    client.chat_completion("Hello there", model="gpt-4o", route="chat_cache_test")
+
+    usage = next(row for row in get_token_usage_summary() if row["route"] == "chat_cache_test")
+    assert (usage["prompt_tokens"], usage["cached_tokens"], usage["completion_tokens"]) == (2048, 1536, 100)
+    assert usage["cache_hit_rate"] == 0.75
+    assert counter_value("llm_cached_prompt_tokens_total", model="gpt-4o", route="chat_cache_test") - before == 1536
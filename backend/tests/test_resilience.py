@@ -0,0 +1,206 @@
+import threading
+import time
+
+import pytest
+
+from openai_client import completion_timeout_policy
+from resilience import AdaptiveTimeout, CircuitBreaker, CircuitOpenError, Upstream
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    """Named like the OpenAI SDK's timeout."""
+
+
+def _fail(timeout):
+    return _Response(503)
+
+
+def _ok(timeout):
+    return _Response(200)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    upstream = Upstream("t-open", failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        upstream.call("op", _fail)
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        upstream.call("op", _ok)
+
+
+def test_half_open_probe_closes_on_success():
+    upstream = Upstream("t-probe", failure_threshold=1, reset_timeout=0.05)
+    upstream.call("op", _fail)
+    time.sleep(0.06)
+    upstream.call("op", _ok)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("t-single", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_client_errors_do_not_count():
+    upstream = Upstream("t-4xx", failure_threshold=1)
+
+    def bad_request(timeout):
+        raise _StatusError(400)
+
+    with pytest.raises(_StatusError):
+        upstream.call("op", bad_request)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_uncounted_timeouts_leave_breaker_closed_and_raise_timeout():
+    upstream = Upstream("t-timeout", failure_threshold=2)
+
+    def slow(timeout):
+        raise APITimeoutError()
+
+    for _ in range(5):
+        with pytest.raises(APITimeoutError):
+            upstream.call("op", slow, max_timeout=5, min_timeout=0.1, count_timeouts=False)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+    # Each timeout is a latency sample, so the learned timeout doesn't stay pinned at the floor
+    assert len(upstream.timeout_for("op", 5)._samples) == 5
+
+
+def test_counted_timeouts_open_breaker():
+    upstream = Upstream("t-timeout-counted", failure_threshold=2)
+
+    def slow(timeout):
+        raise TimeoutError()
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            upstream.call("op", slow)
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+
+
+def test_uncounted_timeout_releases_half_open_probe():
+    upstream = Upstream("t-timeout-probe", failure_threshold=1, reset_timeout=0.01)
+    upstream.call("op", _fail)
+    time.sleep(0.02)
+
+    def slow(timeout):
+        raise APITimeoutError()
+
+    with pytest.raises(APITimeoutError):
+        upstream.call("op", slow, count_timeouts=False)
+    upstream.call("op", _ok)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_adaptive_timeout_tracks_percentile_within_bounds():
+    timeout = AdaptiveTimeout(initial=30, min_timeout=0.5, max_timeout=30, min_samples=20)
+    assert timeout.current() == 30
+    for _ in range(50):
+        timeout.observe(0.1)
+    assert timeout.current() == 0.5
+    for _ in range(200):
+        timeout.observe(20)
+    assert timeout.current() == 30
+
+
+def test_call_floor_overrides_learned_timeout():
+    upstream = Upstream("t-floor")
+    for _ in range(50):
+        upstream.call("op", _ok, max_timeout=600, min_timeout=0.01)
+    seen = []
+    upstream.call("op", lambda timeout: seen.append(timeout) or _Response(200), max_timeout=600, min_timeout=100)
+    assert seen == [100]
+
+
+def test_timeouts_are_learned_per_op():
+    upstream = Upstream("t-ops")
+    assert upstream.timeout_for("a", 10) is not upstream.timeout_for("b", 10)
+
+
+def test_completion_timeouts_keyed_and_scaled_by_length():
+    short_op, short_floor, short_counted = completion_timeout_policy("gpt-4o-mini", "keywords", 60)
+    long_op, long_floor, long_counted = completion_timeout_policy("gpt-4o", "chat", 4000)
+    assert short_op != long_op
+    assert short_floor == 30
+    assert long_floor > 30
+    assert short_counted and not long_counted
+
+
+def test_hedged_loser_failure_is_recorded():
+    upstream = Upstream("t-hedge", failure_threshold=100)
+    for _ in range(30):
+        upstream.call("op", _ok, hedge=True)
+    calls = []
+    release = threading.Event()
+
+    def flaky(timeout):
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            raise _StatusError(503)
+        return _Response(200)
+
+    assert upstream.call("op", flaky, hedge=True).status_code == 200
+    release.set()
+    deadline = time.monotonic() + 2
+    while upstream.breaker.failures == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert upstream.breaker.failures == 1
+
+
+def test_hedged_error_reaches_breaker():
+    upstream = Upstream("t-hedge-error", failure_threshold=1)
+    for _ in range(30):
+        upstream.call("op", _ok, hedge=True)
+
+    def broken(timeout):
+        time.sleep(0.01)
+        raise _StatusError(502)
+
+    with pytest.raises(_StatusError):
+        upstream.call("op", broken, hedge=True)
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+
+
+def test_calls_get_the_learned_timeout_not_the_ceiling():
+    upstream = Upstream("t-learned")
+    for _ in range(50):
+        upstream.call("op", _ok, max_timeout=30, min_timeout=0.1)
+    seen = []
+    upstream.call("op", lambda timeout: seen.append(timeout) or _Response(200), max_timeout=30, min_timeout=0.1)
+    assert seen[0] < 1
+
+
+def test_hedge_answers_from_the_faster_attempt():
+    upstream = Upstream("t-hedge-fast")
+    for _ in range(30):
+        upstream.call("op", _ok, hedge=True)
+    calls = []
+    release = threading.Event()
+
+    def stalls_once(timeout):
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+        return _Response(200)
+
+    start = time.monotonic()
+    assert upstream.call("op", stalls_once, hedge=True).status_code == 200
+    assert time.monotonic() - start < 1
+    assert len(calls) == 2
+    release.set()
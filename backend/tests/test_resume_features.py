@@ -0,0 +1,65 @@
+import pytest
+
+import openai_client
+import resume_features
+from file_uploader import FileUploader
+from prompt_budget import count_tokens
+from resume_features import compute_features, is_fresh, segment_sections
+
+RESUME = """Jane Doe
+Summary
+Backend engineer.
+Experience
+Built Python and Azure services.
+Skills
+Python, Docker, PostgreSQL
+"""
+
+
+@pytest.fixture
+def no_embeddings(monkeypatch):
+    def fail(text):
+        raise AssertionError("embedding requested")
+
+    monkeypatch.setattr(resume_features, "_embed", fail)
+
+
+def test_features_are_local_by_default(no_embeddings):
+    features = compute_features(RESUME)
+    assert features["embedding"] is None
+    assert features["skills"] == ["azure", "docker", "postgresql", "python"]
+    assert is_fresh(features, RESUME) and not is_fresh(features, RESUME + "x")
+
+
+def test_sections_follow_headings():
+    names = [section["name"] for section in segment_sections(RESUME)]
+    assert names == ["header", "summary", "experience", "skills"]
+
+
+def test_stale_features_are_recomputed_without_embedding(tmp_path, no_embeddings):
+    uploader = FileUploader(str(tmp_path / "uploads"))
+    document_id, path = uploader.store_upload(RESUME.encode(), "resume.txt")
+    uploader.process_stored_file(document_id, "resume.txt", path)
+    uploader.documents.set_features(document_id, {"version": 0})
+
+    features = uploader.get_document_features(document_id)
+
+    assert features["embedding"] is None
+    assert is_fresh(features, uploader.documents.get(document_id)["content"])
+
+
+def test_embedding_input_is_token_budgeted(monkeypatch):
+    seen = {}
+
+    class _Embeddings:
+        def create(self, model, input):
+            seen["input"] = input
+            return type("R", (), {"data": [type("D", (), {"embedding": [0.1]})()]})()
+
+    client = openai_client.OpenAIClient(api_key="sk-test")
+    client._client = type("C", (), {"embeddings": _Embeddings()})()
+    monkeypatch.setattr(openai_client, "EMBEDDING_MAX_INPUT_TOKENS", 100)
+
+    client.embed("word " * 5000)
+
+    assert count_tokens(seen["input"], "text-embedding-3-small") <= 100
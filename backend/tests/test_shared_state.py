@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+
+import pytest
+
+from admission import RateLimitedError, RateLimiter
+from shared_state import SharedCounters, SharedTokenCache
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in separate interpreters against the same database file, as gunicorn workers would
+_WORKER = textwrap.dedent("""
+    import sys
+    from admission import RateLimitedError, RateLimiter
+    from shared_state import SharedCounters
+
+    namespace, key, increments = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    counters = SharedCounters(namespace)
+    limiter = RateLimiter(per_minute=0.001, burst=50)
+    granted = 0
+    for _ in range(increments):
+        counters.incr("hits")
+        try:
+            limiter.acquire(key)
+            granted += 1
+        except RateLimitedError:
+            pass
+    print(granted)
+""")
+
+
+def _run_workers(count, *args):
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _WORKER, *map(str, args)], cwd=BACKEND_DIR, env=os.environ.copy(),
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    outputs = [proc.communicate(timeout=60) for proc in procs]
+    assert all(proc.returncode == 0 for proc in procs), [err for _, err in outputs]
+    return [int(out) for out, _ in outputs]
+
+
+def test_two_processes_share_counters_and_rate_limits():
+    namespace, key = uuid.uuid4().hex, f"user-{uuid.uuid4().hex}"
+    granted = _run_workers(2, namespace, key, 200)
+    # Neither process lost an increment, and the bucket was not double-spent
+    assert SharedCounters(namespace).get("hits") == 400
+    assert sum(granted) == 50
+    # This process sees the same bucket, now empty
+    with pytest.raises(RateLimitedError):
+        RateLimiter(per_minute=0.001, burst=50).acquire(key)
+
+
+def test_token_written_by_one_process_is_read_by_another():
+    key = f"scope-{uuid.uuid4().hex}"
+    script = ("import time; from shared_state import SharedTokenCache; "
+              f"SharedTokenCache().put({key!r}, 'tok', time.time() + 3600)")
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=os.environ.copy(), check=True, timeout=60)
+    assert SharedTokenCache().get(key) == "tok"
+
+
+def test_forked_child_opens_its_own_connection():
+    namespace = uuid.uuid4().hex
+    counters = SharedCounters(namespace)
+    counters.incr("hits")  # the parent's thread now holds a connection
+    pid = os.fork()
+    if pid == 0:
+        try:
+            counters.incr("hits")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert counters.get("hits") == 2
@@ -0,0 +1,84 @@
+import threading
+
+from singleflight import SingleFlight, request_key
+from tracing import counter_value
+
+
+def _fire(callers, call):
+    """Run call on `callers` threads released together; returns their results or exception names."""
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = type(e).__name__
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class _Upstream:
+    """Counts calls; each one blocks until released so duplicates overlap it."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return f"result {self.calls}"
+
+
+def _release_when_waiting(flight, upstream, waiters):
+    def release():
+        while counter_value("singleflight_coalesced_total", group=flight.name) < waiters:
+            threading.Event().wait(0.005)
+        upstream.release.set()
+
+    threading.Thread(target=release, daemon=True).start()
+
+
+def test_duplicate_callers_share_one_upstream_call():
+    flight = SingleFlight("test-share")
+    upstream = _Upstream()
+    _release_when_waiting(flight, upstream, 15)
+
+    results = _fire(16, lambda: flight.do(request_key("GET", "/documents/doc-1", None), upstream))
+
+    assert upstream.calls == 1
+    assert results == ["result 1"] * 16
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight("test-error")
+    upstream = _Upstream(error=ConnectionError("upstream down"))
+    _release_when_waiting(flight, upstream, 7)
+
+    results = _fire(8, lambda: flight.do("key", upstream))
+
+    assert upstream.calls == 1
+    assert results == ["ConnectionError"] * 8
+
+
+def test_later_calls_are_not_served_a_finished_result():
+    flight = SingleFlight("test-sequential")
+    upstream = _Upstream()
+    upstream.release.set()
+    assert flight.do("key", upstream) == "result 1"
+    assert flight.do("key", upstream) == "result 2"
+
+
+def test_request_key_ignores_dict_order():
+    assert request_key("POST", {"a": 1, "b": 2}) == request_key("POST", {"b": 2, "a": 1})
+    assert request_key("POST", {"a": 1}) != request_key("POST", {"a": 2})
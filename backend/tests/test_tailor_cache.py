@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+import tailor_cache
+from shared_state import connect
+from tailor_cache import TailorCache, tailor_key
+
+RESUME = "Jane Doe\nSenior engineer, Python and Azure."
+JOB = "We need a Python engineer with Kubernetes experience."
+
+
+def test_key_ignores_whitespace_unicode_form_and_skill_order():
+    key = tailor_key(RESUME, JOB, ["Python", "Azure"], ["Kubernetes"], "agent")
+    assert tailor_key(f"  {RESUME.replace(' ', '   ')}\r\n", JOB.replace(" ", "\t"),
+                      ["azure", " PYTHON ", "Python", ""], ["kubernetes"], "agent") == key
+    # Full-width letters fold to ASCII under NFKC
+    assert tailor_key(RESUME.replace("Python", "Ｐｙｔｈｏｎ"), JOB, ["Python", "Azure"], ["Kubernetes"], "agent") == key
+
+
+def test_key_changes_with_content_skills_and_model():
+    key = tailor_key(RESUME, JOB, ["Python"], ["Kubernetes"], "agent")
+    assert tailor_key(RESUME + " Go.", JOB, ["Python"], ["Kubernetes"], "agent") != key
+    assert tailor_key(RESUME, JOB, ["Python"], ["Kubernetes", "Go"], "agent") != key
+    # A skill moving from missing to matched is a different request
+    assert tailor_key(RESUME, JOB, ["Python", "Kubernetes"], [], "agent") != key
+    assert tailor_key(RESUME, JOB, ["Python"], ["Kubernetes"], "other-agent") != key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Empties the cache table and drives tailor_cache's time.time(); advance with clock.now += seconds."""
+    connect().execute("DELETE FROM tailor_cache")
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(tailor_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_put_then_get(clock):
+    cache = TailorCache()
+    assert cache.get("k") is None
+    cache.put("k", "Add Kubernetes to your skills.", latency=12.5)
+    assert cache.get("k") == "Add Kubernetes to your skills."
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TailorCache(ttl=60)
+    cache.put("k", "suggestions", latency=1.0)
+    clock.now += 59
+    assert cache.get("k") == "suggestions"
+    clock.now += 2
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entry_is_evicted_at_the_row_cap(clock):
+    cache = TailorCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, f"suggestions {key}", latency=1.0)
+        clock.now += 1
+    cache.get("a")  # b is now least recently used
+    clock.now += 1
+    cache.put("c", "suggestions c", latency=1.0)
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["suggestions a", None, "suggestions c"]
+    assert connect().execute("SELECT COUNT(*) FROM tailor_cache").fetchone()[0] == 2
+
+
+def test_expired_entries_are_dropped_on_put(clock):
+    cache = TailorCache(ttl=60)
+    cache.put("old", "suggestions", latency=1.0)
+    clock.now += 120
+    cache.put("new", "suggestions", latency=1.0)
+    keys = [row[0] for row in connect().execute("SELECT key FROM tailor_cache")]
+    assert keys == ["new"]
@@ -0,0 +1,76 @@
+import pytest
+
+import text_ingest
+from file_uploader import FileUploader
+from shared_state import connect
+from text_ingest import _unique_columns
+
+
+@pytest.fixture
+def uploader(tmp_path):
+    return FileUploader(upload_folder=str(tmp_path / "uploads"))
+
+
+def _upload(uploader, filename, data):
+    document_id, path = uploader.store_upload(data.encode(), filename)
+    return uploader.process_stored_file(document_id, filename, path)
+
+
+def _stored_pages(document_id):
+    return connect().execute("SELECT COUNT(*) FROM document_rows WHERE document_id = ?", (document_id,)).fetchone()[0]
+
+
+def test_generated_column_names_do_not_take_real_headers():
+    assert _unique_columns(["", "column_1", "name", "name"]) == ["column_1_2", "column_1", "name", "name_2"]
+
+
+def test_ragged_rows_do_not_overwrite_real_columns(uploader):
+    info = _upload(uploader, "ragged.csv", "column_3,id\n1,2\n3,4,extra\n")
+    assert [c["name"] for c in info["stats"]["columns"]] == ["column_3", "id", "column_3_2"]
+    rows = uploader.get_document_rows(info["id"])["rows"]
+    assert rows[1] == {"column_3": "3", "id": "4", "column_3_2": "extra"}
+
+
+def test_large_text_is_stored_once(uploader, monkeypatch):
+    monkeypatch.setattr(text_ingest, "TEXT_PAGE_CHARS", 100)
+    monkeypatch.setattr(text_ingest, "MAX_INLINE_CONTENT_CHARS", 250)
+    text = "".join(f"line {i:04d}\n" for i in range(50))  # 500 characters, 5 pages
+    info = _upload(uploader, "notes.txt", text)
+
+    assert info["stats"]["pages"] == 5 and info["stats"]["inline_pages"] == 2
+    assert info["stats"]["truncated"]
+    assert info["content"].startswith(text[:200]) and text[200:] not in info["content"]
+    assert _stored_pages(info["id"]) == 3
+    pages = uploader.get_document_rows(info["id"], offset=0, limit=10)["rows"]
+    assert "".join(page["text"] for page in pages) == text
+    assert uploader.get_document_rows(info["id"], offset=1, limit=2)["rows"] == [{"text": text[100:200]},
+                                                                                 {"text": text[200:300]}]
+
+
+def test_small_text_needs_no_stored_pages(uploader):
+    info = _upload(uploader, "short.txt", "just a few words\n")
+    assert info["content"] == "just a few words"
+    assert not info["stats"]["truncated"]
+    assert _stored_pages(info["id"]) == 0
+    assert uploader.get_document_rows(info["id"])["rows"] == [{"text": "just a few words"}]
+
+
+def test_csv_rows_are_stored_and_pageable(uploader, monkeypatch):
+    monkeypatch.setattr(text_ingest, "ROW_BATCH_SIZE", 7)
+    data = "job_id,title,salary\n" + "".join(f"{i},Engineer {i},{50_000 + i}\n" for i in range(50))
+    info = _upload(uploader, "jobs.csv", data)
+
+    assert info["stats"]["rows"] == 50
+    assert info["stats"]["columns"][2]["type"] == "numeric"
+    assert uploader.get_document_rows(info["id"], offset=49, limit=5)["rows"] == [
+        {"job_id": "49", "title": "Engineer 49", "salary": "50049"}]
+
+
+def test_text_counts_match_the_file(uploader, monkeypatch):
+    monkeypatch.setattr(text_ingest, "READ_CHUNK_BYTES", 16)  # words and characters split across chunks
+    text = "naïve café résumé\n" * 20 + "no trailing newline"
+    info = _upload(uploader, "counts.txt", text)
+    assert info["stats"]["bytes"] == len(text.encode())
+    assert info["stats"]["chars"] == len(text)
+    assert info["stats"]["words"] == len(text.split())
+    assert info["stats"]["lines"] == 21
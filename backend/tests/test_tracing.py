@@ -0,0 +1,120 @@
+import json
+from collections import deque
+
+import pytest
+
+import tracing
+from tracing import observe, recent_spans, register_gauge, render_prometheus, set_gauge, span
+
+
+@pytest.fixture
+def trace(monkeypatch):
+    """Fresh ring buffer and a trace id for the spans recorded in the test."""
+    monkeypatch.setattr(tracing, "_ring", deque(maxlen=tracing.TRACE_RING_SIZE))
+    token = tracing._current_trace.set("trace-1")
+    yield "trace-1"
+    tracing._current_trace.reset(token)
+
+
+def test_nested_spans_record_their_parent(trace):
+    with span("request"):
+        with span("db.query", table="chatlog"):
+            pass
+        with span("openai.completion"):
+            pass
+    # Spans are recorded as they end, so the enclosing one is newest
+    request, completion, query = recent_spans(trace_id=trace)
+    assert [s["name"] for s in (request, query, completion)] == ["request", "db.query", "openai.completion"]
+    assert request["parent_id"] is None
+    assert query["parent_id"] == completion["parent_id"] == request["span_id"]
+    assert len({request["span_id"], query["span_id"], completion["span_id"]}) == 3
+    assert {s["trace_id"] for s in (request, query, completion)} == {trace}
+    assert query["attrs"] == {"table": "chatlog"}
+
+
+def test_parent_is_restored_after_a_span_ends(trace):
+    with span("first"):
+        pass
+    with span("second"):
+        pass
+    assert [s["parent_id"] for s in recent_spans(trace_id=trace)] == [None, None]
+
+
+def test_failed_span_records_the_error(trace):
+    with pytest.raises(ValueError):
+        with span("parse"):
+            raise ValueError("bad input")
+    assert recent_spans(trace_id=trace)[0]["error"] == "ValueError"
+
+
+def test_ring_buffer_keeps_the_newest_spans(monkeypatch, trace):
+    monkeypatch.setattr(tracing, "_ring", deque(maxlen=3))
+    for i in range(5):
+        with span(f"step {i}"):
+            pass
+    assert [s["name"] for s in recent_spans()] == ["step 4", "step 3", "step 2"]
+    assert [s["name"] for s in recent_spans(limit=1)] == ["step 4"]
+    assert recent_spans(trace_id="other-trace") == []
+
+
+def test_prometheus_histogram_buckets_sum_and_count():
+    observe("test_render_seconds", 0.003, labels=(("route", "/chat"),))
+    observe("test_render_seconds", 0.2, labels=(("route", "/chat"),))
+    observe("test_render_seconds", 500.0, labels=(("route", "/chat"),))
+    lines = render_prometheus().splitlines()
+    series = [line for line in lines if line.startswith("test_render_seconds")]
+
+    assert lines.count("# TYPE test_render_seconds histogram") == 1
+    assert 'test_render_seconds_bucket{route="/chat",le="0.001"} 0' in series
+    assert 'test_render_seconds_bucket{route="/chat",le="0.005"} 1' in series
+    assert 'test_render_seconds_bucket{route="/chat",le="0.25"} 2' in series
+    assert 'test_render_seconds_bucket{route="/chat",le="120.0"} 2' in series
+    assert 'test_render_seconds_bucket{route="/chat",le="+Inf"} 3' in series
+    assert 'test_render_seconds_count{route="/chat"} 3' in series
+    assert any(line.startswith('test_render_seconds_sum{route="/chat"} 500.20') for line in series)
+    assert len(series) == len(tracing.BUCKETS) + 3
+
+
+def test_prometheus_span_histogram_is_labelled_by_span_name(trace):
+    with span("test.render.span"):
+        pass
+    assert 'app_span_duration_seconds_count{span="test.render.span"} 1' in render_prometheus().splitlines()
+
+
+def test_prometheus_escapes_label_values():
+    tracing.inc("test_render_total", route='say "hi"\\\n')
+    assert 'test_render_total{route="say \\"hi\\"\\\\\\n"} 1' in render_prometheus().splitlines()
+
+
+def test_prometheus_gauges():
+    set_gauge("test_render_queue_depth", 4, queue="llm")
+    register_gauge("test_render_ratio", lambda: 0.5)
+    register_gauge("test_render_broken", lambda: 1 / 0)
+    lines = render_prometheus().splitlines()
+    assert "# TYPE test_render_queue_depth gauge" in lines
+    assert 'test_render_queue_depth{queue="llm"} 4' in lines
+    assert "test_render_ratio 0.5" in lines
+    assert not any(line.startswith("test_render_broken") for line in lines)
+
+
+def test_exporter_appends_json_lines_and_rotates(monkeypatch, tmp_path, trace):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+    monkeypatch.setattr(tracing, "_exporter_started", True)  # flushed by hand below
+    monkeypatch.setattr(tracing, "_pending_export", deque())
+
+    with span("outer", user="u1"):
+        with span("inner"):
+            pass
+    tracing.flush()
+    inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert inner["parent_id"] == outer["span_id"] and inner["trace_id"] == trace
+    assert outer["attrs"] == {"user": "u1"} and outer["duration_ms"] >= 0
+
+    monkeypatch.setattr(tracing, "TRACE_FILE_MAX_BYTES", 10)
+    with span("after rotation"):
+        pass
+    tracing.flush()
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["after rotation"]
+    assert len((tmp_path / "traces.jsonl.1").read_text().splitlines()) == 2
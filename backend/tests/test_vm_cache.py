@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+
+from vm_cache import VMResponseCache
+
+
+def _response(content=b"[]", status=200, etag=None):
+    headers = {"Content-Type": "application/json"}
+    if etag:
+        headers["ETag"] = etag
+    return SimpleNamespace(status_code=status, content=content, headers=headers)
+
+
+class _Upstream:
+    """Answers fetches in order from responses; records the If-None-Match each one sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.etags = []
+
+    def __call__(self, etag):
+        self.etags.append(etag)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _expire(cache, user_id, path):
+    cache._entries[(user_id, path)]["expires_at"] = 0
+
+
+def test_fresh_entries_are_hits():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]'))
+    assert cache.fetch("u1", "/documents", upstream) == (b'["a"]', 200, "application/json")
+    assert cache.fetch("u1", "/documents", upstream) == (b'["a"]', 200, "application/json")
+    assert upstream.etags == [None]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_are_per_user():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]'), _response(b'["b"]'))
+    cache.fetch("u1", "/documents", upstream)
+    assert cache.fetch("u2", "/documents", upstream)[0] == b'["b"]'
+
+
+def test_expired_entry_is_revalidated_with_its_etag():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]', etag='"v1"'), _response(b"", status=304))
+    cache.fetch("u1", "/documents", upstream)
+    _expire(cache, "u1", "/documents")
+
+    assert cache.fetch("u1", "/documents", upstream)[0] == b'["a"]'
+    assert upstream.etags == [None, '"v1"']
+    # The 304 refreshed the entry, so the next read is a plain hit
+    assert cache.fetch("u1", "/documents", upstream)[0] == b'["a"]'
+    assert len(upstream.etags) == 2
+
+
+def test_changed_upstream_replaces_the_entry():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]', etag='"v1"'), _response(b'["a","b"]', etag='"v2"'))
+    cache.fetch("u1", "/documents", upstream)
+    _expire(cache, "u1", "/documents")
+    assert cache.fetch("u1", "/documents", upstream)[0] == b'["a","b"]'
+    assert cache._entries[("u1", "/documents")]["etag"] == '"v2"'
+
+
+def test_errors_are_not_cached():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'{"error": "x"}', status=500), _response(b'["a"]'))
+    assert cache.fetch("u1", "/documents", upstream)[1] == 500
+    assert cache.fetch("u1", "/documents", upstream) == (b'["a"]', 200, "application/json")
+
+
+def test_invalidation_drops_the_users_entries():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]'), _response(b'["x"]'), _response(b'["a","b"]'))
+    cache.fetch("u1", "/documents", upstream)
+    cache.fetch("u2", "/documents", upstream)
+    cache.invalidate_user("u1")
+    assert cache.fetch("u1", "/documents", upstream)[0] == b'["a","b"]'
+    assert cache.fetch("u2", "/documents", upstream)[0] == b'["x"]'
+
+
+def test_fetch_that_started_before_an_invalidation_is_not_stored():
+    cache = VMResponseCache(ttl=60)
+
+    def racing(etag):
+        cache.invalidate_user("u1")  # e.g. an upload finished while this listing was in flight
+        return _response(b'["old"]')
+
+    assert cache.fetch("u1", "/documents", racing)[0] == b'["old"]'
+    assert ("u1", "/documents") not in cache._entries
+
+
+def test_shared_generations_retire_entries_cached_by_another_worker():
+    generations = {}
+    shared = SimpleNamespace(get=lambda user: generations.get(user, 0),
+                             incr=lambda user: generations.update({user: generations.get(user, 0) + 1}))
+    worker_a, worker_b = VMResponseCache(ttl=60, generations=shared), VMResponseCache(ttl=60, generations=shared)
+    upstream = _Upstream(_response(b'["a"]'), _response(b'["a","b"]'))
+    worker_a.fetch("u1", "/documents", upstream)
+    worker_b.invalidate_user("u1")
+    assert worker_a.fetch("u1", "/documents", upstream)[0] == b'["a","b"]'
+
+
+def test_entry_bound_evicts_least_recently_used():
+    cache = VMResponseCache(ttl=60, max_entries=2)
+    upstream = _Upstream(*(_response(f'["{i}"]'.encode()) for i in range(4)))
+    cache.fetch("u1", "/a", upstream)
+    cache.fetch("u1", "/b", upstream)
+    cache.fetch("u1", "/a", upstream)  # hit: /b is now least recently used
+    cache.fetch("u1", "/c", upstream)
+    assert list(cache._entries) == [("u1", "/a"), ("u1", "/c")]
+
+
+def test_byte_bound_evicts_least_recently_used():
+    cache = VMResponseCache(ttl=60, max_bytes=25)
+    upstream = _Upstream(_response(b"a" * 10), _response(b"b" * 10), _response(b"c" * 10), _response(b"d" * 30))
+    for path in ("/a", "/b", "/c"):
+        cache.fetch("u1", path, upstream)
+    assert list(cache._entries) == [("u1", "/b"), ("u1", "/c")]
+    assert cache.size_bytes == 20
+    # Larger than the whole cache: served, never stored
+    assert cache.fetch("u1", "/d", upstream)[0] == b"d" * 30
+    assert ("u1", "/d") not in cache._entries and cache.size_bytes == 20
+
+
+def test_expired_entry_is_served_when_upstream_fails():
+    cache = VMResponseCache(ttl=60)
+    upstream = _Upstream(_response(b'["a"]', etag='"v1"'), ConnectionError("VM API down"))
+    cache.fetch("u1", "/documents", upstream)
+    _expire(cache, "u1", "/documents")
+    assert cache.fetch("u1", "/documents", upstream) == (b'["a"]', 200, "application/json")
+
+
+def test_upstream_failure_without_a_cached_copy_raises():
+    cache = VMResponseCache(ttl=60)
+    with pytest.raises(ConnectionError):
+        cache.fetch("u1", "/documents", _Upstream(ConnectionError("VM API down")))
@@ -0,0 +1,57 @@
+import threading
+
+from warmup import Warmup
+
+
+def test_components_run_concurrently_and_report_ready():
+    both_running = threading.Barrier(2)
+    warmup = Warmup(enabled=True, components="")
+    warmup.register("openai", lambda: both_running.wait(5))
+    warmup.register("vm", lambda: both_running.wait(5))
+    warmup.start()
+    assert warmup.wait(5)
+    components = warmup.status()["components"]
+    assert {name: c["status"] for name, c in components.items()} == {"openai": "ok", "vm": "ok"}
+
+
+def test_failures_do_not_hold_readiness_back():
+    def broken():
+        raise RuntimeError("no credentials")
+
+    warmup = Warmup(enabled=True, components="")
+    warmup.register("foundry", broken)
+    warmup.start()
+    assert warmup.wait(5)
+    assert warmup.status()["components"]["foundry"]["error"] == "no credentials"
+
+
+def test_slow_components_time_out():
+    release = threading.Event()
+    warmup = Warmup(enabled=True, components="", timeout=0.05)
+    warmup.register("tokenizer", lambda: release.wait(5))
+    warmup.start()
+    assert warmup.wait(5)
+    assert warmup.status()["components"]["tokenizer"]["status"] == "timeout"
+    release.set()
+
+
+def test_disabled_and_unselected_components_are_skipped():
+    calls = []
+    warmup = Warmup(enabled=True, components="vm")
+    warmup.register("vm", lambda: calls.append("vm"))
+    warmup.register("openai", lambda: calls.append("openai"))
+    warmup.register("firebase", lambda: calls.append("firebase"), enabled=False)
+    warmup.start()
+    warmup.start()
+    assert warmup.wait(5)
+    assert calls == ["vm"]
+    assert warmup.status()["components"]["openai"]["status"] == "skipped"
+    assert warmup.status()["components"]["firebase"]["status"] == "skipped"
+
+
+def test_turned_off_warmup_is_ready_at_once():
+    warmup = Warmup(enabled=False)
+    warmup.register("vm", lambda: None)
+    assert not warmup.ready
+    warmup.start()
+    assert warmup.ready
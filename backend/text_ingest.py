@@ -0,0 +1,316 @@
+# text_ingest.py
+import codecs
+import csv
+import io
+import math
+import os
+import re
+
+# Bytes read per chunk when streaming a text file
+READ_CHUNK_BYTES = 1 << 20
+# Text pages stored for paging through large TXT files
+TEXT_PAGE_CHARS = 64 * 1024
+# Text kept inline as the document's content (what chat pastes into prompts), rounded down to whole pages
+MAX_INLINE_CONTENT_CHARS = int(os.getenv("MAX_INLINE_CONTENT_CHARS", str(1_000_000)))
+# CSV rows written to the store per transaction
+ROW_BATCH_SIZE = 1000
+# Rows shown in a CSV document's content, after the column summary
+CSV_PREVIEW_ROWS = 20
+# Per-column bounds that keep statistics constant-size
+DISTINCT_LIMIT = 1000
+TOP_VALUES = 5
+_HEAVY_HITTER_SLOTS = 50
+
+CONTENT_TRUNCATED_MARKER = "\n\n[... file continues; page through the full text via /documents/{id}/rows ...]"
+
+_WORD = re.compile(r"\S+")
+
+
+def _progress_reporter(progress, total_bytes, start, end):
+    """progress(stage, percent) throttled to whole-percent steps between start and end."""
+    last = [-1]
+
+    def report(done_bytes):
+        if not progress or not total_bytes:
+            return
+        percent = start + int((end - start) * min(done_bytes / total_bytes, 1.0))
+        if percent != last[0]:
+            last[0] = percent
+            progress("extracting", percent)
+
+    return report
+
+
+def ingest_text(file_path, document_id, store, progress=None):
+    """Stream a text file in chunks, keeping its start as content and storing the rest as pages.
+
+    Returns (content, stats): content is the text itself, cut after
+    stats["inline_pages"] pages of TEXT_PAGE_CHARS (MAX_INLINE_CONTENT_CHARS)
+    for very large files. Only the pages after the cut are written to the
+    store, so each character is stored once; text_pages() reads both back.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    report = _progress_reporter(progress, os.path.getsize(file_path), 10, 55)
+    inline_pages = max(MAX_INLINE_CONTENT_CHARS // TEXT_PAGE_CHARS, 1)
+    inline = []
+    page = []
+    page_chars = 0
+    pages = 0
+    stats = {"kind": "text", "bytes": 0, "chars": 0, "lines": 0, "words": 0}
+    # A word split across chunks must only be counted once
+    in_word = False
+    last_char = ""
+
+    def flush_page():
+        nonlocal page, page_chars, pages
+        if page:
+            if pages < inline_pages:
+                inline.extend(page)
+            else:
+                store.add_rows(document_id, pages, [{"text": "".join(page)}])
+            pages += 1
+            page, page_chars = [], 0
+
+    store.delete_rows(document_id)
+    with open(file_path, "rb") as f:
+        while True:
+            raw = f.read(READ_CHUNK_BYTES)
+            final = not raw
+            text = decoder.decode(raw, final=final)
+            stats["bytes"] += len(raw)
+            if text:
+                stats["chars"] += len(text)
+                stats["lines"] += text.count("\n")
+                words = len(_WORD.findall(text))
+                if in_word and not text[0].isspace():
+                    words -= 1
+                stats["words"] += words
+                in_word = not text[-1].isspace()
+                last_char = text[-1]
+
+                while text:
+                    take = text[:TEXT_PAGE_CHARS - page_chars]
+                    page.append(take)
+                    page_chars += len(take)
+                    text = text[len(take):]
+                    if page_chars >= TEXT_PAGE_CHARS:
+                        flush_page()
+            report(stats["bytes"])
+            if final:
+                break
+    flush_page()
+
+    if last_char and last_char != "\n":
+        stats["lines"] += 1
+    stats["pages"] = pages
+    stats["inline_pages"] = min(pages, inline_pages)
+    stats["truncated"] = pages > inline_pages
+    # Not stripped at the start: pages are sliced out of content by offset
+    content = "".join(inline)
+    if stats["truncated"]:
+        content += CONTENT_TRUNCATED_MARKER.format(id=document_id)
+    else:
+        content = content.rstrip()
+    return content, stats
+
+
+def text_pages(document_id, content, stats, store, offset=0, limit=100):
+    """Pages offset.. of an ingested text file: sliced from content, then read from the store.
+
+    Documents ingested before pages were split this way have every page in
+    the store (no "inline_pages" in their stats).
+    """
+    inline_pages = stats.get("inline_pages", 0)
+    pages = []
+    for seq in range(offset, min(offset + limit, inline_pages)):
+        text = content[seq * TEXT_PAGE_CHARS:(seq + 1) * TEXT_PAGE_CHARS]
+        if text:
+            pages.append({"text": text})
+    if offset + limit > inline_pages:
+        start = max(offset, inline_pages)
+        pages += store.get_rows(document_id, start, offset + limit - start)
+    return pages
+
+
+class _ColumnStats:
+    """Bounded-memory running statistics for one CSV column."""
+
+    __slots__ = ("name", "filled", "numeric", "total", "min", "max", "max_length",
+                 "distinct", "distinct_overflow", "heavy")
+
+    def __init__(self, name):
+        self.name = name
+        self.filled = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.max_length = 0
+        self.distinct = set()
+        self.distinct_overflow = False
+        # Misra-Gries counters: approximate most frequent values in fixed space
+        self.heavy = {}
+
+    def add(self, value):
+        value = value.strip()
+        if not value:
+            return
+        self.filled += 1
+        self.max_length = max(self.max_length, len(value))
+        try:
+            number = float(value.replace(",", ""))
+        except ValueError:
+            number = None
+        if number is not None and math.isfinite(number):
+            self.numeric += 1
+            self.total += number
+            self.min = min(self.min, number)
+            self.max = max(self.max, number)
+
+        if not self.distinct_overflow:
+            self.distinct.add(value)
+            if len(self.distinct) > DISTINCT_LIMIT:
+                self.distinct_overflow = True
+                self.distinct = set()
+
+        heavy = self.heavy
+        if value in heavy:
+            heavy[value] += 1
+        elif len(heavy) < _HEAVY_HITTER_SLOTS:
+            heavy[value] = 1
+        else:
+            for key in list(heavy):
+                heavy[key] -= 1
+                if not heavy[key]:
+                    del heavy[key]
+
+    def summary(self):
+        out = {"name": self.name, "filled": self.filled, "max_length": self.max_length}
+        out["distinct"] = f"{DISTINCT_LIMIT}+" if self.distinct_overflow else len(self.distinct)
+        # Mostly-numeric columns get numeric stats; the rest get frequent values
+        if self.numeric and self.numeric >= 0.9 * self.filled:
+            out.update(type="numeric", min=self.min, max=self.max, mean=round(self.total / self.numeric, 4))
+        else:
+            top = sorted(self.heavy.items(), key=lambda item: -item[1])[:TOP_VALUES]
+            out.update(type="text", top_values=[value for value, _ in top])
+        return out
+
+
+def _free_name(base, taken):
+    """base, or base_2, base_3... whichever isn't taken yet."""
+    name, n = base, 2
+    while name in taken:
+        name = f"{base}_{n}"
+        n += 1
+    return name
+
+
+def _unique_columns(header):
+    """Column names for a header row: blanks get column_N, repeats get _2, _3...
+
+    Real header names keep priority, so a generated name never takes one
+    that appears later in the header.
+    """
+    reserved = {name.strip() for name in header if name.strip()}
+    columns = []
+    taken = set()
+    for i, name in enumerate(header):
+        name = name.strip()
+        if not name or name in taken:
+            name = _free_name(name or f"column_{i + 1}", taken | reserved)
+        taken.add(name)
+        columns.append(name)
+    return columns
+
+
+def _sniff_dialect(path):
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        sample = f.read(64 * 1024)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        return csv.excel
+
+
+def _format_number(value):
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def _csv_content(filename, columns, row_count, column_stats, preview, dialect):
+    """Compact description of a CSV file used as its document content."""
+    lines = [f"CSV file: {filename}", f"Rows: {row_count:,}", f"Columns ({len(columns)}): {', '.join(columns)}",
+             "", "Column summary:"]
+    for stats in column_stats:
+        if stats["type"] == "numeric":
+            detail = (f"numeric, min {_format_number(stats['min'])}, max {_format_number(stats['max'])}, "
+                      f"mean {_format_number(stats['mean'])}")
+        else:
+            detail = f"{stats['distinct']} distinct" + (
+                f", frequent: {', '.join(repr(v) for v in stats['top_values'])}" if stats["top_values"] else "")
+        lines.append(f"- {stats['name']}: {stats['filled']:,} filled, {detail}")
+
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=getattr(dialect, "delimiter", ","), lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(preview)
+    lines += ["", f"First {len(preview)} rows:", out.getvalue().rstrip("\n")]
+    return "\n".join(lines)
+
+
+def ingest_csv(file_path, document_id, filename, store, progress=None):
+    """Stream a CSV file into structured rows with running per-column statistics.
+
+    Each data row is stored as a {column: value} record, pageable through
+    store.get_rows. Returns (content, stats): content is a bounded summary
+    (columns, statistics and the first rows) rather than the whole file.
+    """
+    dialect = _sniff_dialect(file_path)
+    total_bytes = os.path.getsize(file_path)
+    report = _progress_reporter(progress, total_bytes, 10, 55)
+    store.delete_rows(document_id)
+
+    with open(file_path, "rb") as raw:
+        f = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+        reader = csv.reader(f, dialect)
+        header = next(reader, None)
+        if header is None:
+            return f"CSV file: {filename}\nRows: 0", {"kind": "csv", "bytes": total_bytes, "rows": 0, "columns": []}
+        columns = _unique_columns(header)
+        stats = [_ColumnStats(name) for name in columns]
+        preview = []
+        batch = []
+        row_count = 0
+        width = len(columns)
+
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) > width:
+                # Ragged rows keep their extra cells under generated names
+                for i in range(width, len(row)):
+                    columns.append(_free_name(f"column_{i + 1}", set(columns)))
+                    stats.append(_ColumnStats(columns[-1]))
+                width = len(row)
+            for column_stats, value in zip(stats, row):
+                column_stats.add(value)
+            if len(preview) < CSV_PREVIEW_ROWS:
+                preview.append(row)
+            batch.append(dict(zip(columns, row)))
+            row_count += 1
+            if len(batch) >= ROW_BATCH_SIZE:
+                store.add_rows(document_id, row_count - len(batch), batch)
+                batch = []
+                report(raw.tell())
+        if batch:
+            store.add_rows(document_id, row_count - len(batch), batch)
+        report(total_bytes)
+
+    column_stats = [s.summary() for s in stats]
+    content = _csv_content(filename, columns, row_count, column_stats, preview, dialect)
+    return content, {
+        "kind": "csv",
+        "bytes": total_bytes,
+        "rows": row_count,
+        "columns": column_stats,
+        "delimiter": getattr(dialect, "delimiter", ","),
+    }
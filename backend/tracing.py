@@ -0,0 +1,306 @@
+# tracing.py
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_FILE = os.getenv("TRACE_FILE", "data/traces.jsonl")  # empty string disables file export
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_RING_SIZE = int(os.getenv("TRACE_RING_SIZE", "2048"))
+EXPORT_INTERVAL_SECONDS = 1.0
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SPAN_METRIC = "app_span_duration_seconds"
+REQUEST_METRIC = "app_request_duration_seconds"
+
+_current_trace = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("span_id", default=None)
+# Per-process span ids; a trace is one request, served by one process
+_span_ids = itertools.count(1)
+_ring = deque(maxlen=TRACE_RING_SIZE)
+_pending_export = deque(maxlen=100000)  # drops oldest if the exporter falls behind
+_lock = threading.Lock()
+_histograms = {}   # (metric, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}     # (metric, labels) -> value
+_gauges = {}       # (metric, labels) -> value
+_gauge_callbacks = {}  # (metric, labels) -> fn returning the current value
+_exporter_started = False
+# perf_counter() -> wall clock offset, so spans only read one clock on the hot path
+_WALL_OFFSET = time.time() - time.perf_counter()
+
+
+class Span:
+    """Times a block of work and records it to the ring buffer, exporter and histograms.
+
+    Spans opened inside it (in the same thread or task) record it as their parent.
+    """
+
+    __slots__ = ("name", "attrs", "metric", "labels", "start", "span_id", "parent_id", "_token")
+
+    def __init__(self, name, attrs=None, metric=SPAN_METRIC, labels=None):
+        self.name = name
+        self.attrs = attrs
+        self.metric = metric
+        self.labels = labels
+
+    def set(self, key, value):
+        if self.attrs is None:
+            self.attrs = {}
+        self.attrs[key] = value
+
+    def __enter__(self):
+        self.span_id = next(_span_ids)
+        self.parent_id = _current_span.get()
+        self._token = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        _record(self, duration, exc_type)
+        return False
+
+
+class _NoopSpan:
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **attrs):
+    """Context manager that records a timed span: `with span("openai.completion", model=m): ...`"""
+    if not TRACING_ENABLED:
+        return _NOOP
+    return Span(name, attrs or None)
+
+
+def traced(name):
+    """Decorator form of span() for whole functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(s, duration, exc_type):
+    # Spans are kept as tuples on the hot path and only turned into dicts when read
+    record = (_current_trace.get(), s.span_id, s.parent_id, s.name, s.start, duration, s.attrs, exc_type)
+    _ring.append(record)
+    if TRACE_FILE:
+        _pending_export.append(record)
+        if not _exporter_started:
+            _start_exporter()
+
+    key = (s.metric, s.labels if s.labels is not None else s.name)
+    index = bisect.bisect_left(BUCKETS, duration)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[index] += 1
+        hist[-1] += duration
+
+
+def _as_dict(record):
+    trace_id, span_id, parent_id, name, start, duration, attrs, exc_type = record
+    span_dict = {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "ts": _WALL_OFFSET + start,
+        "duration_ms": duration * 1000,
+    }
+    if attrs:
+        span_dict["attrs"] = attrs
+    if exc_type is not None:
+        span_dict["error"] = exc_type.__name__
+    return span_dict
+
+
+def observe(metric, seconds, labels=()):
+    """Add one observation to a latency histogram."""
+    key = (metric, tuple(labels))
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[index] += 1
+        hist[-1] += seconds
+
+
+def inc(metric, value=1, **labels):
+    """Increment a counter."""
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(metric, value, **labels):
+    _gauges[(metric, tuple(sorted(labels.items())))] = value
+
+
+def register_gauge(metric, fn, **labels):
+    """Register a gauge whose value is computed by fn() at scrape time."""
+    _gauge_callbacks[(metric, tuple(sorted(labels.items())))] = fn
+
+
+def counter_value(metric, **labels):
+    return _counters.get((metric, tuple(sorted(labels.items()))), 0)
+
+
+def current_trace_id():
+    return _current_trace.get()
+
+
+def recent_spans(limit=100, trace_id=None):
+    """Most recent spans from the in-process ring buffer, newest first."""
+    spans = list(_ring)
+    if trace_id:
+        spans = [s for s in spans if s[0] == trace_id]
+    return [_as_dict(s) for s in spans[::-1][:limit]]
+
+
+# ── Request-level tracing ────────────────────────────────────────────
+
+def init_app(app):
+    """Wrap every Flask request in a route span with its own trace ID."""
+    if not TRACING_ENABLED:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_span():
+        trace_id = request.headers.get("X-Trace-Id") or uuid.uuid4().hex[:16]
+        g.trace_token = _current_trace.set(trace_id)
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        g.trace_span = Span(f"route {rule}", {"method": request.method}, metric=REQUEST_METRIC)
+        g.trace_span.labels = (("method", request.method), ("route", rule), ("status", "500"))
+        g.trace_span.__enter__()
+
+    @app.after_request
+    def _tag_response(response):
+        route_span = g.get("trace_span")
+        if route_span is not None:
+            route_span.labels = route_span.labels[:2] + (("status", str(response.status_code)),)
+            response.headers["X-Trace-Id"] = _current_trace.get() or ""
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        route_span = g.pop("trace_span", None)
+        if route_span is not None:
+            route_span.__exit__(type(exc) if exc else None, exc, None)
+        token = g.pop("trace_token", None)
+        if token is not None:
+            _current_trace.reset(token)
+
+
+# ── Export ───────────────────────────────────────────────────────────
+
+def _start_exporter():
+    global _exporter_started
+    with _lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+    threading.Thread(target=_export_loop, name="trace-exporter", daemon=True).start()
+
+
+def _export_loop():
+    while True:
+        time.sleep(EXPORT_INTERVAL_SECONDS)
+        try:
+            flush()
+        except Exception as e:
+            print(f"Trace export failed: {e}")
+
+
+def flush():
+    """Append buffered spans to the trace file as JSON lines."""
+    if not _pending_export:
+        return
+    lines = []
+    while _pending_export:
+        lines.append(json.dumps(_as_dict(_pending_export.popleft()), default=str))
+    directory = os.path.dirname(TRACE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) > TRACE_FILE_MAX_BYTES:
+        os.replace(TRACE_FILE, TRACE_FILE + ".1")
+    with open(TRACE_FILE, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    """All histograms, counters and gauges in Prometheus text exposition format."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+    gauges = dict(_gauges)
+    for key, fn in list(_gauge_callbacks.items()):
+        try:
+            gauges[key] = fn()
+        except Exception:
+            pass
+
+    lines = []
+    seen_types = set()
+
+    def type_line(metric, kind):
+        if metric not in seen_types:
+            seen_types.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for (metric, labels), hist in sorted(histograms.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        if isinstance(labels, str):
+            labels = (("span", labels),)
+        type_line(metric, "histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        cumulative += hist[len(BUCKETS)]
+        lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {cumulative}")
+    for (metric, labels), value in sorted(counters.items()):
+        type_line(metric, "counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    for (metric, labels), value in sorted(gauges.items()):
+        type_line(metric, "gauge")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+# vm_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from tracing import inc, register_gauge
+
+VM_CACHE_TTL_SECONDS = float(os.getenv("VM_CACHE_TTL_SECONDS", "15"))
+VM_CACHE_MAX_ENTRIES = int(os.getenv("VM_CACHE_MAX_ENTRIES", "2000"))
+VM_CACHE_MAX_BYTES = int(os.getenv("VM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class _LocalGenerations:
+    """Per-user invalidation counters for a single process."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._values.get(user_id, 0)
+
+    def incr(self, user_id):
+        with self._lock:
+            self._values[user_id] = self._values.get(user_id, 0) + 1
+
+
+class VMResponseCache:
+    """Per-user LRU cache of VM API GET responses with short TTLs and ETag revalidation.
+
+    Keys are (user_id, path). Entries past their TTL are kept until evicted so
+    their ETag can be used for a conditional request. Pass a shared
+    `generations` store (get/incr by user) when several processes each hold a
+    cache, so an invalidation in one worker retires entries in all of them.
+    """
+
+    def __init__(self, ttl=VM_CACHE_TTL_SECONDS, max_entries=VM_CACHE_MAX_ENTRIES, max_bytes=VM_CACHE_MAX_BYTES,
+                 generations=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Bumped on invalidation so a fetch that started earlier can't re-cache stale data
+        self._generations = generations or _LocalGenerations()
+        self._lock = threading.Lock()
+        register_gauge("vm_cache_entries", lambda: len(self._entries))
+        register_gauge("vm_cache_bytes", lambda: self.size_bytes)
+        register_gauge("vm_cache_hit_ratio", self.hit_ratio)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
+
+    def fetch(self, user_id, path, fetch_upstream):
+        """Return (content, status, content_type) for path, calling
+        fetch_upstream(etag) -> response only on a miss or for revalidation."""
+        key = (user_id, path)
+        now = time.monotonic()
+        generation = self._generations.get(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["generation"] != generation:
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry["expires_at"] > now:
+                    self.hits += 1
+                    inc("vm_cache_requests_total", result="hit")
+                    return entry["content"], 200, entry["content_type"]
+
+        try:
+            resp = fetch_upstream(entry["etag"] if entry else None)
+        except Exception:
+            if entry is None:
+                raise
+            # Upstream is down or slow: an expired copy beats an error for a listing
+            inc("vm_cache_requests_total", result="stale")
+            return entry["content"], 200, entry["content_type"]
+
+        if resp.status_code == 304 and entry is not None:
+            current = self._generations.get(user_id)
+            with self._lock:
+                if current == generation:
+                    entry["expires_at"] = time.monotonic() + self.ttl
+                self.hits += 1
+            inc("vm_cache_requests_total", result="revalidated")
+            return entry["content"], 200, entry["content_type"]
+
+        with self._lock:
+            self.misses += 1
+        inc("vm_cache_requests_total", result="miss")
+        content_type = resp.headers.get("Content-Type", "application/json")
+        if resp.status_code == 200:
+            self._store(key, resp.content, content_type, resp.headers.get("ETag"), generation)
+        return resp.content, resp.status_code, content_type
+
+    def _discard(self, key):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= len(old["content"])
+
+    def _store(self, key, content, content_type, etag, generation):
+        if self._generations.get(key[0]) != generation:
+            return
+        with self._lock:
+            self._discard(key)
+            if len(content) > self.max_bytes:
+                return
+            self._entries[key] = {
+                "content": content,
+                "content_type": content_type,
+                "etag": etag,
+                "generation": generation,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self.size_bytes += len(content)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted["content"])
+                inc("vm_cache_evictions_total")
+
+    def invalidate_user(self, user_id):
+        """Drop every cached response for a user (after they add or delete a document)."""
+        self._generations.incr(user_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._discard(key)
+        inc("vm_cache_invalidations_total")
@@ -0,0 +1,109 @@
+# warmup.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from tracing import observe, register_gauge, span
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Comma-separated components to warm (e.g. "openai,vm"); empty means every registered one
+WARMUP_COMPONENTS = os.getenv("WARMUP_COMPONENTS", "")
+# Report ready after this long even if some components are still warming
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "60"))
+
+
+class Warmup:
+    """Start-up tasks run concurrently in a background thread.
+
+    Components are registered as (name, fn) and run once per process by
+    start(). The process counts as ready when every selected component has
+    finished, whether it succeeded or failed, or when the timeout passes;
+    failures are reported but don't hold readiness back, since the request
+    path initializes lazily anyway.
+    """
+
+    def __init__(self, enabled=WARMUP_ENABLED, components=WARMUP_COMPONENTS, timeout=WARMUP_TIMEOUT_SECONDS):
+        self.enabled = enabled
+        self.selected = {c.strip() for c in components.split(",") if c.strip()}
+        self.timeout = timeout
+        self._tasks = {}
+        self._results = {}
+        self._started_at = None
+        self._finished_at = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        register_gauge("warmup_ready", lambda: int(self._ready.is_set()))
+
+    def register(self, name, fn, enabled=True):
+        """Add a component; enabled=False lists it as skipped (e.g. its credentials aren't configured)."""
+        self._tasks[name] = (fn, enabled)
+
+    def start(self):
+        """Run the selected components in the background. Idempotent."""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.perf_counter()
+        names = []
+        for name, (_, enabled) in self._tasks.items():
+            if not self.enabled or not enabled or (self.selected and name not in self.selected):
+                self._results[name] = {"status": "skipped"}
+            else:
+                self._results[name] = {"status": "pending"}
+                names.append(name)
+        if not names:
+            self._finish()
+            return
+        threading.Thread(target=self._run, args=(names,), name="warmup", daemon=True).start()
+
+    def _run(self, names):
+        pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="warmup")
+        futures = [pool.submit(self._run_one, name) for name in names]
+        wait(futures, timeout=self.timeout)
+        # Stragglers keep running, but no longer hold readiness back
+        pool.shutdown(wait=False)
+        for name in names:
+            if self._results[name]["status"] == "pending":
+                self._results[name] = {"status": "timeout"}
+        self._finish()
+
+    def _run_one(self, name):
+        fn, _ = self._tasks[name]
+        start = time.perf_counter()
+        try:
+            with span(f"warmup.{name}"):
+                fn()
+            result = {"status": "ok"}
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            result = {"status": "error", "error": str(e)}
+        seconds = time.perf_counter() - start
+        observe("warmup_seconds", seconds, (("component", name),))
+        result["seconds"] = round(seconds, 4)
+        self._results[name] = result
+
+    def _finish(self):
+        self._finished_at = time.perf_counter()
+        self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Block until ready; returns whether it became ready within timeout."""
+        return self._ready.wait(timeout)
+
+    def status(self):
+        """Readiness, total warm-up time and per-component status/timings."""
+        if self._started_at is None:
+            elapsed = None
+        else:
+            elapsed = round((self._finished_at or time.perf_counter()) - self._started_at, 4)
+        return {
+            "ready": self.ready,
+            "started": self._started_at is not None,
+            "seconds": elapsed,
+            "components": dict(self._results),
+        }
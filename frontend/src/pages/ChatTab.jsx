@@ -22,7 +22,7 @@ export default function ChatTab() {
   const [input, setInput] = useState("");
   const [file, setFile] = useState(null);
   const [chatHistory, setChatHistory] = useState([]);
-  const [currentChatId, setCurrentChatId] = useState(null);
+  const [currentChatId, setCurrentChatId] = useState(() => Date.now());
   const [documents, setDocuments] = useState([]);
   const [selectedDocuments, setSelectedDocuments] = useState([]);
   const [isUploading, setIsUploading] = useState(false);
@@ -50,6 +50,17 @@ export default function ChatTab() {
     }
   };
 
+  // Uploads are processed in the background; poll until extraction finishes
+  const waitForUpload = async (jobId) => {
+    for (;;) {
+      const response = await apiFetch(`${API}/upload/status/${jobId}`);
+      const job = await response.json();
+      if (job.status === "done") return job;
+      if (job.status === "failed" || !response.ok) throw new Error(job.error || "Processing failed");
+      await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+  };
+
   const uploadFile = async (fileToUpload) => {
     setIsUploading(true);
     try {
@@ -58,6 +69,7 @@ export default function ChatTab() {
       const response = await apiFetch(`${API}/upload`, { method: "POST", body: formData });
       const data = await response.json();
       if (data.success) {
+        if (data.job_id) await waitForUpload(data.job_id);
         await loadDocuments();
         return data.document_id;
       } else {
@@ -139,7 +151,7 @@ export default function ChatTab() {
       const response = await apiFetch(`${API}/chat`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: currentInput, model, mode, document_ids: selectedDocuments }),
+        body: JSON.stringify({ message: currentInput, model, mode, document_ids: selectedDocuments, session_id: currentChatId }),
       });
       const data = await response.json();
       setMessages((prev) => [...prev, { role: "assistant", content: data.response }]);
@@ -11,6 +11,9 @@ Usage:
   3. Search Indeed and add results:
        python graphiti-add-jobs.py --search "Full Stack Engineer" --location "Phoenix, AZ" --count 10
 
+  4. Also export a local snapshot of the graph for in-process search:
+       python graphiti-add-jobs.py --file jobs.json --snapshot
+
 JSON file format (jobs.json):
 [
   {
@@ -26,11 +29,17 @@ import asyncio
 import argparse
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv("backend/.env")
 
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+# Share the backend's search cache, so ingestion here invalidates what the app has cached
+os.environ.setdefault("SHARED_STATE_DB", os.path.join(BACKEND_DIR, "db", "shared_state.db"))
+
 NEO4J_URI = os.getenv("NEO4J_URI", "neo4j+s://8ab5755a.databases.neo4j.io")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
@@ -69,10 +78,11 @@ def get_interactive_job():
     return [{"title": title, "company": company, "location": location, "description": description}]
 
 
-async def add_jobs_to_graph(jobs):
+async def add_jobs_to_graph(jobs, snapshot=False):
     """Feed job descriptions into Graphiti as episodes."""
     from graphiti_core import Graphiti
     from graphiti_core.nodes import EpisodeType
+    from graph_search import GRAPH_SNAPSHOT_PATH, GraphSearch, export_snapshot, invalidate_graph_cache
 
     if not NEO4J_PASSWORD:
         print("ERROR: Set NEO4J_PASSWORD in backend/.env")
@@ -131,16 +141,22 @@ async def add_jobs_to_graph(jobs):
 
     # Show updated stats
     print(f"\n--- Added {added}/{len(jobs)} jobs to knowledge graph ---")
+    if added:
+        invalidate_graph_cache()
+
+    if snapshot:
+        path = os.path.join(BACKEND_DIR, GRAPH_SNAPSHOT_PATH)
+        nodes, edges = await export_snapshot(graphiti, path)
+        print(f"Exported snapshot: {nodes} nodes, {edges} edges -> {path}")
 
     print("\nRunning test search: 'What companies are hiring for React?'")
-    results = await graphiti.search(
-        query="What companies are hiring for React and full stack roles?",
+    results = await GraphSearch(graphiti).search(
+        "What companies are hiring for React and full stack roles?",
         num_results=5,
     )
     print(f"Found {len(results)} results:")
     for r in results:
-        fact = getattr(r, 'fact', str(r))
-        print(f"  - {fact}")
+        print(f"  - {r.get('fact', r)}")
 
     await graphiti.close()
     print("\nDone! Open Neo4j Explore to see the updated graph.")
@@ -151,6 +167,7 @@ def main():
     parser.add_argument("--file", "-f", help="Path to a JSON file with job descriptions")
     parser.add_argument("--interactive", "-i", action="store_true", help="Enter a job interactively")
     parser.add_argument("--skip", "-s", type=int, default=0, help="Skip first N jobs (to avoid re-importing)")
+    parser.add_argument("--snapshot", action="store_true", help="Export a local graph snapshot after adding jobs")
     args = parser.parse_args()
 
     if args.file:
@@ -188,7 +205,7 @@ def main():
         print("No jobs found in input.")
         return
 
-    asyncio.run(add_jobs_to_graph(jobs))
+    asyncio.run(add_jobs_to_graph(jobs, snapshot=args.snapshot))
 
 
 if __name__ == "__main__":
@@ -5,11 +5,17 @@ Connects to Neo4j AuraDB, initializes indices, and feeds resume data.
 
 import asyncio
 import os
+import sys
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv("backend/.env")
 
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+# Share the backend's search cache, so ingestion here invalidates what the app has cached
+os.environ.setdefault("SHARED_STATE_DB", os.path.join(BACKEND_DIR, "db", "shared_state.db"))
+
 # Neo4j AuraDB connection
 NEO4J_URI = os.getenv("NEO4J_URI", "neo4j+s://8ab5755a.databases.neo4j.io")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
@@ -28,6 +34,7 @@ USER_ID = "sGW6c4TUMGVMbpUDU7NewpgTxPt2"
 
 async def main():
     from graphiti_core import Graphiti
+    from graph_search import GraphSearch, invalidate_graph_cache
     from graphiti_core.nodes import EpisodeType
 
     if not NEO4J_PASSWORD:
@@ -94,14 +101,15 @@ async def main():
             print(f"    Done: {filename}")
 
         print(f"\nAll {len(docs)} resumes added to knowledge graph!")
+        invalidate_graph_cache()
     else:
         print("\nNo COSMOS_CONNECTION_STRING set — skipping resume import.")
         print("You can add episodes manually later.")
 
     # Test search
     print("\n--- Testing search ---")
-    results = await graphiti.search(
-        query="What programming skills does Troy have?",
+    results = await GraphSearch(graphiti).search(
+        "What programming skills does Troy have?",
         num_results=5,
     )
 